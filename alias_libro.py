@@ -0,0 +1,21 @@
+"""
+ALIAS DEL LIBRO
+- Filas de la columna de alias que son encabezados o separadores de las
+  secciones (no certificados)
+- Sin dependencias: usable desde auditoria.py y diff_libros.py sin cargar el
+  motor de auditoria
+"""
+
+
+ALIAS_SKIP = {
+    "alias", "no existen", "# signer certificates",
+    "# personal certificates", "# personal certificate requests",
+    "# custom properties", "issued by", "issued to",
+    "keystore provider: ibmjce"
+}
+
+def es_alias_valido(alias):
+    if not alias:
+        return False
+    a = str(alias).strip().lower()
+    return a not in ALIAS_SKIP
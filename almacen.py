@@ -0,0 +1,244 @@
+"""
+ALMACEN DE INSTANTANEAS v1.0
+- Almacen por contenido en RAIZ/ALMACEN/objetos/ab/<sha256>: cada archivo
+  distinto se guarda una sola vez (los CA repetidos entre ambientes y meses
+  ocupan un objeto)
+- Instantanea por ejecucion: manifiesto JSON en RAIZ/ALMACEN/instantaneas con
+  ruta relativa -> sha256, tamano y fecha de modificacion
+- El hash se reutiliza si el archivo no cambio (mismo tamano y mtime que en la
+  ultima instantanea) o si lo aporta el llamador (copiar.py ya lo calcula)
+- restaurar: arma el arbol de una instantanea copiando los objetos (reflink
+  donde se pueda), escribibles y con su fecha original; la auditoria se
+  puede correr sobre esa carpeta
+- verificar: recalcula el hash de los objetos y reporta los corruptos
+
+Uso:
+  python procesar.py almacen guardar [--raiz ...] [--etiqueta TXT]
+  python procesar.py almacen listar [--raiz ...]
+  python procesar.py almacen restaurar ID DESTINO [--raiz ...]
+  python procesar.py almacen verificar [--raiz ...]
+"""
+
+import os
+import json
+import stat
+import hashlib
+import argparse
+from datetime import datetime
+
+import materializar
+
+
+CARPETA_ALMACEN = "ALMACEN"
+CONTENIDO_DEFAULT = ["archivos_out", "PROCESADOS", "REPORTE_AUDITORIA.xlsx", "lista_maestra.txt",
+                     "lista_maestra.journal"]
+
+
+# ==========================
+# RUTAS
+# ==========================
+def ruta_almacen(raiz):
+    return os.path.join(raiz, CARPETA_ALMACEN)
+
+
+def ruta_objeto(almacen, sha):
+    return os.path.join(almacen, "objetos", sha[:2], sha)
+
+
+def _dir_instantaneas(almacen):
+    return os.path.join(almacen, "instantaneas")
+
+
+def calcular_sha256(ruta):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+# ==========================
+# OBJETOS
+# ==========================
+def guardar_objeto(almacen, ruta, sha):
+    """Agrega el archivo al almacen si su contenido no estaba. True si era nuevo."""
+    destino = ruta_objeto(almacen, sha)
+    if os.path.exists(destino):
+        return False
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    tmp = destino + f".tmp-{os.getpid()}"
+    materializar.copiar(ruta, tmp)
+    os.chmod(tmp, stat.S_IREAD | stat.S_IRGRP | stat.S_IROTH)   # objetos inmutables
+    os.replace(tmp, destino)
+    return True
+
+
+# ==========================
+# INSTANTANEAS
+# ==========================
+def listar(almacen):
+    """Manifiestos (sin la lista de archivos) ordenados del mas antiguo al mas nuevo."""
+    carpeta = _dir_instantaneas(almacen)
+    if not os.path.isdir(carpeta):
+        return []
+    resultado = []
+    for nombre in sorted(os.listdir(carpeta)):
+        if nombre.endswith(".json"):
+            m = cargar(almacen, nombre[:-5])
+            m.pop("archivos")
+            resultado.append(m)
+    return resultado
+
+
+def cargar(almacen, id_instantanea):
+    with open(os.path.join(_dir_instantaneas(almacen), id_instantanea + ".json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _recorrer(raiz, contenido):
+    """(ruta_relativa, ruta_absoluta, os.stat) de cada archivo del contenido, en orden."""
+    for elemento in contenido:
+        base = os.path.join(raiz, elemento)
+        if os.path.isfile(base):
+            yield elemento.replace(os.sep, "/"), base, os.stat(base)
+            continue
+        for actual, dirs, archivos in os.walk(base):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for nombre in sorted(archivos):
+                ruta = os.path.join(actual, nombre)
+                rel  = os.path.relpath(ruta, raiz).replace(os.sep, "/")
+                yield rel, ruta, os.stat(ruta)
+
+
+def tomar_instantanea(raiz, etiqueta="", contenido=None, hashes=None, log=None):
+    """
+    Guarda los objetos nuevos y escribe el manifiesto de la instantanea.
+    hashes: {ruta_absoluta: sha256} ya conocidos (evita releer esos archivos).
+    Retorna el manifiesto.
+    """
+    almacen  = ruta_almacen(raiz)
+    hashes   = hashes or {}
+    previas  = listar(almacen)
+    anterior = cargar(almacen, previas[-1]["id"])["archivos"] if previas else {}
+
+    archivos, nuevos, bytes_nuevos = {}, 0, 0
+    for rel, ruta, st in _recorrer(raiz, contenido or CONTENIDO_DEFAULT):
+        previo = anterior.get(rel)
+        if ruta in hashes:
+            sha = hashes[ruta]
+        elif previo and previo["tam"] == st.st_size and previo["mtime_ns"] == st.st_mtime_ns:
+            sha = previo["sha256"]
+        else:
+            sha = calcular_sha256(ruta)
+        if guardar_objeto(almacen, ruta, sha):
+            nuevos       += 1
+            bytes_nuevos += st.st_size
+        archivos[rel] = {"sha256": sha, "tam": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+    # Microsegundos en el id: dos instantaneas en el mismo segundo (misma etiqueta o no)
+    # no se pisan y el orden por nombre sigue siendo el cronologico
+    os.makedirs(_dir_instantaneas(almacen), exist_ok=True)
+    sufijo = "-" + "".join(c if c.isalnum() else "_" for c in etiqueta) if etiqueta else ""
+    while True:
+        ahora   = datetime.now()
+        id_inst = ahora.strftime("%Y%m%d-%H%M%S-%f") + sufijo
+        ruta_m  = os.path.join(_dir_instantaneas(almacen), id_inst + ".json")
+        if not os.path.exists(ruta_m):
+            break
+    manifiesto = {
+        "id":           id_inst,
+        "fecha":        ahora.strftime("%Y-%m-%d %H:%M:%S"),
+        "etiqueta":     etiqueta,
+        "total":        len(archivos),
+        "objetos":      len({a["sha256"] for a in archivos.values()}),
+        "nuevos":       nuevos,
+        "bytes_nuevos": bytes_nuevos,
+        "archivos":     archivos,
+    }
+    tmp = ruta_m + f".tmp-{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, ruta_m)
+
+    if log:
+        log(f"Instantanea {id_inst}: {len(archivos)} archivos, {manifiesto['objetos']} objetos distintos, "
+            f"{nuevos} nuevos ({bytes_nuevos} bytes)")
+    return manifiesto
+
+
+def restaurar(raiz, id_instantanea, destino):
+    """
+    Arma en 'destino' el arbol de la instantanea. Se copia (reflink donde el
+    sistema de archivos lo permite), no se enlaza: un enlace duro comparte el
+    atributo de solo lectura del objeto y en Windows la carpeta restaurada no
+    se podria borrar ni volver a usar como destino del staging.
+    """
+    almacen    = ruta_almacen(raiz)
+    manifiesto = cargar(almacen, id_instantanea)
+    for rel, datos in manifiesto["archivos"].items():
+        ruta = os.path.join(destino, *rel.split("/"))
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        materializar.copiar(ruta_objeto(almacen, datos["sha256"]), ruta)
+        os.chmod(ruta, stat.S_IMODE(os.stat(ruta).st_mode) | stat.S_IWRITE)
+        os.utime(ruta, ns=(datos["mtime_ns"], datos["mtime_ns"]))   # fecha original del archivo
+    return len(manifiesto["archivos"])
+
+
+def verificar(almacen):
+    """Lista de objetos cuyo contenido ya no coincide con su nombre."""
+    corruptos = []
+    base = os.path.join(almacen, "objetos")
+    if not os.path.isdir(base):
+        return corruptos
+    for sub in sorted(os.listdir(base)):
+        for nombre in sorted(os.listdir(os.path.join(base, sub))):
+            if ".tmp-" in nombre:
+                continue
+            if calcular_sha256(os.path.join(base, sub, nombre)) != nombre:
+                corruptos.append(nombre)
+    return corruptos
+
+
+# ==========================
+# CLI
+# ==========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="procesar.py almacen",
+                                     description="Instantaneas por contenido de archivos_out / PROCESADOS")
+    parser.add_argument("--raiz", default=r"C:\Automatizacion_Excel", help="Carpeta raiz del proyecto")
+    sub = parser.add_subparsers(dest="accion", required=True)
+    p = sub.add_parser("guardar", help="Toma una instantanea del estado actual")
+    p.add_argument("--etiqueta", default="")
+    sub.add_parser("listar", help="Instantaneas guardadas")
+    p = sub.add_parser("restaurar", help="Arma el arbol de una instantanea en otra carpeta")
+    p.add_argument("id")
+    p.add_argument("destino")
+    sub.add_parser("verificar", help="Comprueba el hash de todos los objetos")
+    args = parser.parse_args(argv)
+
+    almacen = ruta_almacen(args.raiz)
+    if args.accion == "guardar":
+        tomar_instantanea(args.raiz, args.etiqueta, log=lambda m: print(m))
+    elif args.accion == "listar":
+        print("Id | Fecha | Archivos | Objetos | Nuevos | Bytes nuevos")
+        print("-" * 60)
+        for m in listar(almacen):
+            print(f"{m['id']} | {m['fecha']} | {m['total']} | {m['objetos']} | {m['nuevos']} | {m['bytes_nuevos']}")
+    elif args.accion == "restaurar":
+        if os.path.exists(args.destino) and os.listdir(args.destino):
+            print(f"El destino no esta vacio: {args.destino}")
+            return 1
+        n = restaurar(args.raiz, args.id, args.destino)
+        print(f"{n} archivos restaurados en {args.destino}")
+        print(f"Para auditar esa ejecucion: python procesar.py auditar --raiz \"{args.destino}\"")
+    elif args.accion == "verificar":
+        corruptos = verificar(almacen)
+        for c in corruptos:
+            print(f"[CORRUPTO] {c}")
+        print(f"{len(corruptos)} objetos corruptos")
+        return 1 if corruptos else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
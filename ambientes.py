@@ -0,0 +1,171 @@
+"""
+DESCUBRIMIENTO DE AMBIENTES v1.0
+- Ambientes detectados de archivos_out/INT_*, PROCESADOS/* y de los nombres de
+  hoja del libro ('<AMBIENTE>-<TIPO>'), sin lista fija en el codigo
+- RAIZ/ambientes.json opcional para overrides (rutas, prefijo, hojas extra,
+  ambientes excluidos)
+- Tabla de ruteo hoja -> ambiente -> tipo -> carpeta calculada una vez por
+  ejecucion: cada hoja se resuelve con una busqueda en diccionario, sin
+  recorrer la lista de ambientes ni listar directorios por hoja
+
+Formato de ambientes.json (todas las claves son opcionales):
+  {
+    "ambientes": {
+      "CAMARANUEVA": {"origen": "archivos_out/INT_NUEVA", "destino": "PROCESADOS/CAMARANUEVA",
+                      "prefijo": "camaranueva", "hojas": ["NUEVA-WAS"]}
+    },
+    "excluir": ["CAMARAOLD"]
+  }
+Las rutas relativas se resuelven contra RAIZ.
+"""
+
+import os
+import zipfile
+
+
+NOMBRE_CONFIG  = "ambientes.json"
+PREFIJO_ORIGEN = "INT_"
+
+TIPO_PLUG  = "PLUG.WAS"
+TIPO_WAS   = "WAS"
+TIPO_AIPAC = "AIPAC"
+
+
+# ==========================
+# TIPO DE HOJA
+# ==========================
+def tipo_hoja(hoja):
+    """PLUG.WAS / WAS / AIPAC segun el sufijo del nombre de hoja, o None."""
+    h = hoja.upper()
+    if "PLUG.WAS" in h:
+        return TIPO_PLUG
+    if h.endswith("WAS"):
+        return TIPO_WAS
+    if h.endswith("AIPAC"):
+        return TIPO_AIPAC
+    return None
+
+
+def _ambiente_en_nombre(hoja):
+    """'CAMARAPROD-COMP.PLUG.WAS' -> 'CAMARAPROD' (solo hojas de tipo conocido)."""
+    if "-" not in hoja or tipo_hoja(hoja) is None:
+        return None
+    return hoja.split("-", 1)[0].strip().upper() or None
+
+
+# ==========================
+# CONFIGURACION OPCIONAL
+# ==========================
+def cargar_config(raiz):
+    ruta = os.path.join(raiz, NOMBRE_CONFIG)
+    if not os.path.exists(ruta):
+        return {}
+    import json
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def hojas_libro(ruta_excel):
+    """Nombres de hoja leyendo solo xl/workbook.xml del zip (sin cargar el libro)."""
+    if not ruta_excel or not os.path.exists(ruta_excel):
+        return []
+    import parche_xlsx
+    with zipfile.ZipFile(ruta_excel) as z:
+        return list(parche_xlsx.mapa_hojas(z))
+
+
+# ==========================
+# DESCUBRIMIENTO
+# ==========================
+def _subcarpetas(carpeta):
+    if not os.path.isdir(carpeta):
+        return []
+    with os.scandir(carpeta) as it:
+        # Las carpetas ocultas (.<AMB>.nuevo-*) son arboles de staging en curso
+        return [e.name for e in it if e.is_dir() and not e.name.startswith(".")]
+
+
+def descubrir(raiz, hojas=(), config=None):
+    """
+    Retorna {AMBIENTE: {"origen", "destino", "prefijo", "hojas"}} ordenado por nombre.
+    Fuentes: archivos_out/INT_<AMB>, PROCESADOS/<AMB>, hojas '<AMB>-<TIPO>' y config.
+    """
+    if config is None:
+        config = cargar_config(raiz)
+
+    dir_origen  = os.path.join(raiz, "archivos_out")
+    dir_destino = os.path.join(raiz, "PROCESADOS")
+    encontrados = {}
+
+    def entrada(amb):
+        return encontrados.setdefault(amb, {
+            "origen":  os.path.join(dir_origen, PREFIJO_ORIGEN + amb),
+            "destino": os.path.join(dir_destino, amb),
+            "prefijo": amb.lower(),
+            "hojas":   [],
+        })
+
+    for d in _subcarpetas(dir_origen):
+        if d.upper().startswith(PREFIJO_ORIGEN) and len(d) > len(PREFIJO_ORIGEN):
+            entrada(d[len(PREFIJO_ORIGEN):].upper())["origen"] = os.path.join(dir_origen, d)
+    for d in _subcarpetas(dir_destino):
+        entrada(d.upper())["destino"] = os.path.join(dir_destino, d)   # respeta mayusculas reales
+    for hoja in hojas:
+        amb = _ambiente_en_nombre(hoja)
+        if amb:
+            entrada(amb)
+
+    for amb, over in (config.get("ambientes") or {}).items():
+        e = entrada(amb.upper())
+        for clave in ("origen", "destino"):
+            if over.get(clave):
+                e[clave] = os.path.join(raiz, over[clave])
+        if over.get("prefijo"):
+            e["prefijo"] = over["prefijo"].lower()
+        e["hojas"] = list(over.get("hojas", []))
+
+    for amb in config.get("excluir") or []:
+        encontrados.pop(amb.upper(), None)
+
+    return {amb: encontrados[amb] for amb in sorted(encontrados)}
+
+
+def filtrar(ambientes, nombres):
+    """Restringe el resultado de descubrir() a los nombres pedidos por CLI (si hay)."""
+    if not nombres:
+        return ambientes
+    pedidos = {n.upper() for n in nombres}
+    return {a: e for a, e in ambientes.items() if a in pedidos}
+
+
+# ==========================
+# TABLA DE RUTEO
+# ==========================
+def ambiente_de_hoja(hoja, ambientes, hojas_config=None):
+    """
+    Ambiente de una hoja: hoja declarada en config, luego prefijo '<AMB>-',
+    y como ultimo recurso el ambiente mas largo contenido en el nombre.
+    """
+    if hojas_config and hoja in hojas_config:
+        return hojas_config[hoja]
+    amb = _ambiente_en_nombre(hoja)
+    if amb in ambientes:
+        return amb
+    nombre = hoja.upper()
+    candidatos = [a for a in ambientes if a in nombre]
+    return max(candidatos, key=len) if candidatos else None
+
+
+def tabla_ruteo(hojas, ambientes):
+    """
+    {hoja: {"ambiente", "tipo", "carpeta"}} para cada hoja con ambiente conocido.
+    Hojas sin ambiente quedan fuera (el llamador decide como informarlas).
+    """
+    hojas_config = {h: amb for amb, e in ambientes.items() for h in e["hojas"]}
+    tabla = {}
+    for hoja in hojas:
+        amb = ambiente_de_hoja(hoja, ambientes, hojas_config)
+        if amb:
+            tabla[hoja] = {"ambiente": amb, "tipo": tipo_hoja(hoja),
+                           "carpeta": ambientes[amb]["destino"]}
+    return tabla
@@ -0,0 +1,1353 @@
+"""
+AUDITORIA DE CERTIFICADOS SSL v5.0
+- Sin colores de comparacion en Excel (solo en log)
+- Amarillo = vence en menos de DIAS_ALERTA dias
+- Rojo = ya vencido
+- Hojas WAS: fecha en col F (signer) o col G (personal)
+- --formato-condicional: fechas F/G/K como fecha de Excel y colores por
+  reglas de rango atadas a HOY() (formato_condicional.py), sin rellenos fijos
+- Hojas AIPAC: fecha en col K
+- Hojas PLUG.WAS: sin fechas de certificado; hoja y manifiesto .sha256 se
+  cruzan ordenados por ruta con memoria acotada (comparar_manifiesto.py) y
+  se informan tambien las rutas del manifiesto que no estan en la hoja
+- Argparse para configuracion por CLI
+- Ambientes descubiertos (archivos_out/INT_*, PROCESADOS, hojas del libro,
+  ambientes.json) y tabla de ruteo hoja -> ambiente -> carpeta precalculada
+- Cache de directorio para mejora de rendimiento
+- Registro de parsers: formato detectado por contenido, un barrido por carpeta
+- Alias sin archivo exacto: indice de trigramas por seccion con distancia de
+  edicion acotada (indice_alias.py); las coincidencias ambiguas van al log
+- Log con fecha completa (YYYY-MM-DD HH:MM:SS)
+- Estadisticas de cobertura al finalizar
+- HTML con exportacion CSV, facetas precalculadas y scroll virtual (reporte_html.py)
+- Modo --salida-parche: solo se reescriben las celdas cambiadas del xlsx
+- --salida-por-ambiente: un libro por ambiente escrito en procesos paralelos
+  apenas terminan sus hojas (salida_ambientes.py); el combinado es opcional
+- Grafo emisor -> sujeto por ambiente (cadenas.py): cada alias
+  hereda el vencimiento mas temprano de su cadena (fecha_efectiva y
+  limitado_por en la clasificacion, el historial, el HTML y las metricas);
+  si un intermedio o la raiz vence dentro de la alerta, se avisa por cadena
+- Lectura nativa de PEM / DER / JKS / PKCS#12 (x509_nativo.py): sirven igual
+  que los volcados GSKit (un certificado) y keytool (keystore)
+- Certificados como registros compactos internados por fingerprint
+  (certificados.py): fingerprint y serial se comparan en forma canonica
+  (bytes / int) sin renormalizar el texto del volcado en cada comparacion
+- Historial SQLite de certificados, comparaciones y vencimientos por ejecucion
+- Indice invertido en disco de todos los volcados (indice_invertido.py),
+  actualizado solo con los archivos modificados; se consulta con 'buscar'
+- --fecha-referencia y --salida: re-auditar un libro archivado al dia de su
+  mes sin pisar la salida actual (modo lote, lote.py)
+- --exportar-resultado: JSON fusionable para el modo fragmentos (fragmentos.py)
+- Metricas Prometheus (duracion por fase y por hoja, lecturas, caches,
+  cobertura, dias para vencer por alias, propio y efectivo) en
+  RAIZ/METRICAS/auditoria.prom
+- Punto de control por hoja en ESTADO_EJECUCION.jsonl; --reanudar retoma una
+  ejecucion interrumpida sin repetir las hojas ya completadas
+"""
+
+import os
+import re
+import time
+import argparse
+from datetime import datetime, date
+from openpyxl import load_workbook
+from openpyxl.styles import PatternFill
+
+import ambientes
+import cadenas
+from alias_libro import es_alias_valido
+import certificados
+import comparar_manifiesto
+import formato_condicional
+import historial
+import indice_alias
+import indice_invertido
+from fechas import extraer_fecha_vencimiento
+import metricas
+import parche_xlsx
+import registro_parsers
+import reporte_html
+import salida_ambientes
+
+
+# ==========================
+# ARGUMENTOS CLI
+# ==========================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Auditoria de Certificados SSL v5.0 - COMBMAN Keystores"
+    )
+    parser.add_argument(
+        "--raiz",
+        default=r"C:\Automatizacion_Excel",
+        help="Carpeta raiz del proyecto (default: C:\\Automatizacion_Excel)"
+    )
+    parser.add_argument(
+        "--dias-alerta",
+        type=int,
+        default=90,
+        help="Dias antes del vencimiento para alerta amarilla (default: 90)"
+    )
+    parser.add_argument(
+        "--excel-in",
+        default=None,
+        help="Ruta al Excel de entrada (default: RAIZ/REPORTE_AUDITORIA.xlsx)"
+    )
+    parser.add_argument(
+        "--ambientes",
+        nargs="+",
+        default=None,
+        help="Ambientes a procesar (default: todos los descubiertos; ver ambientes.py)"
+    )
+    parser.add_argument(
+        "--salida-parche",
+        action="store_true",
+        help="Lee el Excel en modo solo lectura y escribe la salida parchando solo las celdas cambiadas"
+    )
+    parser.add_argument(
+        "--formato-condicional",
+        action="store_true",
+        help="Fechas de vencimiento (F/G/K) como fecha de Excel y colores por reglas de formato "
+             "condicional atadas a HOY() y a --dias-alerta, en lugar de rellenos fijos por celda"
+    )
+    parser.add_argument(
+        "--salida-por-ambiente",
+        action="store_true",
+        help="Ademas del libro combinado, un libro por ambiente en RAIZ/SALIDA_AMBIENTES escrito en "
+             "procesos paralelos apenas terminan sus hojas (implica --salida-parche para el combinado)"
+    )
+    parser.add_argument(
+        "--sin-libro-combinado",
+        action="store_true",
+        help="Con --salida-por-ambiente: no escribir el libro combinado"
+    )
+    parser.add_argument(
+        "--sin-historial",
+        action="store_true",
+        help="No registrar la ejecucion en HISTORIAL_AUDITORIA.sqlite"
+    )
+    parser.add_argument(
+        "--exportar-resultado",
+        default=None,
+        help="Escribe un JSON con cambios de celda, alertas y resultados (modo fragmentos)"
+    )
+    parser.add_argument(
+        "--salida",
+        default=None,
+        help="Carpeta del libro, logs, reporte y estado generados (default: RAIZ)"
+    )
+    parser.add_argument(
+        "--fecha-referencia",
+        type=date.fromisoformat,
+        default=None,
+        help="Dia (AAAA-MM-DD) contra el que se evaluan los vencimientos (default: hoy); para re-auditar meses archivados"
+    )
+    parser.add_argument(
+        "--sin-indice",
+        action="store_true",
+        help="No actualizar el indice invertido de volcados (RAIZ/INDICE)"
+    )
+    parser.add_argument(
+        "--metricas",
+        default=None,
+        help="Carpeta del archivo auditoria.prom (default: RAIZ/METRICAS)"
+    )
+    parser.add_argument(
+        "--reanudar",
+        action="store_true",
+        help="Retoma la ejecucion interrumpida desde ESTADO_EJECUCION.jsonl (omite las hojas completadas)"
+    )
+    return parser.parse_args(argv)
+
+
+# ==========================
+# CONFIGURACION (poblada desde args con configurar())
+# ==========================
+RAIZ             = None
+SALIDA           = None   # carpeta de lo generado (RAIZ salvo --salida)
+FECHA_REF        = None   # --fecha-referencia (None = hoy)
+SIN_INDICE       = False
+CARPETA_BASE     = None
+EXCEL_IN         = None
+ARCHIVO_LOG      = None
+LOG_VENCIMIENTOS = None
+HTML_REPORTE     = None
+DB_HISTORIAL     = None
+SIN_HISTORIAL    = False
+SALIDA_PARCHE    = False
+POR_AMBIENTE     = False
+FORMATO_CONDICIONAL = False
+SIN_COMBINADO    = False
+EXPORTAR_RESULTADO = None
+ARCHIVO_ESTADO   = None
+REANUDAR         = False
+CARPETA_METRICAS = None
+
+AMBIENTES   = []     # nombres, en orden
+RUTAS_AMB   = {}     # {ambiente: {origen, destino, prefijo, hojas}}
+TABLA_RUTEO = {}     # {hoja: {ambiente, tipo, carpeta}}
+DIAS_ALERTA = 90
+
+
+def configurar(args):
+    global RAIZ, SALIDA, FECHA_REF, SIN_INDICE, CARPETA_BASE, EXCEL_IN, ARCHIVO_LOG, LOG_VENCIMIENTOS, HTML_REPORTE
+    global DB_HISTORIAL, SIN_HISTORIAL, SALIDA_PARCHE, EXPORTAR_RESULTADO, ARCHIVO_ESTADO, REANUDAR
+    global POR_AMBIENTE, SIN_COMBINADO, FORMATO_CONDICIONAL, CARPETA_METRICAS, _metricas
+    global AMBIENTES, RUTAS_AMB, TABLA_RUTEO, DIAS_ALERTA
+    RAIZ             = args.raiz
+    SALIDA           = args.salida or RAIZ
+    FECHA_REF        = args.fecha_referencia
+    SIN_INDICE       = args.sin_indice
+    CARPETA_BASE     = os.path.join(RAIZ, "PROCESADOS")
+    EXCEL_IN         = args.excel_in or os.path.join(RAIZ, "REPORTE_AUDITORIA.xlsx")
+    ARCHIVO_LOG      = os.path.join(SALIDA, "LOG_PROCESAMIENTO.txt")
+    LOG_VENCIMIENTOS = os.path.join(SALIDA, "LOG_VENCIMIENTOS.txt")
+    HTML_REPORTE     = os.path.join(SALIDA, "REPORTE_AUDITORIA.html")
+    DB_HISTORIAL     = os.path.join(RAIZ, historial.NOMBRE_DB)
+    SIN_HISTORIAL    = args.sin_historial
+    POR_AMBIENTE     = args.salida_por_ambiente
+    FORMATO_CONDICIONAL = args.formato_condicional
+    SIN_COMBINADO    = args.sin_libro_combinado and POR_AMBIENTE
+    # Con libros por ambiente el combinado se arma con el parche (los procesos trabajan sobre el original)
+    SALIDA_PARCHE    = args.salida_parche or POR_AMBIENTE
+    EXPORTAR_RESULTADO = args.exportar_resultado
+    ARCHIVO_ESTADO   = os.path.join(SALIDA, NOMBRE_ESTADO)
+    REANUDAR         = args.reanudar
+    CARPETA_METRICAS = args.metricas
+    _metricas        = metricas.Metricas("auditoria")
+    DIAS_ALERTA      = args.dias_alerta
+
+    # Ruteo hoja -> ambiente -> carpeta, calculado una sola vez
+    hojas       = ambientes.hojas_libro(EXCEL_IN)
+    RUTAS_AMB   = ambientes.filtrar(ambientes.descubrir(RAIZ, hojas), args.ambientes)
+    AMBIENTES   = list(RUTAS_AMB)
+    TABLA_RUTEO = ambientes.tabla_ruteo(hojas, RUTAS_AMB)
+
+    # Estado de una ejecucion anterior en el mismo proceso (varias unidades por worker)
+    _cambios_celdas.clear()
+    _comparaciones.clear()
+    _clasificaciones.clear()
+    _diffs_set.clear()
+    _grafos.clear()
+    _journal.clear()
+    for k in _stats:
+        _stats[k] = 0
+
+def hoy():
+    """Dia contra el que se evaluan los vencimientos: --fecha-referencia o la fecha actual."""
+    return FECHA_REF or date.today()
+
+
+# Nombre del archivo de salida con mes anterior al de ejecucion
+def nombre_excel_salida(raiz=None):
+    ref = hoy()
+    if ref.month == 1:
+        mes_ant = 12
+        anio    = ref.year - 1
+    else:
+        mes_ant = ref.month - 1
+        anio    = ref.year
+    MESES_NOMBRE = {
+        1: "Enero", 2: "Febrero", 3: "Marzo", 4: "Abril",
+        5: "Mayo", 6: "Junio", 7: "Julio", 8: "Agosto",
+        9: "Septiembre", 10: "Octubre", 11: "Noviembre", 12: "Diciembre"
+    }
+    return os.path.join(raiz or SALIDA, f"COMBMAN. Keystores de Infraestructura y Seguridad - {MESES_NOMBRE[mes_ant]} {anio}.xlsx")
+
+
+FILL_VENCIDO = PatternFill("solid", fgColor="FF0000")   # rojo  = vencido
+FILL_PROXIMO = PatternFill("solid", fgColor="FFFF00")   # amarillo = por vencer
+FILL_OK      = PatternFill(fill_type=None)              # sin color = vigente
+
+
+# ==========================
+# ESCRITURA DE CELDAS (registro de cambios)
+# ==========================
+_cambios_celdas = []   # [{"hoja", "celda", "valor", "fecha"?} | {"hoja", "celda", "fill"} | {"hoja", "formato_condicional"}]
+
+
+def _color_fill(fill):
+    """Color RGB de 6 digitos del relleno, o None si no tiene relleno."""
+    if fill is None or fill.fill_type is None:
+        return None
+    rgb = fill.fgColor.rgb if isinstance(fill.fgColor.rgb, str) else ""
+    return rgb[-6:].upper() or None
+
+
+def _mismo_relleno(actual, fill):
+    """
+    True si la celda ya tiene exactamente 'fill'. Solo se compara un relleno
+    solido RGB sin tinte (o la ausencia de relleno); un relleno de tema o
+    indexado nunca cuenta como igual y se sobrescribe.
+    """
+    if actual is None or actual.fill_type is None:
+        return fill.fill_type is None
+    if actual.fill_type != fill.fill_type:
+        return False
+    color = actual.fgColor
+    if color is None or color.type != "rgb" or (color.tint or 0) != 0:
+        return False
+    return _color_fill(actual) == _color_fill(fill)
+
+
+def escribir_celda(ws, celda, valor):
+    _cambios_celdas.append({"hoja": ws.title, "celda": celda.coordinate, "valor": valor})
+    if not SALIDA_PARCHE:
+        celda.value = valor
+
+
+def escribir_fecha(ws, celda, fecha):
+    """Fecha real de Excel (fecha corta) en lugar del texto del volcado."""
+    _cambios_celdas.append({"hoja": ws.title, "celda": celda.coordinate, "valor": fecha.isoformat(), "fecha": True})
+    if not SALIDA_PARCHE:
+        celda.value = fecha
+        celda.number_format = formato_condicional.FORMATO_FECHA
+
+
+def escribir_valores(ws, cambios):
+    """Escritura en bloque de [(coordenada, valor)] (en modo parche solo se registran)."""
+    for coordenada, valor in cambios:
+        _cambios_celdas.append({"hoja": ws.title, "celda": coordenada, "valor": valor})
+        if not SALIDA_PARCHE:
+            ws[coordenada].value = valor
+
+
+def pintar_celda(ws, celda, fill):
+    """Aplica el relleno solo si cambia el relleno actual de la celda."""
+    if _mismo_relleno(celda.fill, fill):
+        return
+    color = _color_fill(fill)
+    _cambios_celdas.append({"hoja": ws.title, "celda": celda.coordinate, "fill": color})
+    if not SALIDA_PARCHE:
+        celda.fill = fill
+
+
+# ==========================
+# LOG
+# ==========================
+def log(msg, nivel="INFO"):
+    ts    = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    linea = f"[{ts}] [{nivel}] {msg}"
+    print(linea)
+    with open(ARCHIVO_LOG, "a", encoding="utf-8") as f:
+        f.write(linea + "\n")
+
+
+# ==========================
+# ESTADISTICAS DE COBERTURA
+# ==========================
+_stats = {"resueltos": 0, "no_encontrados": 0, "total_aliases": 0}
+
+def stats_resuelto():
+    _stats["resueltos"]     += 1
+    _stats["total_aliases"] += 1
+
+def stats_no_encontrado():
+    _stats["no_encontrados"] += 1
+    _stats["total_aliases"]  += 1
+
+def imprimir_estadisticas():
+    total = _stats["total_aliases"]
+    res   = _stats["resueltos"]
+    nf    = _stats["no_encontrados"]
+    pct   = (res / total * 100) if total > 0 else 0
+    log("=" * 60)
+    log(f"  ESTADISTICAS DE COBERTURA")
+    log(f"  Total aliases procesados : {total}")
+    log(f"  Resueltos (con .out)     : {res}  ({pct:.1f}%)")
+    log(f"  Sin archivo .out         : {nf}")
+    log("=" * 60)
+
+
+# ==========================
+# RESULTADOS ESTRUCTURADOS (historial)
+# ==========================
+_comparaciones   = []
+_clasificaciones = []
+
+def registrar_comparacion(ambiente, hoja, seccion, alias, campo, valor_excel, valor_out, resultado):
+    _comparaciones.append({
+        "ambiente": ambiente, "hoja": hoja, "seccion": str(seccion or ""), "alias": alias,
+        "campo": campo, "valor_excel": str(valor_excel or ""), "valor_out": str(valor_out or ""),
+        "resultado": resultado,
+    })
+
+def registrar_clasificacion(ambiente, hoja, alias, fill, fecha_venc):
+    """Agrega la clasificacion y la retorna (evaluar_cadena completa el vencimiento efectivo)."""
+    if fill is None:
+        estado = "SIN_FECHA"
+    elif fill == FILL_VENCIDO:
+        estado = "VENCIDO"
+    elif fill == FILL_PROXIMO:
+        estado = "PROXIMO"
+    else:
+        estado = "VIGENTE"
+    fila = {
+        "ambiente": ambiente, "hoja": hoja, "alias": alias, "estado": estado,
+        "fecha_venc": str(fecha_venc) if fecha_venc else None,
+        "dias": (fecha_venc - hoy()).days if fecha_venc else None,
+        "fecha_efectiva": str(fecha_venc) if fecha_venc else None,
+        "limitado_por": None,
+    }
+    _clasificaciones.append(fila)
+    return fila
+
+
+def evaluar_vencimiento(fecha_venc, alias, hoja):
+    """Evalua estado del certificado y retorna (fill, mensaje_log)."""
+    if fecha_venc is None:
+        return None, f"    [{hoja}] '{alias}': fecha no parseable"
+
+    dias_rest = (fecha_venc - hoy()).days
+
+    if dias_rest < 0:
+        return FILL_VENCIDO, f"    [{hoja}] '{alias}': VENCIDO hace {abs(dias_rest)} dias ({fecha_venc})"
+    elif dias_rest <= DIAS_ALERTA:
+        return FILL_PROXIMO, f"    [{hoja}] '{alias}': PROXIMO A VENCER en {dias_rest} dias ({fecha_venc})"
+    else:
+        return FILL_OK, f"    [{hoja}] '{alias}': vigente ({dias_rest} dias restantes, {fecha_venc})"
+
+
+def marcar_vencimiento(ws, celda, fecha_venc, fill, celdas_fecha):
+    """
+    Relleno fijo segun el estado o, con --formato-condicional, fecha real en la
+    celda (sin relleno propio) y la celda anotada para la regla de la hoja.
+    """
+    if not FORMATO_CONDICIONAL:
+        if fill is not None:
+            pintar_celda(ws, celda, fill)
+        return
+    if fecha_venc is None:
+        return
+    if not (isinstance(celda.value, date) and extraer_fecha_vencimiento(celda.value) == fecha_venc):
+        escribir_fecha(ws, celda, fecha_venc)
+    pintar_celda(ws, celda, FILL_OK)   # el color lo pone la regla
+    celdas_fecha.append(celda.coordinate)
+
+
+def instalar_reglas_vencimiento(ws, celdas_fecha):
+    """Reglas de formato condicional de la hoja (una vez por hoja, sobre todas sus celdas de vencimiento)."""
+    if not FORMATO_CONDICIONAL:
+        return
+    regla = {"rangos": formato_condicional.rangos(celdas_fecha), "dias": DIAS_ALERTA}
+    _cambios_celdas.append({"hoja": ws.title, "formato_condicional": regla})
+    if not SALIDA_PARCHE:
+        formato_condicional.instalar(ws, regla["rangos"], regla["dias"])
+    log(f"    [{ws.title}] Formato condicional: {len(celdas_fecha)} celdas de vencimiento "
+        f"en {len(regla['rangos'])} rangos")
+
+
+# ==========================
+# PARSERS ARCHIVOS .out (via registro por contenido)
+# ==========================
+def catalogo_carpeta(carpeta):
+    """Catalogo de la carpeta: cada archivo leido, identificado y parseado una vez."""
+    return registro_parsers.indexar_carpeta(carpeta, log=log)
+
+
+EXTENSIONES_CERT = (".out", ".pem", ".crt", ".cer", ".der")
+
+
+def _datos_volcado(ruta, *formatos):
+    """Datos parseados de un archivo del catalogo si su contenido es de alguno de los formatos."""
+    carpeta, fname = os.path.split(ruta)
+    volcado = catalogo_carpeta(carpeta)["archivos"].get(fname)
+    if volcado is None or volcado["formato"] not in formatos:
+        return None
+    return volcado["datos"]
+
+
+def parsear_out(ruta):
+    """Entrada (label + certificado) de un volcado GSKit o de un PEM/DER con un solo certificado."""
+    datos = _datos_volcado(ruta, registro_parsers.FORMATO_GSKIT, *registro_parsers.FORMATOS_NATIVOS)
+    if isinstance(datos, dict):
+        if len(datos) != 1:
+            return None
+        (alias, cert), = datos.items()
+        return certificados.Entrada(alias, cert)
+    return datos
+
+
+def parsear_out_keytool(ruta):
+    return _datos_volcado(ruta, *registro_parsers.FORMATOS_KEYSTORE) or {}
+
+
+def parsear_sha256(ruta):
+    return _datos_volcado(ruta, registro_parsers.FORMATO_SHA256) or {}
+
+
+# ==========================
+# BUSQUEDA DE ARCHIVOS (sobre el catalogo)
+# ==========================
+def _listar_carpeta(carpeta):
+    """Nombres de archivo de la carpeta segun el catalogo (sin listdir repetido)."""
+    return list(catalogo_carpeta(carpeta)["archivos"])
+
+
+def carpeta_ambiente(ambiente):
+    """Carpeta PROCESADOS del ambiente segun la tabla de ruteo (sin listdir)."""
+    rutas = RUTAS_AMB.get(ambiente.upper())
+    return rutas["destino"] if rutas else os.path.join(CARPETA_BASE, ambiente)
+
+
+def alias_a_nombre(alias):
+    nombre = str(alias).strip()
+    nombre = re.sub(r"\s+", "-", nombre)
+    return nombre.strip("-")
+
+def indice_seccion(carpeta, prefijo):
+    """Indice difuso (nombres y Labels) de los volcados de una seccion, construido una vez y guardado en el catalogo."""
+    indices = catalogo_carpeta(carpeta).setdefault("indices_alias", {})
+    if prefijo not in indices:
+        candidatos = [f for f in _listar_carpeta(carpeta)
+                      if f.lower().startswith(prefijo) and f.lower().endswith(EXTENSIONES_CERT)]
+        datos = {f: parsear_out(os.path.join(carpeta, f)) for f in candidatos}
+        indices[prefijo] = indice_alias.IndiceAlias(
+            (f for f in candidatos if datos[f]), {f: d.label for f, d in datos.items() if d})
+    return indices[prefijo]
+
+
+def buscar_out_alias(ambiente, numero, alias, carpeta):
+    alias_norm   = str(alias).strip().lower()
+    alias_limpio = re.sub(r"^(SC_|PC_)", "", str(alias).strip(), flags=re.IGNORECASE)
+    alias_archivo = alias_a_nombre(alias_limpio)
+
+    # 1. Intento exacto con SC y PC
+    for tipo in ["SC", "PC"]:
+        ruta  = os.path.join(carpeta, f"{ambiente.lower()}_{numero}_{tipo}_{alias_archivo}.out")
+        datos = parsear_out(ruta)
+        if datos:
+            return ruta, datos
+
+    # 2. Busqueda flexible sobre el indice de la seccion (armado una vez por carpeta y prefijo)
+    indice = indice_seccion(carpeta, f"{ambiente.lower()}_{numero}_")
+
+    # Primero: Label interno
+    fname = indice.por_etiqueta(alias_norm)
+    if fname:
+        ruta = os.path.join(carpeta, fname)
+        return ruta, parsear_out(ruta)
+
+    # Segundo: nombre de archivo mas parecido (indice de trigramas + distancia de edicion)
+    coincidencia = indice.buscar(alias)
+    if coincidencia:
+        if coincidencia.ambigua:
+            log(f"    '{alias}': coincidencia ambigua entre {coincidencia.nombre} y "
+                f"{', '.join(coincidencia.ambiguos)} (similitud {coincidencia.puntaje:.2f}); "
+                f"se usa {coincidencia.nombre}", "WARN")
+        ruta = os.path.join(carpeta, coincidencia.nombre)
+        return ruta, parsear_out(ruta)
+
+    return None, None
+
+
+def buscar_keystore_out(ambiente, nombre_ks, carpeta):
+    """Volcado keytool (o keystore nativo) del ambiente cuyo nombre contiene nombre_ks."""
+    catalogo = catalogo_carpeta(carpeta)
+    for formato in registro_parsers.FORMATOS_KEYSTORE:   # keytool primero
+        for f in registro_parsers.archivos_de_formato(catalogo, formato):
+            if f.lower().startswith(ambiente.lower()) and nombre_ks.lower() in f.lower():
+                return os.path.join(carpeta, f)
+    return None
+
+
+def buscar_sha256(ambiente, carpeta):
+    """Primer manifiesto sha256 del ambiente, identificado por contenido."""
+    catalogo = catalogo_carpeta(carpeta)
+    for f in registro_parsers.archivos_de_formato(catalogo, registro_parsers.FORMATO_SHA256):
+        if f.lower().startswith(ambiente.lower()):
+            return os.path.join(carpeta, f)
+    return None
+
+
+# ==========================
+# CADENAS DE CERTIFICACION
+# ==========================
+_grafos = {}   # ambiente -> GrafoCadenas
+
+
+def certificados_inventario(ambiente):
+    """Certificados parseados del catalogo del ambiente (GSKit, keytool, nativos)."""
+    for volcado in catalogo_carpeta(carpeta_ambiente(ambiente))["archivos"].values():
+        datos = volcado["datos"]
+        if not datos:
+            continue
+        if volcado["formato"] == registro_parsers.FORMATO_GSKIT:
+            yield datos.cert
+        elif volcado["formato"] in registro_parsers.FORMATOS_KEYSTORE:
+            yield from datos.values()
+
+
+def grafo_cadenas(ambiente):
+    """
+    Grafo emisor -> sujeto de los volcados del ambiente, construido una vez
+    por ejecucion. Un emisor nunca se toma de otro ambiente: el resultado es
+    el mismo auditando todo el libro o una unidad del modo fragmentos.
+    """
+    ambiente = ambiente.upper()
+    if ambiente not in _grafos:
+        _grafos[ambiente] = cadenas.GrafoCadenas(certificados_inventario(ambiente))
+    return _grafos[ambiente]
+
+
+def evaluar_cadena(cert, ambiente, alias, hoja, diffs, clasificacion):
+    """
+    Vencimiento efectivo del alias: si la cadena (en su ambiente) vence antes,
+    lo anota en su clasificacion y en el log; alerta si cae dentro de DIAS_ALERTA.
+    """
+    limite = grafo_cadenas(ambiente).limitado_por_cadena(cert)
+    if limite is None:
+        return
+    fecha, limitante = limite
+    dias_rest = (fecha - hoy()).days
+    por = cadenas.nombre_corto(limitante)
+    limita = clasificacion["dias"] is None or dias_rest < clasificacion["dias"]
+    if limita:
+        clasificacion["fecha_efectiva"] = str(fecha)
+        clasificacion["limitado_por"]   = por
+    if dias_rest > DIAS_ALERTA:
+        if limita:
+            log(f"    [{hoja}] '{alias}': vencimiento efectivo {fecha} por cadena ('{por}', {dias_rest} dias)")
+        return
+    if dias_rest < 0:
+        msg = f"    [{hoja}] '{alias}': VENCIDO POR CADENA hace {abs(dias_rest)} dias ({fecha}, por '{por}')"
+    else:
+        msg = f"    [{hoja}] '{alias}': PROXIMO A VENCER POR CADENA en {dias_rest} dias ({fecha}, por '{por}')"
+    log(msg, "VENC" if dias_rest < 0 else "ALERT")
+    clave = f"{hoja}|{alias}|cadena"
+    if clave not in _diffs_set:
+        _diffs_set.add(clave)
+        diffs.append(msg.strip())
+
+
+# ==========================
+# NORMALIZACION
+# ==========================
+def mismo_serial(valor_excel, cert):
+    """Serial del Excel contra el del certificado: como int si ambos son hex, si no como texto."""
+    s_excel = certificados.serial_a_int(valor_excel)
+    if s_excel is not None and cert.serial is not None:
+        return s_excel == cert.serial
+    return certificados.texto_serial(valor_excel) == cert.serial_texto
+
+
+# ==========================
+# PROCESAR HOJA WAS
+# ==========================
+def procesar_hoja_was(ws, ambiente, diffs):
+    carpeta = carpeta_ambiente(ambiente)
+    log(f"  -> Procesando hoja WAS: {ws.title}")
+    seccion_actual = None
+    modo_personal  = False  # False=signer(col F), True=personal(col G)
+    celdas_fecha   = []
+
+    for row in ws.iter_rows(min_row=1, max_col=7):
+        col_a = row[0].value
+        col_b = row[1].value
+        col_c = row[2].value
+        col_f = row[5]   # Expiration signer certs
+        col_g = row[6]   # Expiration personal certs
+
+        # Detectar seccion
+        if col_a and re.match(r"^\d+\.-", str(col_a).strip()):
+            m = re.match(r"^(\d+)\.-", str(col_a).strip())
+            seccion_actual = int(m.group(1))
+            modo_personal  = False
+            log(f"    Seccion {seccion_actual}: {col_b}")
+            continue
+
+        # Detectar subseccion personal certificates
+        if col_b and "# personal certificates" in str(col_b).lower():
+            modo_personal = True
+            continue
+
+        if not es_alias_valido(col_c):
+            continue
+
+        alias = str(col_c).strip()
+
+        # Celda de fecha segun modo
+        fecha_cell = col_g if modo_personal else col_f
+
+        # Colorear segun vencimiento
+        fecha_venc = extraer_fecha_vencimiento(fecha_cell.value)
+        fill, msg  = evaluar_vencimiento(fecha_venc, alias, ws.title)
+        log(msg, "VENC" if fill == FILL_VENCIDO else ("ALERT" if fill == FILL_PROXIMO else "INFO"))
+        clasificacion = registrar_clasificacion(ambiente, ws.title, alias, fill, fecha_venc)
+        marcar_vencimiento(ws, fecha_cell, fecha_venc, fill, celdas_fecha)
+        if fill in (FILL_VENCIDO, FILL_PROXIMO):
+            clave = f"{ws.title}|{alias}|{fill}"
+            if clave not in _diffs_set:
+                _diffs_set.add(clave)
+                diffs.append(msg.strip())
+
+        # Comparar datos con .out
+        if not seccion_actual:
+            continue
+
+        fp_val     = row[4].value  # col E
+        serial_val = row[5].value  # col F (cuando es personal, serial en F)
+
+        tiene_fp     = fp_val     and bool(re.search(r"[0-9A-Fa-f]{2}[\s:]", str(fp_val)))
+        tiene_serial = not modo_personal and serial_val and bool(re.match(r"^[0-9a-fA-F\s]{4,}$", str(serial_val).strip()))
+        if modo_personal:
+            serial_val   = row[5].value
+            tiene_serial = serial_val and bool(re.match(r"^[0-9a-fA-F\s]{4,}$", str(serial_val).strip()))
+            tiene_fp     = False
+
+        _, datos = buscar_out_alias(ambiente, seccion_actual, alias, carpeta)
+
+        if not datos:
+            log(f"    [{ws.title}] #{seccion_actual} '{alias}': .out no encontrado", "WARN")
+            registrar_comparacion(ambiente, ws.title, seccion_actual, alias, "archivo", "", "", "SIN_ARCHIVO")
+            stats_no_encontrado()
+            continue
+
+        stats_resuelto()
+
+        cert = datos.cert
+        evaluar_cadena(cert, ambiente, alias, ws.title, diffs, clasificacion)
+        if tiene_fp:
+            igual = certificados.fp_a_bytes(fp_val) == cert.fp
+            registrar_comparacion(ambiente, ws.title, seccion_actual, alias, "fp", fp_val, cert.fp_texto,
+                                  "IGUAL" if igual else "DIFERENTE")
+            if igual:
+                log(f"    #{seccion_actual} '{alias}' FP: IGUAL")
+            else:
+                log(f"    #{seccion_actual} '{alias}' FP: DIFERENTE -> actualizando", "CAMBIO")
+                diffs.append(f"{ws.title} | #{seccion_actual} {alias} | FP actualizado")
+                escribir_celda(ws, row[4], cert.fp_texto)
+
+        if tiene_serial:
+            igual = mismo_serial(serial_val, cert)
+            registrar_comparacion(ambiente, ws.title, seccion_actual, alias, "serial", serial_val, cert.serial_texto,
+                                  "IGUAL" if igual else "DIFERENTE")
+            if igual:
+                log(f"    #{seccion_actual} '{alias}' Serial: IGUAL")
+            else:
+                log(f"    #{seccion_actual} '{alias}' Serial: DIFERENTE -> actualizando", "CAMBIO")
+                diffs.append(f"{ws.title} | #{seccion_actual} {alias} | Serial actualizado")
+                escribir_celda(ws, row[5], cert.serial_texto)
+
+    instalar_reglas_vencimiento(ws, celdas_fecha)
+
+
+# ==========================
+# PROCESAR HOJA PLUG.WAS
+# ==========================
+def procesar_hoja_plug_was(ws, ambiente, diffs):
+    carpeta = carpeta_ambiente(ambiente)
+    log(f"  -> Procesando hoja PLUG.WAS: {ws.title}")
+
+    ruta_sha256 = buscar_sha256(ambiente, carpeta)
+    if not ruta_sha256:
+        log(f"    [{ws.title}] Archivo .sha256 no encontrado para {ambiente}", "WARN")
+        return
+
+    log(f"    sha256: {os.path.basename(ruta_sha256)} (cruce ordenado por ruta)")
+
+    # Merge-join hoja / manifiesto con memoria acotada; las rutas salen en orden alfabetico.
+    # Las IGUAL solo se cuentan; el resto va al TSV de la hoja y solo las primeras
+    # LIMITE_DETALLE al log y al historial (el manifiesto puede tener cientos de miles de rutas)
+    conteo     = dict.fromkeys(comparar_manifiesto.TIPOS, 0)
+    pendientes = []
+    detalle    = comparar_manifiesto.ruta_detalle(SALIDA, ws.title)
+    limite     = comparar_manifiesto.LIMITE_DETALLE
+    with comparar_manifiesto.Detalle(detalle) as salida:
+        for r in comparar_manifiesto.comparar(ruta_sha256, ws):
+            conteo[r.tipo] += 1
+            if r.tipo == comparar_manifiesto.IGUAL:
+                continue
+            salida.agregar(r)
+            if r.tipo == comparar_manifiesto.DIFERENTE:
+                diffs.append(f"{ws.title} | {r.ruta} | hash actualizado")
+                pendientes.append((f"B{r.fila}", r.hash_manifiesto))
+                if len(pendientes) >= comparar_manifiesto.TAM_BLOQUE:
+                    escribir_valores(ws, pendientes)
+                    pendientes = []
+            if conteo[r.tipo] > limite:
+                continue
+            if r.tipo == comparar_manifiesto.SOLO_HOJA:
+                log(f"    '{r.ruta}': no en .sha256", "WARN")
+                registrar_comparacion(ambiente, ws.title, "", r.ruta, "hash", r.hash_hoja, "", "SIN_ARCHIVO")
+            elif r.tipo == comparar_manifiesto.SOLO_MANIFIESTO:
+                log(f"    '{r.ruta}': solo en .sha256 (no esta en la hoja)", "WARN")
+                registrar_comparacion(ambiente, ws.title, "", r.ruta, "hash", "", r.hash_manifiesto,
+                                      comparar_manifiesto.SOLO_MANIFIESTO)
+            else:
+                log(f"    '{r.ruta}': DIFERENTE -> actualizando", "CAMBIO")
+                registrar_comparacion(ambiente, ws.title, "", r.ruta, "hash", r.hash_hoja, r.hash_manifiesto,
+                                      "DIFERENTE")
+    escribir_valores(ws, pendientes)
+
+    omitidos = sum(max(0, n - limite) for t, n in conteo.items() if t != comparar_manifiesto.IGUAL)
+    if omitidos:
+        log(f"    [{ws.title}] {omitidos} resultados mas (sobre {limite} por tipo) solo en {detalle}")
+    log(f"    [{ws.title}] {conteo['IGUAL']} iguales, {conteo['DIFERENTE']} diferentes, "
+        f"{conteo['SOLO_MANIFIESTO']} solo en .sha256, {conteo['SOLO_HOJA']} solo en la hoja")
+
+
+# ==========================
+# PROCESAR HOJA AIPAC
+# ==========================
+def procesar_hoja_aipac(ws, ambiente, diffs):
+    carpeta = carpeta_ambiente(ambiente)
+    log(f"  -> Procesando hoja AIPAC: {ws.title}")
+
+    mapa_ks = {}
+    for ks in ["aipackeystore", "DSkeystore", "SSLkeystore"]:
+        ruta = buscar_keystore_out(ambiente, ks, carpeta)
+        if ruta:
+            datos = parsear_out_keytool(ruta)
+            mapa_ks[ks.lower()] = datos
+            log(f"    {ks} cargado: {len(datos)} aliases")
+        else:
+            log(f"    {ks}: no encontrado para {ambiente}", "WARN")
+            mapa_ks[ks.lower()] = {}
+
+    seccion_ks   = None
+    celdas_fecha = []
+    for row in ws.iter_rows(min_row=1, max_col=11):
+        col_b  = str(row[1].value).strip() if row[1].value else ""
+        col_c  = row[2]
+        col_j  = row[9]   # Serial number  (col J)
+        col_k  = row[10]  # Expiration     (col K)
+
+        if "aipac-ws.keystore" in col_b.lower():
+            seccion_ks = "aipackeystore"
+            log(f"    Seccion aipac-ws.keystore")
+            continue
+        if "dskeystore" in col_b.lower():
+            seccion_ks = "dskeystore"
+            log(f"    Seccion DSkeystore")
+            continue
+        if "sslkeystore" in col_b.lower():
+            seccion_ks = "sslkeystore"
+            log(f"    Seccion SSLkeystore")
+            continue
+
+        if not es_alias_valido(col_c.value):
+            continue
+
+        alias = str(col_c.value).strip()
+
+        # Colorear segun vencimiento (col K)
+        fecha_venc = extraer_fecha_vencimiento(col_k.value)
+        fill, msg  = evaluar_vencimiento(fecha_venc, alias, ws.title)
+        log(msg, "VENC" if fill == FILL_VENCIDO else ("ALERT" if fill == FILL_PROXIMO else "INFO"))
+        clasificacion = registrar_clasificacion(ambiente, ws.title, alias, fill, fecha_venc)
+        marcar_vencimiento(ws, col_k, fecha_venc, fill, celdas_fecha)
+        if fill in (FILL_VENCIDO, FILL_PROXIMO):
+            clave = f"{ws.title}|{alias}|{fill}"
+            if clave not in _diffs_set:
+                _diffs_set.add(clave)
+                diffs.append(msg.strip())
+
+        # Comparar Serial
+        serial_val = col_j.value
+        if not serial_val or not seccion_ks:
+            continue
+
+        datos = mapa_ks.get(seccion_ks, {}).get(alias.lower())
+        if not datos:
+            log(f"    [{seccion_ks}] '{alias}': no en .out", "WARN")
+            registrar_comparacion(ambiente, ws.title, seccion_ks, alias, "archivo", "", "", "SIN_ARCHIVO")
+            stats_no_encontrado()
+            continue
+
+        stats_resuelto()
+        evaluar_cadena(datos, ambiente, alias, ws.title, diffs, clasificacion)
+        igual = mismo_serial(serial_val, datos)
+        registrar_comparacion(ambiente, ws.title, seccion_ks, alias, "serial", serial_val, datos.serial_texto,
+                              "IGUAL" if igual else "DIFERENTE")
+        if igual:
+            log(f"    [{seccion_ks}] '{alias}' Serial: IGUAL")
+        else:
+            log(f"    [{seccion_ks}] '{alias}' Serial: DIFERENTE -> actualizando", "CAMBIO")
+            diffs.append(f"{ws.title} | {seccion_ks} | {alias} | Serial actualizado")
+            escribir_celda(ws, col_j, datos.serial_texto)
+
+    instalar_reglas_vencimiento(ws, celdas_fecha)
+
+
+# ==========================
+# HISTORIAL
+# ==========================
+_RE_ARCHIVO_OUT = re.compile(r"^[^_]+_(\d+)_(?:SC|PC)_(.+)\.out$", re.IGNORECASE)
+
+
+def _iso(fecha):
+    return str(fecha) if fecha else ""
+
+
+def certificados_catalogados():
+    """Certificados parseados de todos los ambientes, aplanados para el historial."""
+    filas = []
+    for amb in AMBIENTES:
+        catalogo = catalogo_carpeta(carpeta_ambiente(amb))
+        for fname, volcado in catalogo["archivos"].items():
+            datos = volcado["datos"]
+            if not datos:
+                continue
+            if volcado["formato"] == registro_parsers.FORMATO_GSKIT:
+                m = _RE_ARCHIVO_OUT.match(fname)
+                filas.append({"ambiente": amb, "archivo": fname, "formato": volcado["formato"],
+                              "seccion": m.group(1) if m else "", "alias": m.group(2) if m else datos.label,
+                              "serial": datos.cert.serial_texto, "fingerprint": datos.cert.fp_texto,
+                              "vencimiento": _iso(datos.cert.vencimiento)})
+            elif volcado["formato"] in registro_parsers.FORMATOS_KEYSTORE:
+                for alias, cert in datos.items():
+                    filas.append({"ambiente": amb, "archivo": fname, "formato": volcado["formato"],
+                                  "seccion": fname, "alias": alias,
+                                  "serial": cert.serial_texto, "fingerprint": cert.fp_texto,
+                                  "vencimiento": _iso(cert.vencimiento)})
+            elif volcado["formato"] == registro_parsers.FORMATO_SHA256:
+                for ruta, h in datos.items():
+                    filas.append({"ambiente": amb, "archivo": fname, "formato": volcado["formato"],
+                                  "seccion": "", "alias": ruta, "serial": "", "fingerprint": h})
+    return filas
+
+
+def guardar_historial(excel_out):
+    try:
+        meta = {"fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "excel_in": EXCEL_IN,
+                "excel_out": excel_out, "dias_alerta": DIAS_ALERTA}
+        eid = historial.registrar_ejecucion(DB_HISTORIAL, meta, certificados_catalogados(),
+                                            _comparaciones, _clasificaciones)
+        log(f"Historial actualizado: ejecucion #{eid} en {os.path.basename(DB_HISTORIAL)}")
+    except Exception as e:
+        log(f"No se pudo registrar el historial: {e}", "ERROR")
+
+
+# ==========================
+# SALIDAS: LOG DE VENCIMIENTOS Y RESULTADO EXPORTABLE
+# ==========================
+def escribir_log_vencimientos(ruta, alertas, dias_alerta):
+    """LOG_VENCIMIENTOS.txt a partir de las alertas (VENCIDO / PROXIMO A VENCER)."""
+    ts       = date.today().strftime("%d/%m/%Y")
+    vencidos = [a for a in alertas if "VENCIDO" in a]
+    proximos = [a for a in alertas if "VENCER" in a]
+
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write("=" * 60 + "\n")
+        f.write("  REPORTE DE VENCIMIENTO DE CERTIFICADOS\n")
+        f.write("  Generado: " + ts + "\n")
+        f.write("  Umbral de alerta: " + str(dias_alerta) + " dias\n")
+        f.write("=" * 60 + "\n\n")
+
+        if vencidos:
+            f.write("CERTIFICADOS VENCIDOS (" + str(len(vencidos)) + "):\n")
+            f.write("-" * 40 + "\n")
+            for v in vencidos:
+                f.write("  " + v + "\n")
+            f.write("\n")
+
+        if proximos:
+            f.write("PROXIMOS A VENCER - menos de " + str(dias_alerta) + " dias (" + str(len(proximos)) + "):\n")
+            f.write("-" * 40 + "\n")
+            for p in proximos:
+                f.write("  " + p + "\n")
+            f.write("\n")
+
+        if not alertas:
+            f.write("  Sin alertas. Todos los certificados estan vigentes.\n")
+
+
+def exportar_resultado(ruta, hojas, diffs, excel_out):
+    """
+    JSON con todo lo necesario para fusionar esta ejecucion con otras
+    (modo fragmentos): cambios de celda, alertas, resultados y cobertura.
+    """
+    import json
+    resultado = {
+        "version":         1,
+        "fecha":           str(hoy()),
+        "dias_alerta":     DIAS_ALERTA,
+        "ambientes":       AMBIENTES,
+        "hojas":           hojas,
+        "excel_out":       os.path.basename(excel_out),
+        "diffs":           diffs,
+        "cambios_celdas":  _cambios_celdas,
+        "comparaciones":   _comparaciones,
+        "clasificaciones": _clasificaciones,
+        "certificados":    certificados_catalogados(),
+        "stats":           dict(_stats),
+    }
+    tmp = ruta + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, default=str)
+    os.replace(tmp, ruta)
+    log("Resultado exportado en: " + ruta)
+
+
+# ==========================
+# METRICAS (Prometheus textfile)
+# ==========================
+_metricas = metricas.Metricas("auditoria")
+
+
+def escribir_metricas(exito):
+    m = _metricas
+    est, cert = registro_parsers.estadisticas, certificados.estadisticas
+    m.gauge("ejecucion_exitosa", bool(exito), "1 si la ultima auditoria termino sin errores")
+    m.gauge("ultima_ejecucion_timestamp_segundos", round(time.time()), "Fin de la ultima auditoria (epoch)")
+    m.contador("archivos_hasheados_total", est["archivos_leidos"], "Volcados leidos y hasheados (SHA256)")
+    m.contador("bytes_leidos_total", est["bytes_leidos"], "Bytes leidos de los volcados")
+    m.ratio("cache_ratio_aciertos", est["contenido_aciertos"], est["contenido_fallos"],
+            "Aciertos / consultas de cada cache", cache="contenido")
+    m.ratio("cache_ratio_aciertos", est["catalogo_aciertos"], est["catalogo_fallos"], cache="catalogo")
+    m.ratio("cache_ratio_aciertos", cert["aciertos"], cert["nuevos"], cache="certificados")
+    m.gauge("certificados_unicos", certificados.total_internados(), "Certificados distintos (por fingerprint)")
+    m.gauge("aliases", _stats["resueltos"], "Aliases del libro segun resultado", resultado="resuelto")
+    m.gauge("aliases", _stats["no_encontrados"], resultado="sin_archivo")
+
+    # Un alias puede repetirse en la hoja (varias secciones): se informa el peor caso
+    dias, efectivos = {}, {}
+    for c in _clasificaciones:
+        clave = (c["ambiente"], c["hoja"], c["alias"])
+        if c["dias"] is not None:
+            dias[clave] = min(c["dias"], dias.get(clave, c["dias"]))
+        if c.get("fecha_efectiva"):
+            efectivo = ((date.fromisoformat(c["fecha_efectiva"]) - hoy()).days, c["limitado_por"] or "")
+            efectivos[clave] = min(efectivo, efectivos.get(clave, efectivo))
+    for (amb, hoja, alias), d in dias.items():
+        m.gauge("certificado_dias_para_vencer", d, "Dias hasta el vencimiento (negativo = vencido)",
+                ambiente=amb, hoja=hoja, alias=alias)
+    for (amb, hoja, alias), (d, por) in efectivos.items():
+        m.gauge("certificado_dias_para_vencer_efectivo", d,
+                "Dias hasta el vencimiento propio o de la cadena, el que sea antes",
+                ambiente=amb, hoja=hoja, alias=alias, limitado_por=por)
+
+    try:
+        ruta = m.escribir(metricas.ruta_metricas(SALIDA, CARPETA_METRICAS, "auditoria"))
+        log("Metricas guardadas en: " + ruta)
+    except OSError as e:
+        log(f"No se pudieron guardar las metricas: {e}", "ERROR")
+
+
+# ==========================
+# PUNTOS DE CONTROL (ESTADO_EJECUCION.jsonl)
+# ==========================
+NOMBRE_ESTADO = "ESTADO_EJECUCION.jsonl"
+
+# Cuanto de cada lista ya quedo escrito en el journal (se agrega solo lo nuevo)
+_journal = {}
+
+
+def _clave_ejecucion():
+    """Lo que debe coincidir para reanudar: mismo dia, mismo libro y mismas opciones."""
+    st = os.stat(EXCEL_IN)
+    return {"fecha": str(date.today()), "excel_in": os.path.abspath(EXCEL_IN),
+            "libro": [st.st_size, st.st_mtime_ns], "dias_alerta": DIAS_ALERTA,
+            "ambientes": AMBIENTES, "salida_parche": SALIDA_PARCHE, "por_ambiente": POR_AMBIENTE,
+            "formato_condicional": FORMATO_CONDICIONAL,
+            "fecha_referencia": str(FECHA_REF) if FECHA_REF else None}
+
+
+def _listas_estado(hojas, diffs):
+    return {"hojas": hojas, "diffs": diffs, "cambios_celdas": _cambios_celdas,
+            "comparaciones": _comparaciones, "clasificaciones": _clasificaciones}
+
+
+def _marcar_journal(hojas, diffs):
+    """Registra lo ya escrito para que el proximo punto de control agregue solo lo nuevo."""
+    _journal.clear()
+    _journal.update({k: len(v) for k, v in _listas_estado(hojas, diffs).items()})
+    _journal["diffs_set"] = set(_diffs_set)
+
+
+def _agregar_journal(registro, modo="a"):
+    import json
+    with open(ARCHIVO_ESTADO, modo, encoding="utf-8") as f:
+        f.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def iniciar_estado():
+    """Crea el journal con la cabecera que identifica esta ejecucion."""
+    _agregar_journal({"version": 2, "clave": _clave_ejecucion(),
+                      "log_bytes": os.path.getsize(ARCHIVO_LOG)}, "w")
+    _marcar_journal([], [])
+
+
+def guardar_estado(hojas_completadas, diffs):
+    """
+    Punto de control despues de cada hoja: agrega al journal una linea con lo
+    nuevo desde el punto anterior (no reescribe lo acumulado).
+    """
+    listas = _listas_estado(hojas_completadas, diffs)
+    registro = {k: v[_journal[k]:] for k, v in listas.items()}
+    registro["diffs_set"] = sorted(_diffs_set - _journal["diffs_set"])
+    registro["stats"]     = dict(_stats)
+    registro["log_bytes"] = os.path.getsize(ARCHIVO_LOG)
+    _agregar_journal(registro)
+    for k, v in listas.items():
+        _journal[k] = len(v)
+    _journal["diffs_set"].update(registro["diffs_set"])
+
+
+def cargar_estado():
+    """Estado acumulado del journal si corresponde a esta misma ejecucion; si no, None."""
+    import json
+    if not os.path.exists(ARCHIVO_ESTADO) or not os.path.exists(ARCHIVO_LOG):
+        print("No hay ejecucion interrumpida para reanudar: se inicia desde cero.")
+        return None
+    with open(ARCHIVO_ESTADO, "rb") as f:
+        lineas = f.readlines()
+    try:
+        cabecera = json.loads(lineas[0])
+    except (IndexError, ValueError):
+        cabecera = {}
+    if cabecera.get("clave") != _clave_ejecucion():
+        print("El estado guardado es de otro dia, libro u opciones: se inicia desde cero.")
+        return None
+
+    estado = {k: [] for k in _listas_estado(None, None)}
+    estado.update(diffs_set=[], stats={}, log_bytes=cabecera["log_bytes"], bytes_journal=len(lineas[0]))
+    for linea in lineas[1:]:
+        # Una linea incompleta es un punto de control cortado a medias: se descarta
+        try:
+            registro = json.loads(linea) if linea.endswith(b"\n") else None
+        except ValueError:
+            registro = None
+        if registro is None:
+            break
+        for k in _listas_estado(None, None):
+            estado[k].extend(registro[k])
+        estado["diffs_set"].extend(registro["diffs_set"])
+        estado["stats"]         = registro["stats"]
+        estado["log_bytes"]     = registro["log_bytes"]
+        estado["bytes_journal"] += len(linea)
+
+    if os.path.getsize(ARCHIVO_LOG) < estado["log_bytes"]:
+        print("El log no coincide con el estado guardado: se inicia desde cero.")
+        return None
+    return estado
+
+
+def restaurar_estado(estado):
+    """Carga resultados de las hojas completadas y recorta log y journal al ultimo punto de control."""
+    _cambios_celdas[:]  = estado["cambios_celdas"]
+    _comparaciones[:]   = estado["comparaciones"]
+    _clasificaciones[:] = estado["clasificaciones"]
+    _diffs_set.update(estado["diffs_set"])
+    _stats.update(estado["stats"])
+    with open(ARCHIVO_LOG, "r+b") as f:
+        f.truncate(estado["log_bytes"])
+    with open(ARCHIVO_ESTADO, "r+b") as f:
+        f.truncate(estado["bytes_journal"])
+    hojas, diffs = list(estado["hojas"]), list(estado["diffs"])
+    _marcar_journal(hojas, diffs)
+    return hojas, diffs
+
+
+def informar_libros_ambiente(terminados):
+    """Log y metricas de los libros por ambiente que ya quedaron escritos."""
+    for amb, ruta, segundos, error in terminados:
+        if error is not None:
+            log(f"No se pudo escribir el libro de {amb}: {error}", "ERROR")
+            continue
+        log(f"  Libro {amb} listo: {ruta} ({segundos:.1f} s)")
+        _metricas.gauge("libro_ambiente_duracion_segundos", segundos,
+                        "Duracion de la escritura del libro de cada ambiente", ambiente=amb)
+
+
+def reaplicar_cambios(wb, cambios):
+    """Repite sobre el libro en memoria los cambios de celda de las hojas ya completadas."""
+    for c in cambios:
+        if "formato_condicional" in c:
+            regla = c["formato_condicional"]
+            formato_condicional.instalar(wb[c["hoja"]], regla["rangos"], regla["dias"])
+            continue
+        celda = wb[c["hoja"]][c["celda"]]
+        if c.get("fecha"):
+            celda.value = date.fromisoformat(c["valor"])
+            celda.number_format = formato_condicional.FORMATO_FECHA
+        elif "valor" in c:
+            celda.value = c["valor"]
+        else:
+            celda.fill = PatternFill("solid", fgColor=c["fill"]) if c["fill"] else FILL_OK
+
+
+# ==========================
+# PROCESO PRINCIPAL
+# ==========================
+_diffs_set = set()  # Para deduplicar alertas en diffs
+
+
+def ejecutar_proceso():
+    os.makedirs(SALIDA, exist_ok=True)
+
+    EXCEL_OUT = nombre_excel_salida()
+    _metricas.fase("catalogo")
+
+    estado = cargar_estado() if REANUDAR and os.path.exists(EXCEL_IN) else None
+
+    if estado is None:
+        for ruta in (ARCHIVO_LOG, LOG_VENCIMIENTOS, ARCHIVO_ESTADO):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+
+        log("=" * 60)
+        log("  AUDITORIA SSL v5.0 - INICIO (" + str(date.today()) + ")")
+        if FECHA_REF:
+            log("  Vencimientos evaluados al " + str(FECHA_REF) + " (--fecha-referencia)")
+        log("  Alerta amarilla: certificados que vencen en " + str(DIAS_ALERTA) + " dias o menos")
+        log("  Archivo de salida: " + os.path.basename(EXCEL_OUT))
+        log("=" * 60)
+
+    for amb in AMBIENTES:
+        c = carpeta_ambiente(amb)
+        catalogo = catalogo_carpeta(c)
+        if estado is not None:
+            continue   # el resumen de carpetas ya esta en el log
+        log("  " + amb + ": " + str(len(catalogo["archivos"])) + " archivos en " + c)
+        if catalogo["archivos"]:
+            log("    Formatos: " + registro_parsers.resumen_formatos(catalogo))
+        for fname in registro_parsers.archivos_de_formato(catalogo, registro_parsers.FORMATO_DESCONOCIDO):
+            log("    Formato no reconocido: " + fname, "WARN")
+        grafo = grafo_cadenas(amb)
+        log(f"    Cadenas: {len(grafo)} certificados, {grafo.enlaces} enlaces sujeto -> emisor, "
+            f"{grafo.raices} raices, {grafo.huerfanos} con emisor fuera del ambiente")
+
+    if not os.path.exists(EXCEL_IN):
+        log("ERROR: No se encontro: " + EXCEL_IN, "ERROR")
+        return False
+
+    _metricas.fase("carga_libro")
+    wb    = load_workbook(EXCEL_IN, read_only=SALIDA_PARCHE)
+    _metricas.fase("hojas")
+    diffs = []
+    hojas_procesadas = []
+    completadas      = set()
+
+    if estado is not None:
+        hojas_procesadas, diffs = restaurar_estado(estado)
+        # Las hojas se recorren en orden: todo lo anterior a la ultima completada ya esta en el log
+        if hojas_procesadas:
+            completadas = set(wb.sheetnames[:wb.sheetnames.index(hojas_procesadas[-1]) + 1])
+        if not SALIDA_PARCHE:
+            reaplicar_cambios(wb, _cambios_celdas)
+        print(f"Reanudando ejecucion: {len(completadas)} hojas ya completadas "
+              f"({', '.join(hojas_procesadas) or 'ninguna'})")
+    else:
+        iniciar_estado()
+
+    salida = None
+    if POR_AMBIENTE:
+        salida = salida_ambientes.SalidaPorAmbiente(EXCEL_IN, EXCEL_OUT, {
+            amb: [h for h in wb.sheetnames if TABLA_RUTEO.get(h, {}).get("ambiente") == amb] for amb in AMBIENTES})
+        for h in completadas:
+            informar_libros_ambiente(salida.hoja_completada(h, _cambios_celdas))
+
+    procesadores = {
+        ambientes.TIPO_PLUG:  procesar_hoja_plug_was,
+        ambientes.TIPO_WAS:   procesar_hoja_was,
+        ambientes.TIPO_AIPAC: procesar_hoja_aipac,
+    }
+
+    for sheet_name in wb.sheetnames:
+        if sheet_name in completadas:
+            continue
+        ws   = wb[sheet_name]
+        ruta = TABLA_RUTEO.get(sheet_name)
+
+        if not ruta:
+            log("Hoja '" + sheet_name + "': sin ambiente, se omite.", "WARN")
+            continue
+
+        ambiente = ruta["ambiente"]
+        log("Hoja: " + sheet_name + " | Ambiente: " + ambiente)
+        hojas_procesadas.append(sheet_name)
+
+        t_hoja = time.perf_counter()
+        if ruta["tipo"] in procesadores:
+            procesadores[ruta["tipo"]](ws, ambiente, diffs)
+        else:
+            log("  '" + sheet_name + "': tipo no reconocido.", "WARN")
+        _metricas.gauge("hoja_duracion_segundos", time.perf_counter() - t_hoja,
+                        "Duracion del procesamiento de cada hoja", ambiente=ambiente, hoja=sheet_name)
+        guardar_estado(hojas_procesadas, diffs)
+        if salida:
+            informar_libros_ambiente(salida.hoja_completada(sheet_name, _cambios_celdas))
+
+    _metricas.fase("guardado")
+    if SIN_COMBINADO:
+        wb.close()
+        log("Libro combinado omitido (--sin-libro-combinado)")
+    else:
+        log("Guardando en: " + EXCEL_OUT)
+        if SALIDA_PARCHE:
+            wb.close()
+            n = parche_xlsx.aplicar_parche(EXCEL_IN, EXCEL_OUT, _cambios_celdas)
+            log("  Modo parche: " + str(n) + " celdas modificadas, resto del libro copiado sin cambios")
+        else:
+            wb.save(EXCEL_OUT)
+    if salida:
+        informar_libros_ambiente(salida.terminar())
+
+    alertas = [d for d in diffs if "VENCIDO" in d or "VENCER" in d]
+    cambios = [d for d in diffs if "VENCIDO" not in d and "VENCER" not in d]
+
+    log("\n" + "=" * 60)
+    log("  RESUMEN - CAMBIOS Y ALERTAS DE VENCIMIENTO")
+    log("=" * 60)
+    if alertas:
+        log("  ALERTAS DE VENCIMIENTO (" + str(len(alertas)) + "):")
+        for a in alertas:
+            log("    " + a, "ALERT")
+    if cambios:
+        log("  DATOS ACTUALIZADOS (" + str(len(cambios)) + "):")
+        for c in cambios:
+            log("    " + c, "CAMBIO")
+    if not diffs:
+        log("  Sin diferencias ni alertas. Todo OK.")
+    log("\n>>> PROCESO FINALIZADO <<<")
+
+    # Estadisticas de cobertura
+    imprimir_estadisticas()
+
+    # Log separado de vencimientos
+    escribir_log_vencimientos(LOG_VENCIMIENTOS, alertas, DIAS_ALERTA)
+    log("Log de vencimientos guardado en: " + LOG_VENCIMIENTOS)
+
+    # Generar reporte HTML
+    _metricas.fase("reporte")
+    reporte_html.generar_html_reporte(ARCHIVO_LOG, HTML_REPORTE, str(hoy()), DIAS_ALERTA,
+                                      AMBIENTES, log=log, ruteo=TABLA_RUTEO)
+
+    # Historial SQLite
+    _metricas.fase("historial")
+    if not SIN_HISTORIAL:
+        guardar_historial(EXCEL_OUT)
+
+    # Indice invertido de certificados (procesar.py buscar)
+    _metricas.fase("indice")
+    if not SIN_INDICE:
+        try:
+            indice_invertido.actualizar(RAIZ, RUTAS_AMB, log=log)
+        except Exception as e:
+            log(f"No se pudo actualizar el indice de certificados: {e}", "ERROR")
+
+    if EXPORTAR_RESULTADO:
+        exportar_resultado(EXPORTAR_RESULTADO, hojas_procesadas, diffs, EXCEL_OUT)
+
+    # Ejecucion completa: ya no hay nada que reanudar
+    if os.path.exists(ARCHIVO_ESTADO):
+        os.remove(ARCHIVO_ESTADO)
+    return True
+
+
+def main(argv=None):
+    configurar(parse_args(argv))
+    exito = False
+    try:
+        exito = ejecutar_proceso()
+    finally:
+        escribir_metricas(exito)
+    return 0 if exito else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
\ No newline at end of file
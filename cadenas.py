@@ -0,0 +1,148 @@
+"""
+GRAFO DE CADENAS EMISOR -> SUJETO v1.0
+- Un nodo por certificado internado (certificados.py) de los volcados de un
+  ambiente: GSKit .out, keytool y formatos nativos (un grafo por ambiente,
+  los emisores no se cruzan entre ambientes)
+- Una arista por certificado hacia su emisor, buscado por DN normalizado
+  (orden de RDN, mayusculas, espacios y comillas no importan); si hay varios
+  certificados con ese sujeto se elige el que vence mas tarde (renovacion)
+- Indices por DN y por fingerprint construidos una vez por ejecucion
+- Vencimiento efectivo de cada certificado = el minimo de su cadena hasta la
+  raiz, calculado en una sola pasada lineal (memoizada, con corte de ciclos)
+"""
+
+import re
+
+
+_RE_CN            = re.compile(r'(?:^|,)\s*"?CN=((?:[^,\\]|\\.)*)', re.IGNORECASE)
+_RE_SEPARADOR_RDN = re.compile(r'((?:[^,"\\]|\\.|"[^"]*")*)(?:,|$)')
+_RE_ESPACIOS      = re.compile(r"\s+")
+
+_SINONIMOS_CLAVE = {"E": "EMAILADDRESS", "EMAIL": "EMAILADDRESS", "S": "ST", "SP": "ST"}
+
+
+# ==========================
+# NORMALIZACION DE DN
+# ==========================
+def normalizar_dn(dn):
+    """
+    'CN=Root CA, O="Acme\\, Inc",C=US' -> (('C', 'us'), ('CN', 'root ca'), ('O', 'acme, inc')).
+    Tupla ordenada: el mismo nombre escrito por GSKit, keytool o el lector
+    nativo da la misma clave. () si el DN esta vacio.
+    """
+    dn = str(dn or "").strip().strip('"').strip()
+    rdns = []
+    for m in _RE_SEPARADOR_RDN.finditer(dn):
+        parte = m.group(1).strip()
+        if "=" not in parte:
+            if m.end() >= len(dn):
+                break
+            continue
+        clave, valor = parte.split("=", 1)
+        clave = clave.strip().upper()
+        valor = valor.strip().strip('"').replace("\\,", ",").replace('\\"', '"')
+        rdns.append((_SINONIMOS_CLAVE.get(clave, clave), _RE_ESPACIOS.sub(" ", valor).lower()))
+        if m.end() >= len(dn):
+            break
+    return tuple(sorted(rdns))
+
+
+def nombre_corto(cert):
+    """CN del sujeto (o el DN completo si no tiene CN) para logs y reportes."""
+    m = _RE_CN.search(str(cert.sujeto or ""))
+    if m:
+        return m.group(1).replace("\\,", ",").strip().strip('"')
+    return cert.sujeto or cert.fp_texto
+
+
+# ==========================
+# GRAFO
+# ==========================
+class GrafoCadenas:
+    """Grafo sujeto -> emisor sobre un conjunto de certificados."""
+
+    def __init__(self, certs):
+        self.nodos  = []
+        self.por_fp = {}   # fp (bytes) -> Certificado
+        self.por_dn = {}   # DN normalizado -> [Certificado]
+        vistos = set()
+        for cert in certs:
+            if id(cert) in vistos:
+                continue
+            vistos.add(id(cert))
+            self.nodos.append(cert)
+            if cert.fp:
+                self.por_fp[cert.fp] = cert
+            dn = normalizar_dn(cert.sujeto)
+            if dn:
+                self.por_dn.setdefault(dn, []).append(cert)
+
+        self.emisores  = {}   # Certificado -> Certificado emisor (ausente si es raiz o huerfano)
+        self.huerfanos = 0    # emisor no presente en el inventario
+        self.raices    = 0    # autofirmados
+        for cert in self.nodos:
+            dn_emisor = normalizar_dn(cert.emisor)
+            if not dn_emisor or dn_emisor == normalizar_dn(cert.sujeto):
+                self.raices += bool(dn_emisor)
+                continue
+            candidatos = [c for c in self.por_dn.get(dn_emisor, ()) if c is not cert]
+            if not candidatos:
+                self.huerfanos += 1
+                continue
+            self.emisores[cert] = max(candidatos, key=_clave_vigencia)
+
+        self._efectivo = {}   # Certificado -> (fecha, certificado que la limita)
+        self._calcular_efectivos()
+
+    def _calcular_efectivos(self):
+        """Una pasada: cada nodo se resuelve una vez, reutilizando lo ya calculado de su emisor."""
+        for inicio in self.nodos:
+            pila, en_pila = [], set()
+            cert = inicio
+            while cert is not None and cert not in self._efectivo and id(cert) not in en_pila:
+                pila.append(cert)
+                en_pila.add(id(cert))
+                cert = self.emisores.get(cert)
+            # cert en la pila = ciclo (certificados cruzados): se corta ahi
+            base = self._efectivo.get(cert) if cert is not None and id(cert) not in en_pila else None
+            for nodo in reversed(pila):
+                propio = (nodo.vencimiento, nodo) if nodo.vencimiento else None
+                if base is None or (propio is not None and propio[0] < base[0]):
+                    base = propio
+                self._efectivo[nodo] = base
+
+    def __len__(self):
+        return len(self.nodos)
+
+    @property
+    def enlaces(self):
+        return len(self.emisores)
+
+    def emisor(self, cert):
+        return self.emisores.get(cert)
+
+    def cadena(self, cert):
+        """[cert, emisor, emisor del emisor, ...] hasta la raiz o el primer emisor ausente."""
+        cadena, vistos = [], set()
+        while cert is not None and id(cert) not in vistos:
+            cadena.append(cert)
+            vistos.add(id(cert))
+            cert = self.emisores.get(cert)
+        return cadena
+
+    def vencimiento_efectivo(self, cert):
+        """(fecha, certificado limitante): el vencimiento mas temprano de la cadena; (None, None) si no hay fechas."""
+        return self._efectivo.get(cert) or (None, None)
+
+    def limitado_por_cadena(self, cert):
+        """(fecha, certificado de la cadena) si la cadena vence antes que el propio certificado; si no None."""
+        fecha, limitante = self.vencimiento_efectivo(cert)
+        if limitante is None or limitante is cert:
+            return None
+        if cert.vencimiento and fecha >= cert.vencimiento:
+            return None
+        return fecha, limitante
+
+
+def _clave_vigencia(cert):
+    return (cert.vencimiento is not None, cert.vencimiento or 0)
@@ -0,0 +1,140 @@
+"""
+REGISTRO COMPACTO DE CERTIFICADOS v1.0
+- Certificado con __slots__: fingerprint SHA1 en bytes, serial como int (con
+  la cantidad de digitos del original para reproducir el texto, ceros a la
+  izquierda incluidos), sujeto / emisor y vencimiento 'Not After' evaluado
+  una sola vez
+- Internado por fingerprint: el mismo CA repetido en todos los ambientes y
+  secciones es un unico objeto, normalizado y evaluado una vez
+- Entrada: label (alias) + certificado; el label depende del keystore, el
+  certificado no
+- fp_a_bytes / serial_a_int: forma canonica de los valores leidos del Excel,
+  para comparar bytes con bytes e int con int
+"""
+
+import re
+
+
+_RE_PREFIJO_FP = re.compile(r"^SHA\d+\s*:\s*", re.IGNORECASE)
+_RE_PAR_HEX    = re.compile(r"[0-9A-Fa-f]{2}")
+_RE_SEP_SERIAL = re.compile(r"[\s\-:]")
+
+_SIN_EVALUAR = object()
+
+
+# ==========================
+# FORMA CANONICA
+# ==========================
+def fp_a_bytes(valor):
+    """'AB:CD..', 'SHA1: AB CD ..' -> b'\\xab\\xcd..' (b'' si no hay fingerprint)."""
+    if not valor:
+        return b""
+    return bytes.fromhex("".join(_RE_PAR_HEX.findall(_RE_PREFIJO_FP.sub("", str(valor)))))
+
+
+def texto_serial(valor):
+    """Serial sin separadores y en minusculas (texto)."""
+    if not valor:
+        return ""
+    return _RE_SEP_SERIAL.sub("", str(valor)).lower()
+
+
+def serial_a_int(valor):
+    """Serial hexadecimal -> int; None si no es hexadecimal."""
+    s = texto_serial(valor)
+    try:
+        return int(s, 16) if s else None
+    except ValueError:
+        return None
+
+
+def fp_texto(fp):
+    """Fingerprint en el formato del volcado GSKit: 'AB CD EF ...'."""
+    return " ".join(f"{b:02X}" for b in fp)
+
+
+# ==========================
+# CERTIFICADO
+# ==========================
+class Certificado:
+    __slots__ = ("fp", "serial", "digitos", "not_after", "sujeto", "emisor", "_vence")
+
+    def __init__(self, fp, serial, digitos, not_after, sujeto="", emisor=""):
+        self.fp        = fp          # bytes (SHA1)
+        self.serial    = serial      # int o None
+        self.digitos   = digitos     # largo del serial original en hex
+        self.not_after = not_after   # texto tal como viene en el volcado
+        self.sujeto    = sujeto      # DN 'CN=..,O=..' (vacio si el volcado no lo trae)
+        self.emisor    = emisor
+        self._vence    = _SIN_EVALUAR
+
+    @property
+    def fp_texto(self):
+        return fp_texto(self.fp)
+
+    @property
+    def serial_texto(self):
+        if self.serial is None:
+            return ""
+        return format(self.serial, f"0{self.digitos}x")
+
+    @property
+    def vencimiento(self):
+        """Fecha 'Not After' (date o None), parseada la primera vez que se pide."""
+        if self._vence is _SIN_EVALUAR:
+            from fechas import extraer_fecha_vencimiento
+            self._vence = extraer_fecha_vencimiento(self.not_after) if self.not_after else None
+        return self._vence
+
+    def __getstate__(self):
+        # Pickle (catalogo compartido con otros procesos): el vencimiento se reevalua del otro lado
+        return self.fp, self.serial, self.digitos, self.not_after, self.sujeto, self.emisor
+
+    def __setstate__(self, estado):
+        self.fp, self.serial, self.digitos, self.not_after, self.sujeto, self.emisor = estado
+        self._vence = _SIN_EVALUAR
+
+    def __repr__(self):
+        return f"Certificado(fp={self.fp_texto!r}, serial={self.serial_texto!r}, not_after={self.not_after!r})"
+
+
+class Entrada:
+    """Certificado dentro de un keystore, con su label."""
+    __slots__ = ("label", "cert")
+
+    def __init__(self, label, cert):
+        self.label = label
+        self.cert  = cert
+
+
+# ==========================
+# INTERNADO
+# ==========================
+_internados = {}   # fp (o (serial, not_after) si no hay fp) -> Certificado
+
+estadisticas = {"aciertos": 0, "nuevos": 0}   # metricas.py
+
+
+def internar(fp, serial, not_after="", sujeto="", emisor=""):
+    """
+    Certificado canonico para los valores parseados (fp en texto o bytes,
+    serial en texto hex). Si ya se vio uno con el mismo fingerprint se
+    retorna ese mismo objeto.
+    """
+    fp_b  = fp if isinstance(fp, bytes) else fp_a_bytes(fp)
+    s     = texto_serial(serial)
+    clave = fp_b or ("serial", s, not_after)
+    cert  = _internados.get(clave)
+    if cert is None:
+        cert = Certificado(fp_b, serial_a_int(s), len(s), not_after, sujeto, emisor)
+        _internados[clave] = cert
+        estadisticas["nuevos"] += 1
+        return cert
+    estadisticas["aciertos"] += 1
+    if sujeto and not cert.sujeto:   # otro volcado del mismo certificado trae mas datos
+        cert.sujeto, cert.emisor = sujeto, emisor
+    return cert
+
+
+def total_internados():
+    return len(_internados)
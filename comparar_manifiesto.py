@@ -0,0 +1,178 @@
+"""
+COMPARACION DE MANIFIESTOS SHA256 v1.0
+- Hoja PLUG.WAS contra el manifiesto 'shasum -a 256' del ambiente con memoria
+  acotada: los dos lados se ordenan por ruta en tramos de TAM_TRAMO entradas
+  (cada tramo ordenado se baja a un archivo temporal y se mezclan con
+  heapq.merge) y se cruzan con un merge-join en una sola pasada
+- El manifiesto se lee linea a linea desde el archivo, sin armar el dict
+  {ruta: hash} completo
+- Resultado por ruta: IGUAL, DIFERENTE, SOLO_MANIFIESTO (en el .sha256 pero no
+  en la hoja) y SOLO_HOJA (en la hoja pero no en el .sha256)
+- Rutas repetidas: en el manifiesto vale la ultima linea (como el parser del
+  registro); en la hoja se compara cada fila
+- Las IGUAL solo se cuentan; las demas van a un TSV por hoja
+  (DETALLE_SHA256/<hoja>.tsv) escrito a medida que salen del cruce, y solo
+  las primeras LIMITE_DETALLE de cada hoja se conservan en memoria
+"""
+
+import os
+import heapq
+import tempfile
+from collections import deque
+from itertools import groupby
+
+
+TAM_TRAMO  = 100_000   # entradas ordenadas en memoria antes de bajar un tramo a disco
+TAM_BLOQUE = 5_000     # actualizaciones de celda acumuladas antes de escribirlas
+LIMITE_DETALLE = 200   # resultados distintos de IGUAL por hoja que van al log y al historial
+
+CARPETA_DETALLE = "DETALLE_SHA256"
+
+IGUAL           = "IGUAL"
+DIFERENTE       = "DIFERENTE"
+SOLO_MANIFIESTO = "SOLO_MANIFIESTO"
+SOLO_HOJA       = "SOLO_HOJA"
+TIPOS           = (IGUAL, DIFERENTE, SOLO_MANIFIESTO, SOLO_HOJA)
+
+_SEP = "\0"
+
+
+class Resultado:
+    __slots__ = ("tipo", "ruta", "fila", "hash_hoja", "hash_manifiesto")
+
+    def __init__(self, tipo, ruta, fila, hash_hoja, hash_manifiesto):
+        self.tipo            = tipo
+        self.ruta            = ruta
+        self.fila            = fila              # fila de la hoja (None si SOLO_MANIFIESTO)
+        self.hash_hoja       = hash_hoja
+        self.hash_manifiesto = hash_manifiesto
+
+
+# ==========================
+# FUENTES (en streaming)
+# ==========================
+def leer_manifiesto(ruta):
+    """(ruta, n_linea, hash) por cada linea 'hash  ruta' del manifiesto."""
+    with open(ruta, "r", encoding="utf-8", errors="ignore") as f:
+        for n, linea in enumerate(f):
+            partes = linea.strip().split(None, 1)
+            if len(partes) == 2:
+                yield partes[1].strip(), n, partes[0].strip()
+
+
+def filas_hoja(ws):
+    """(ruta, fila, hash) de cada fila de la hoja con una ruta absoluta en la col A."""
+    for fila, valores in enumerate(ws.iter_rows(min_row=2, max_col=2, values_only=True), 2):
+        ruta  = str(valores[0]).strip() if valores and valores[0] else ""
+        valor = str(valores[1]).strip() if len(valores) > 1 and valores[1] else ""
+        if ruta.startswith("/"):
+            yield ruta, fila, valor
+
+
+# ==========================
+# ORDENAMIENTO EXTERNO
+# ==========================
+def _bajar_tramo(entradas, carpeta):
+    fd, ruta = tempfile.mkstemp(suffix=".tramo", dir=carpeta)
+    with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+        for clave, n, valor in entradas:
+            f.write(f"{clave}{_SEP}{n}{_SEP}{valor}\n")
+    return ruta
+
+
+def _leer_tramo(ruta):
+    with open(ruta, "r", encoding="utf-8", newline="\n") as f:
+        for linea in f:
+            clave, n, valor = linea.rstrip("\n").split(_SEP)
+            yield clave, int(n), valor
+
+
+def ordenar(entradas, carpeta):
+    """
+    Iterador de (clave, n, valor) ordenado por (clave, n), con a lo sumo
+    TAM_TRAMO entradas en memoria. Si todo entra en un tramo no se toca el disco.
+    """
+    tramos, bloque = [], []
+    for entrada in entradas:
+        bloque.append(entrada)
+        if len(bloque) >= TAM_TRAMO:
+            bloque.sort()
+            tramos.append(_bajar_tramo(bloque, carpeta))
+            bloque = []
+    bloque.sort()
+    if not tramos:
+        return iter(bloque)
+    if bloque:
+        tramos.append(_bajar_tramo(bloque, carpeta))
+    return heapq.merge(*(_leer_tramo(t) for t in tramos))
+
+
+def _ultima_por_ruta(entradas):
+    """Una entrada por ruta (la ultima linea del manifiesto), sobre entradas ya ordenadas."""
+    for _, grupo in groupby(entradas, key=lambda e: e[0]):
+        yield deque(grupo, maxlen=1)[0]
+
+
+# ==========================
+# MERGE-JOIN
+# ==========================
+def cruzar(manifiesto, hoja):
+    """Merge-join de dos iteradores ordenados por ruta: un Resultado por fila de la hoja o ruta del manifiesto."""
+    m = next(manifiesto, None)
+    h = next(hoja, None)
+    while m is not None or h is not None:
+        if h is None or (m is not None and m[0] < h[0]):
+            yield Resultado(SOLO_MANIFIESTO, m[0], None, "", m[2])
+            m = next(manifiesto, None)
+        elif m is None or h[0] < m[0]:
+            yield Resultado(SOLO_HOJA, h[0], h[1], h[2], "")
+            h = next(hoja, None)
+        else:
+            tipo = IGUAL if h[2].lower() == m[2].lower() else DIFERENTE
+            yield Resultado(tipo, h[0], h[1], h[2], m[2])
+            h = next(hoja, None)
+            if h is None or h[0] != m[0]:   # la misma ruta puede estar en varias filas
+                m = next(manifiesto, None)
+
+
+def comparar(ruta_manifiesto, ws, carpeta_tmp=None):
+    """Resultados de la hoja contra el manifiesto, en orden de ruta. Los tramos temporales se borran al terminar."""
+    with tempfile.TemporaryDirectory(prefix="manifiesto_", dir=carpeta_tmp) as tmp:
+        hoja       = ordenar(filas_hoja(ws), tmp)
+        manifiesto = _ultima_por_ruta(ordenar(leer_manifiesto(ruta_manifiesto), tmp))
+        yield from cruzar(manifiesto, hoja)
+
+
+# ==========================
+# DETALLE EN DISCO
+# ==========================
+def ruta_detalle(salida, hoja):
+    return os.path.join(salida, CARPETA_DETALLE, f"{hoja}.tsv")
+
+
+class Detalle:
+    """TSV de los resultados de una hoja (escrito como .tmp y renombrado al cerrar)."""
+
+    def __init__(self, ruta):
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        self.ruta = ruta
+        self._tmp = ruta + ".tmp"
+        self._f   = open(self._tmp, "w", encoding="utf-8", newline="\n")
+        self._f.write("tipo\truta\tfila\thash_hoja\thash_manifiesto\n")
+
+    def agregar(self, r):
+        self._f.write(f"{r.tipo}\t{r.ruta}\t{r.fila or ''}\t{r.hash_hoja}\t{r.hash_manifiesto}\n")
+
+    def cerrar(self):
+        self._f.close()
+        os.replace(self._tmp, self.ruta)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *_):
+        if tipo is None:
+            self.cerrar()
+        else:
+            self._f.close()
+            os.remove(self._tmp)
@@ -0,0 +1,285 @@
+"""
+COORDINADOR DE EJECUCIONES v1.0
+- Una sola ejecucion a la vez por RAIZ: candado exclusivo del sistema
+  operativo (fcntl / msvcrt) sobre RAIZ/COORDINADOR/ejecucion.lock; si el
+  proceso muere el sistema libera el candado
+- Solicitudes que llegan durante una ejecucion quedan en la cola y se
+  fusionan: N disparos del mismo comando mientras se ejecuta -> exactamente
+  una ejecucion posterior
+- Estado consultable (RAIZ/COORDINADOR/estado.json): ejecucion en curso,
+  ultima ejecucion, solicitudes pendientes y fusionadas
+- Cada ejecucion es un proceso nuevo de procesar.py (sin caches de la
+  ejecucion anterior)
+
+Uso:
+  python procesar.py coordinar ejecutar [subcomando] [--raiz ...] [opciones del subcomando]
+  python procesar.py coordinar estado [--raiz ...] [--json]
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+from datetime import datetime
+
+
+CARPETA_COORDINADOR = "COORDINADOR"
+ESPERA_COLA         = 0.05   # segundos entre intentos del candado de la cola
+
+ESTADO_LIBRE        = "libre"
+ESTADO_EJECUTANDO   = "ejecutando"
+ESTADO_INTERRUMPIDO = "interrumpido"
+
+
+def _ahora():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+# ==========================
+# CANDADO DE ARCHIVO
+# ==========================
+class Candado:
+    """Candado exclusivo entre procesos sobre un archivo (liberado por el SO si el proceso muere)."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._f   = None
+
+    def tomar(self, esperar=False):
+        """True si se obtuvo el candado; sin 'esperar' no bloquea."""
+        os.makedirs(os.path.dirname(self.ruta), exist_ok=True)
+        f = open(self.ruta, "a+b")
+        while True:
+            try:
+                _bloquear(f)
+                self._f = f
+                return True
+            except OSError:
+                if not esperar:
+                    f.close()
+                    return False
+                time.sleep(ESPERA_COLA)
+
+    def soltar(self):
+        if self._f is not None:
+            _desbloquear(self._f)
+            self._f.close()
+            self._f = None
+
+    def __enter__(self):
+        self.tomar(esperar=True)
+        return self
+
+    def __exit__(self, *exc):
+        self.soltar()
+
+
+if os.name == "nt":
+    import msvcrt
+
+    def _bloquear(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def _desbloquear(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _bloquear(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _desbloquear(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+# ==========================
+# COORDINADOR
+# ==========================
+class Coordinador:
+    def __init__(self, raiz):
+        self.raiz       = raiz
+        self.carpeta    = os.path.join(raiz, CARPETA_COORDINADOR)
+        self.ejecucion  = Candado(os.path.join(self.carpeta, "ejecucion.lock"))
+        self._cola_lock = Candado(os.path.join(self.carpeta, "cola.lock"))
+        self.ruta_cola   = os.path.join(self.carpeta, "cola.json")
+        self.ruta_estado = os.path.join(self.carpeta, "estado.json")
+
+    # --- archivos JSON (escritura atomica) ---
+    def _leer(self, ruta, defecto):
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return defecto
+
+    def _escribir(self, ruta, datos):
+        os.makedirs(self.carpeta, exist_ok=True)
+        tmp = f"{ruta}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, ruta)
+
+    # --- cola de solicitudes ---
+    def encolar(self, argv):
+        """Agrega la solicitud; si el mismo comando ya estaba pendiente se fusiona. Retorna pendientes."""
+        clave = " ".join(argv)
+        with self._cola_lock:
+            cola = self._leer(self.ruta_cola, [])
+            previa = next((s for s in cola if s["clave"] == clave), None)
+            if previa:
+                previa["solicitudes"] += 1
+                previa["ultima"] = _ahora()
+            else:
+                cola.append({"clave": clave, "argv": list(argv), "solicitudes": 1,
+                             "primera": _ahora(), "ultima": _ahora(), "pid": os.getpid()})
+            self._escribir(self.ruta_cola, cola)
+            return len(cola)
+
+    def pendientes(self):
+        with self._cola_lock:
+            return self._leer(self.ruta_cola, [])
+
+    def _tomar_cola(self):
+        """Vacia la cola y retorna las solicitudes (en orden de llegada)."""
+        with self._cola_lock:
+            cola = self._leer(self.ruta_cola, [])
+            if cola:
+                self._escribir(self.ruta_cola, [])
+            return cola
+
+    # --- estado ---
+    def estado(self):
+        estado = self._leer(self.ruta_estado, {"estado": ESTADO_LIBRE})
+        if estado.get("estado") == ESTADO_EJECUTANDO and self.ejecucion.tomar():
+            self.ejecucion.soltar()   # nadie lo tiene: el proceso murio a mitad de la ejecucion
+            estado["estado"] = ESTADO_INTERRUMPIDO
+        estado["pendientes"] = self.pendientes()
+        return estado
+
+    def _actualizar_estado(self, **cambios):
+        estado = self._leer(self.ruta_estado, {"estado": ESTADO_LIBRE})
+        estado.update(cambios)
+        self._escribir(self.ruta_estado, estado)
+
+    # --- ejecucion ---
+    def _ejecutar(self, solicitud, log):
+        inicio = time.perf_counter()
+        self._actualizar_estado(estado=ESTADO_EJECUTANDO, pid=os.getpid(), equipo=socket.gethostname(),
+                                comando=solicitud["clave"], inicio=_ahora(),
+                                solicitudes=solicitud["solicitudes"])
+        if solicitud["solicitudes"] > 1:
+            log(f"Ejecutando '{solicitud['clave']}' ({solicitud['solicitudes']} solicitudes fusionadas)")
+        else:
+            log(f"Ejecutando '{solicitud['clave']}'")
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "procesar.py")
+        try:
+            codigo = subprocess.run([sys.executable, script] + solicitud["argv"]).returncode
+        except Exception as e:
+            log(f"No se pudo lanzar '{solicitud['clave']}': {e}", "ERROR")
+            codigo = 1
+        previo = self._leer(self.ruta_estado, {})
+        self._actualizar_estado(
+            estado=ESTADO_LIBRE, pid=None, comando=None, inicio=None, solicitudes=None,
+            ejecuciones=previo.get("ejecuciones", 0) + 1,
+            fusionadas=previo.get("fusionadas", 0) + solicitud["solicitudes"] - 1,
+            ultima={"comando": solicitud["clave"], "inicio": previo.get("inicio"), "fin": _ahora(),
+                    "codigo": codigo, "duracion_s": round(time.perf_counter() - inicio, 1)})
+        log(f"'{solicitud['clave']}' termino con codigo {codigo}")
+        return codigo
+
+    def solicitar(self, argv, log):
+        """
+        Encola la solicitud y, si no hay otra ejecucion en curso, vacia la cola.
+        Retorna el peor codigo de salida de lo ejecutado (0 si solo se encolo).
+        """
+        pendientes = self.encolar(argv)
+        codigo, ejecuto = 0, False
+        # Tras soltar el candado se revisa la cola otra vez: una solicitud que
+        # llego justo entre la ultima lectura y la liberacion no queda huerfana
+        while self.ejecucion.tomar():
+            try:
+                while True:
+                    cola = self._tomar_cola()
+                    if not cola:
+                        break
+                    for solicitud in cola:
+                        codigo = max(codigo, self._ejecutar(solicitud, log))
+                        ejecuto = True
+            finally:
+                self.ejecucion.soltar()
+            if not self.pendientes():
+                return codigo
+        if ejecuto:   # lo que quedo en la cola lo toma quien tiene ahora el candado
+            return codigo
+
+        estado = self._leer(self.ruta_estado, {})
+        log(f"Ya hay una ejecucion en curso en {self.raiz} ('{estado.get('comando')}', pid {estado.get('pid')}, "
+            f"desde {estado.get('inicio')}): solicitud encolada ({pendientes} pendientes)", "WARN")
+        return codigo
+
+
+# ==========================
+# CLI
+# ==========================
+def _log(msg, nivel="INFO"):
+    print(f"[{_ahora()}] [{nivel}] {msg}", flush=True)
+
+
+def comando_hijo(tokens):
+    """
+    (argv del subcomando, raiz). Sin subcomando se asume 'auditar', igual que
+    procesar.py; la RAIZ se toma del propio subcomando o se agrega la default.
+    """
+    from procesar import SUBCOMANDOS, RAIZ_DEFAULT
+    comando = [t for t in tokens if t != "--"]
+    if not comando or comando[0] not in SUBCOMANDOS:
+        comando = ["auditar"] + comando
+    if "--raiz" in comando[:-1]:
+        return comando, comando[comando.index("--raiz") + 1]
+    return comando[:1] + ["--raiz", RAIZ_DEFAULT] + comando[1:], RAIZ_DEFAULT
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv and argv[0] == "ejecutar" and not {"-h", "--help"} & set(argv[1:2]):
+        # Todo lo que sigue a 'ejecutar' es del subcomando (incluida --raiz)
+        comando, raiz = comando_hijo(argv[1:])
+        return Coordinador(raiz).solicitar(comando, _log)
+
+    parser = argparse.ArgumentParser(prog="procesar.py coordinar",
+                                     description="Una ejecucion a la vez por RAIZ, con cola de solicitudes fusionadas")
+    sub = parser.add_subparsers(dest="accion", required=True)
+    sub.add_parser("ejecutar", help="Ejecuta (o encola) un subcomando de procesar.py: "
+                                    "coordinar ejecutar [subcomando] [--raiz ...] [opciones]")
+    p = sub.add_parser("estado", help="Ejecucion en curso, ultima ejecucion y cola")
+    p.add_argument("--raiz", default=r"C:\Automatizacion_Excel", help="Carpeta raiz del proyecto")
+    p.add_argument("--json", action="store_true", help="Estado en JSON")
+    args = parser.parse_args(argv)
+
+    coordinador = Coordinador(args.raiz)
+    estado = coordinador.estado()
+    if args.json:
+        print(json.dumps(estado, ensure_ascii=False, indent=1))
+        return 0
+    print(f"Estado: {estado['estado']}")
+    if estado["estado"] in (ESTADO_EJECUTANDO, ESTADO_INTERRUMPIDO):
+        print(f"  Comando: {estado.get('comando')} (pid {estado.get('pid')} en {estado.get('equipo')}, "
+              f"desde {estado.get('inicio')})")
+    ultima = estado.get("ultima")
+    if ultima:
+        print(f"Ultima ejecucion: {ultima['comando']} | fin {ultima['fin']} | codigo {ultima['codigo']} | "
+              f"{ultima['duracion_s']} s")
+    print(f"Ejecuciones: {estado.get('ejecuciones', 0)} | Solicitudes fusionadas: {estado.get('fusionadas', 0)}")
+    print(f"Pendientes: {len(estado['pendientes'])}")
+    for s in estado["pendientes"]:
+        print(f"  {s['clave']} ({s['solicitudes']} solicitudes, primera {s['primera']})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,27 +1,54 @@
 """
 STAGING MULTI-AMBIENTE v3.0
-- Filtra archivos por ambiente (no mezcla listas)
+- Filtra archivos por ambiente (no mezcla listas); ambientes descubiertos
+  automaticamente (ambientes.py) en lugar de una lista fija
 - Limpia destino antes de copiar (elimina archivos obsoletos)
-- Solo copia si el archivo cambió (compara SHA256)
+- Plan/aplicacion: primero se arma el plan completo (copiar / omitir /
+  eliminar / faltante / nuevo / denegado) solo con metadatos y hashes
+  cacheados (CACHE_HASHES.json); despues se aplica por lotes ordenados por
+  carpeta y con copias en paralelo. --plan lo muestra sin tocar nada
+- Solo copia si el archivo cambió (tamaño/mtime, luego SHA256); copia con reflink /
+  copy_file_range / sendfile cuando el sistema lo permite (materializar.py)
+- --atomico: destino armado en carpeta hermana y publicado con intercambio atomico
+- --instantanea: guarda el estado en el almacen por contenido (almacen.py)
+- Indice invertido de certificados (indice_invertido.py) actualizado con los
+  archivos que cambiaron
+- Metricas Prometheus (fases, archivos por accion, bytes copiados y
+  hasheados, aciertos de la cache de hashes) en RAIZ/METRICAS/staging.prom
 - Log con fecha completa (YYYY-MM-DD HH:MM:SS)
 - Matching case-insensitive + búsqueda flexible por nombre similar
 - Reporta archivos autorizados no encontrados en origen
+- lista_maestra con nombres exactos, globs, regex y denegaciones (reglas_lista.py);
+  los archivos nuevos van a lista_maestra.journal
+- Volcados identificados por contenido (registro de parsers), no solo por extensión
 - Al finalizar, lanza el proceso de auditoría automáticamente
-- Argparse para configuración por CLI
+- Argparse para configuración por CLI; importable sin efectos (main(argv))
 """
 
 import os
 import re
-import shutil
+import sys
+import json
+import time
 import hashlib
 import argparse
+import threading
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import almacen
+import indice_invertido
+import metricas
+import ambientes
+import materializar
+import registro_parsers
+import reglas_lista
+
 # ==========================
 # ARGUMENTOS CLI
 # ==========================
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(
         description="Staging Multi-Ambiente v3.0 - Copia archivos autorizados"
     )
@@ -29,36 +56,60 @@ def parse_args():
                         help="Carpeta raiz del proyecto")
     parser.add_argument("--no-auditoria", action="store_true",
                         help="No lanzar auditoria al finalizar")
-    return parser.parse_args()
+    parser.add_argument("--ambientes", nargs="+", default=None,
+                        help="Ambientes a copiar (default: todos los descubiertos)")
+    parser.add_argument("--instantanea", action="store_true",
+                        help="Al terminar, guarda una instantanea en RAIZ/ALMACEN (almacen.py)")
+    parser.add_argument("--atomico", action="store_true",
+                        help="Arma el destino en una carpeta hermana y la publica con un intercambio atomico")
+    parser.add_argument("--plan", nargs="?", const="", default=None, metavar="RUTA",
+                        help="Solo calcula el plan y lo guarda como JSON (default: RAIZ/PLAN_STAGING.json)")
+    parser.add_argument("--aplicar-plan", default=None, metavar="RUTA",
+                        help="Aplica un plan guardado con --plan")
+    parser.add_argument("--hilos", type=int, default=4,
+                        help="Copias en paralelo al aplicar el plan (default: 4)")
+    parser.add_argument("--metricas", default=None,
+                        help="Carpeta del archivo staging.prom (default: RAIZ/METRICAS)")
+    return parser.parse_args(argv)
 
-_args = parse_args()
 
 # ==========================
 # CONFIGURACIÓN
 # ==========================
-RAIZ             = _args.raiz
-RUTA_LISTA       = os.path.join(RAIZ, 'lista_maestra.txt')
-ARCHIVO_LOG      = os.path.join(RAIZ, 'LOG_STAGING.txt')
-SCRIPT_AUDITORIA = os.path.join(RAIZ, 'procesar.py')
-SIN_AUDITORIA    = _args.no_auditoria
-
-AMBIENTES = {
-    'CAMARAPROD': {
-        'origen':  os.path.join(RAIZ, 'archivos_out', 'INT_CAMARAPROD'),
-        'destino': os.path.join(RAIZ, 'PROCESADOS', 'CAMARAPROD'),
-        'prefijo': 'camaraprod'
-    },
-    'CAMARARESP': {
-        'origen':  os.path.join(RAIZ, 'archivos_out', 'INT_CAMARARESP'),
-        'destino': os.path.join(RAIZ, 'PROCESADOS', 'CAMARARESP'),
-        'prefijo': 'camararesp'
-    },
-    'CAMARATEST': {
-        'origen':  os.path.join(RAIZ, 'archivos_out', 'INT_CAMARATEST'),
-        'destino': os.path.join(RAIZ, 'PROCESADOS', 'CAMARATEST'),
-        'prefijo': 'camaratest'
-    }
-}
+RAIZ             = None
+RUTA_LISTA       = None
+ARCHIVO_LOG      = None
+SCRIPT_AUDITORIA = None
+SIN_AUDITORIA    = False
+ATOMICO          = False
+INSTANTANEA      = False
+PLAN_ARCHIVO     = None
+APLICAR_PLAN     = None
+HILOS            = 4
+TAM_LOTE         = 64
+CARPETA_METRICAS = None
+AMBIENTES        = {}
+
+
+def configurar(args):
+    """Fija la configuracion global a partir de los argumentos (sin efectos al importar)."""
+    global RAIZ, RUTA_LISTA, ARCHIVO_LOG, SCRIPT_AUDITORIA, SIN_AUDITORIA, ATOMICO, INSTANTANEA
+    global PLAN_ARCHIVO, APLICAR_PLAN, HILOS, CARPETA_METRICAS, AMBIENTES
+    RAIZ             = args.raiz
+    RUTA_LISTA       = os.path.join(RAIZ, 'lista_maestra.txt')
+    ARCHIVO_LOG      = os.path.join(RAIZ, 'LOG_STAGING.txt')
+    SCRIPT_AUDITORIA = os.path.join(RAIZ, 'procesar.py')
+    SIN_AUDITORIA    = args.no_auditoria
+    ATOMICO          = args.atomico
+    INSTANTANEA      = args.instantanea
+    PLAN_ARCHIVO     = args.plan
+    APLICAR_PLAN     = args.aplicar_plan
+    HILOS            = max(1, args.hilos)
+    CARPETA_METRICAS = args.metricas
+
+    # Ambientes descubiertos de archivos_out/INT_*, PROCESADOS y hojas del libro
+    hojas     = ambientes.hojas_libro(os.path.join(RAIZ, 'REPORTE_AUDITORIA.xlsx'))
+    AMBIENTES = ambientes.filtrar(ambientes.descubrir(RAIZ, hojas), args.ambientes)
 
 
 # ==========================
@@ -77,19 +128,15 @@ def log(msg, nivel="INFO"):
 # ==========================
 def calcular_sha256(ruta):
     sha256 = hashlib.sha256()
+    leidos = 0
     with open(ruta, "rb") as f:
         for bloque in iter(lambda: f.read(4096), b""):
             sha256.update(bloque)
+            leidos += len(bloque)
+    _contar(hasheados=1, bytes_hasheados=leidos)
     return sha256.hexdigest()
 
 
-def archivos_iguales(src, dst):
-    """Retorna True si ambos archivos tienen el mismo SHA256."""
-    if not os.path.exists(dst):
-        return False
-    return calcular_sha256(src) == calcular_sha256(dst)
-
-
 def construir_mapa_origen(carpeta):
     """
     Construye un diccionario {nombre_lower: nombre_real} para hacer
@@ -130,149 +177,392 @@ def buscar_en_origen(fname_maestra, mapa_origen):
     return None
 
 
-def detectar_no_listados(mapa_origen, autorizados_lower, prefijo):
+def nombre_inventario(prefijo):
+    """Inventario que el staging escribe en cada destino (registro_parsers.es_artefacto_staging)."""
+    return f"inventario_{prefijo}.txt"
+
+
+def es_volcado(carpeta, fname):
+    """
+    True si el archivo es un volcado de keystore: por extensión (.out, .sha256,
+    _out) o porque el formato registrado en CACHE_HASHES.json para su tamaño y
+    mtime es uno conocido por el registro. None si todavia no se sabe: el plan
+    no lee contenidos, la deteccion queda para la aplicacion (confirmar_volcado).
+    """
+    f = fname.lower()
+    if f.endswith('.out') or f.endswith('.sha256') or f.endswith('_out'):
+        return True
+    formato = formato_cacheado(os.path.join(carpeta, fname))
+    if formato is None:
+        return None
+    return formato != registro_parsers.FORMATO_DESCONOCIDO
+
+
+def confirmar_volcado(ruta):
+    """(Aplicacion) Detecta el formato por la cabecera del archivo y lo deja en la cache."""
+    try:
+        tam, mtime = _firma(ruta)
+        formato = registro_parsers.detectar_archivo(ruta)
+    except OSError:
+        return False
+    with _lock_cache:
+        previo = _cache_hashes.get(ruta)
+        if previo and previo[0] == tam and previo[1] == mtime:
+            _cache_hashes[ruta] = previo[:3] + [formato]
+        else:
+            _cache_hashes[ruta] = [tam, mtime, None, formato]
+    return formato != registro_parsers.FORMATO_DESCONOCIDO
+
+
+def detectar_no_listados(mapa_origen, resueltos_lower, reglas, prefijo, carpeta):
     """
     Detecta archivos en la carpeta origen que tienen el prefijo correcto
-    y son .out, .sha256 o _out, pero NO están en lista_maestra.
-    Retorna lista de nombres reales (del origen) no listados.
+    y son volcados de keystore, pero ninguna regla de lista_maestra cubre.
+    Retorna (no_listados, denegados, por_confirmar) con nombres reales del
+    origen; por_confirmar son los que no tienen formato conocido sin leerlos.
     """
-    es_dato = lambda f: f.endswith('.out') or f.endswith('.sha256') or f.endswith('_out')
-    no_listados = []
+    no_listados, denegados, por_confirmar = [], [], []
     for fname_lower, fname_real in mapa_origen.items():
-        if fname_lower.startswith(prefijo) and es_dato(fname_lower):
-            if fname_lower not in autorizados_lower:
-                no_listados.append(fname_real)
-    return sorted(no_listados)
-
+        if not fname_lower.startswith(prefijo) or fname_lower in resueltos_lower:
+            continue
+        if reglas.denegado(prefijo, fname_real):
+            denegados.append(fname_real)
+            continue
+        volcado = es_volcado(carpeta, fname_real)
+        if volcado:
+            no_listados.append(fname_real)
+        elif volcado is None:
+            por_confirmar.append(fname_real)
+    return sorted(no_listados), sorted(denegados), sorted(por_confirmar)
 
 
 # ==========================
-# PROCESO PRINCIPAL
+# CACHE DE HASHES (por ruta, validada con tamaño y mtime)
 # ==========================
-def ejecutar_staging_total():
+NOMBRE_CACHE  = "CACHE_HASHES.json"
+_cache_hashes = {}   # {ruta: [tam, mtime_ns, sha256 o None, formato?]}
+_lock_cache   = threading.Lock()
 
-    # Limpiar log anterior
-    if os.path.exists(ARCHIVO_LOG):
-        os.remove(ARCHIVO_LOG)
+# Contadores de la ejecucion para metricas (los hilos de copia tambien suman)
+_estadisticas = {"hasheados": 0, "bytes_hasheados": 0, "cache_aciertos": 0,
+                 "cache_fallos": 0, "bytes_copiados": 0}
+_metodos      = {}
 
-    log("=" * 60)
-    log(f"  STAGING MULTI-AMBIENTE v3.0 - INICIO ({datetime.now().strftime('%d/%m/%Y')})")
-    log("=" * 60)
 
-    # Cargar lista maestra
-    if not os.path.exists(RUTA_LISTA):
-        log(f"No existe lista_maestra.txt en {RAIZ}", "ERROR")
-        return
+def _contar(**valores):
+    with _lock_cache:
+        for k, v in valores.items():
+            _estadisticas[k] += v
 
-    with open(RUTA_LISTA, 'r', encoding='utf-8') as f:
-        lista_maestra = [l.strip() for l in f if l.strip()]
 
-    log(f"Lista maestra cargada: {len(lista_maestra)} archivos autorizados")
+def cargar_cache_hashes():
+    global _cache_hashes
+    ruta = os.path.join(RAIZ, NOMBRE_CACHE)
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            _cache_hashes = json.load(f)
+    except (OSError, ValueError):
+        _cache_hashes = {}
+
+
+def guardar_cache_hashes():
+    ruta = os.path.join(RAIZ, NOMBRE_CACHE)
+    with _lock_cache:
+        datos = {k: v for k, v in _cache_hashes.items() if os.path.exists(k)}
+    with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(datos, f)
+    os.replace(ruta + ".tmp", ruta)
+
+
+def _firma(ruta):
+    st = os.stat(ruta)
+    return st.st_size, st.st_mtime_ns
+
+
+def hash_cacheado(ruta, clave=None):
+    """SHA256 de 'ruta' desde la cache si tamaño y mtime coinciden; si no, se calcula."""
+    clave = clave or ruta
+    tam, mtime = _firma(ruta)
+    previo = _cache_hashes.get(clave)
+    vigente = bool(previo) and previo[0] == tam and previo[1] == mtime
+    if vigente and previo[2]:
+        _contar(cache_aciertos=1)
+        return previo[2]
+    _contar(cache_fallos=1)
+    sha = calcular_sha256(ruta)
+    with _lock_cache:
+        _cache_hashes[clave] = [tam, mtime, sha] + (previo[3:] if vigente else [])
+    return sha
+
+
+def formato_cacheado(ruta):
+    """Formato registrado para 'ruta' si tamaño y mtime no cambiaron; None si no se sabe (no lee el archivo)."""
+    previo = _cache_hashes.get(ruta)
+    if not previo or len(previo) < 4:
+        return None
+    try:
+        return previo[3] if (previo[0], previo[1]) == _firma(ruta) else None
+    except OSError:
+        return None
 
-    resumen_total = {"copiados": 0, "sin_cambios": 0, "eliminados": 0,
-                     "no_encontrados": 0, "errores": 0}
 
-    for ambiente, rutas in AMBIENTES.items():
-        log(f"\n>>> AMBIENTE: {ambiente}")
+def mismo_contenido(src, dst):
+    """
+    Decide con metadatos antes de leer: tamaño distinto -> distinto; tamaño y
+    mtime iguales -> igual (la copia conserva el mtime del origen); en otro
+    caso compara los hashes (cacheados).
+    """
+    if not os.path.exists(dst):
+        return False
+    f_src, f_dst = _firma(src), _firma(dst)
+    if f_src[0] != f_dst[0]:
+        return False
+    if f_src == f_dst:
+        return True
+    return hash_cacheado(src) == hash_cacheado(dst)
+
+
+# ==========================
+# PLAN (solo metadatos y hashes cacheados; no modifica nada)
+# ==========================
+ACCION_COPIAR   = "copiar"
+ACCION_OMITIR   = "omitir"
+ACCION_ELIMINAR = "eliminar"
+ACCION_FALTANTE = "faltante"
+ACCION_NUEVO    = "nuevo"
+ACCION_DENEGADO = "denegado"
 
-        origen  = rutas['origen']
-        destino = rutas['destino']
-        prefijo = rutas['prefijo']
+NOMBRE_PLAN = "PLAN_STAGING.json"
 
-        # Filtrar lista maestra solo para este ambiente
-        autorizados = {f for f in lista_maestra if f.lower().startswith(prefijo)}
-        log(f"    Archivos autorizados para este ambiente: {len(autorizados)}")
+
+def planificar(reglas):
+    """
+    Plan completo del staging: por ambiente, la lista ordenada de acciones
+    {accion, archivo, origen?, motivo?, copiar?}. Retorna un dict serializable.
+    """
+    plan = {"version": 1, "fecha": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "raiz": RAIZ, "ambientes": []}
+
+    for ambiente, rutas in AMBIENTES.items():
+        origen, destino, prefijo = rutas['origen'], rutas['destino'], rutas['prefijo']
+        autorizados = set(reglas.exactos(prefijo))
+        entrada = {"ambiente": ambiente, "origen": origen, "destino": destino, "prefijo": prefijo,
+                   "autorizados": len(autorizados), "omitido": None, "acciones": []}
+        plan["ambientes"].append(entrada)
+        acciones = entrada["acciones"]
 
         if not os.path.exists(origen):
-            log(f"    Carpeta origen no encontrada: {origen}", "WARN")
-            log(f"    Omitiendo ambiente {ambiente}")
+            entrada["omitido"] = f"Carpeta origen no encontrada: {origen}"
             continue
 
-        os.makedirs(destino, exist_ok=True)
-
-        # --- Limpiar archivos obsoletos del destino ---
-        archivos_en_destino = set(os.listdir(destino))
-        # Solo eliminar archivos .out, .sha256 y _out (no inventarios ni logs)
-        for fname in archivos_en_destino:
-            es_dato = (fname.endswith('.out') or fname.endswith('.sha256')
-                       or fname.endswith('_out'))
-            if es_dato and fname not in autorizados:
-                try:
-                    os.remove(os.path.join(destino, fname))
-                    log(f"    [ELIMINADO] {fname} (ya no está en lista maestra)", "WARN")
-                    resumen_total["eliminados"] += 1
-                except Exception as e:
-                    log(f"    [ERROR] No se pudo eliminar {fname}: {e}", "ERROR")
-
-        # --- Copiar archivos autorizados ---
-        mapa_origen       = construir_mapa_origen(origen)  # {nombre_lower: nombre_real}
-        autorizados_lower = {f.lower() for f in autorizados}
-        copiados          = 0
-        sin_cambios       = 0
-        no_encontrados    = []
-        nuevos_en_lista   = []
+        # Exactos -> nombre real en origen; luego los del origen cubiertos por patrones
+        mapa_origen = construir_mapa_origen(origen)  # {nombre_lower: nombre_real}
+        resueltos   = {fname: buscar_en_origen(fname, mapa_origen) for fname in autorizados}
+        resueltos_lower = {r.lower() for r in resueltos.values() if r}
+        for fname_lower, fname_real in mapa_origen.items():
+            if (fname_lower.startswith(prefijo) and fname_lower not in resueltos_lower
+                    and reglas.autorizado(prefijo, fname_real)):
+                resueltos[fname_real] = fname_real
+                resueltos_lower.add(fname_lower)
+                autorizados.add(fname_real)
+        entrada["autorizados"] = len(autorizados)
+
+        no_listados, denegados, por_confirmar = detectar_no_listados(
+            mapa_origen, resueltos_lower, reglas, prefijo, origen)
+
+        # Obsoletos del destino (solo volcados; no inventarios ni logs). Los de
+        # formato aun desconocido se confirman al aplicar, antes de borrarlos
+        if os.path.isdir(destino):
+            conservar = autorizados | set(no_listados) | set(por_confirmar)
+            for fname in sorted(os.listdir(destino)):
+                if fname in conservar or reglas.autorizado(prefijo, fname) or registro_parsers.es_artefacto_staging(fname):
+                    continue
+                volcado = es_volcado(destino, fname)
+                if volcado is not False:
+                    motivo = "denegado en lista maestra" if reglas.denegado(prefijo, fname) else "ya no está en lista maestra"
+                    acciones.append({"accion": ACCION_ELIMINAR, "archivo": fname, "motivo": motivo,
+                                     "confirmar": volcado is None})
 
         for fname in sorted(autorizados):
-            nombre_real = buscar_en_origen(fname, mapa_origen)
-
+            nombre_real = resueltos[fname]
             if nombre_real is None:
-                log(f"    [FALTA] {fname} — no existe en origen", "WARN")
-                no_encontrados.append(fname)
-                resumen_total["no_encontrados"] += 1
+                acciones.append({"accion": ACCION_FALTANTE, "archivo": fname})
                 continue
+            src = os.path.join(origen, nombre_real)
+            igual = mismo_contenido(src, os.path.join(destino, fname))
+            tam, mtime = _firma(src)
+            acciones.append({"accion": ACCION_OMITIR if igual else ACCION_COPIAR, "archivo": fname,
+                             "origen": nombre_real, "tam": tam, "mtime_ns": mtime})
+
+        for fname_real in denegados:
+            acciones.append({"accion": ACCION_DENEGADO, "archivo": fname_real})
+        for fname_real in sorted(no_listados + por_confirmar):
+            src = os.path.join(origen, fname_real)
+            tam, mtime = _firma(src)
+            acciones.append({"accion": ACCION_NUEVO, "archivo": fname_real, "origen": fname_real,
+                             "copiar": not mismo_contenido(src, os.path.join(destino, fname_real)),
+                             "tam": tam, "mtime_ns": mtime, "confirmar": fname_real in por_confirmar})
+    return plan
+
+
+def resumen_plan(plan):
+    """{ambiente: {accion: cantidad}} para mostrar el plan."""
+    resumen = {}
+    for entrada in plan["ambientes"]:
+        cuenta = resumen.setdefault(entrada["ambiente"], {})
+        for a in entrada["acciones"]:
+            accion = a["accion"] + (" (por confirmar)" if a.get("confirmar") else "")
+            cuenta[accion] = cuenta.get(accion, 0) + 1
+    return resumen
 
-            if nombre_real != fname:
-                log(f"    [~] {fname} -> encontrado como '{nombre_real}' (nombre diferente)")
 
-            src = os.path.join(origen, nombre_real)
-            dst = os.path.join(destino, fname)
+# ==========================
+# APLICACION DEL PLAN (lotes ordenados por carpeta, en paralelo)
+# ==========================
+def _ejecutar_copia(trabajo):
+    """(src, dst, clave_cache) -> (metodo, sha256, error)."""
+    src, dst, clave = trabajo
+    try:
+        metodo = materializar.copiar(src, dst)
+        _contar(bytes_copiados=os.path.getsize(dst))
+        with _lock_cache:
+            _metodos[metodo] = _metodos.get(metodo, 0) + 1
+        return metodo, hash_cacheado(dst, clave), None
+    except Exception as e:
+        return None, None, e
+
+
+def _vigente(accion, src):
+    """False si el origen cambio desde que se armo el plan (plan guardado y aplicado despues)."""
+    return os.path.exists(src) and _firma(src) == (accion["tam"], accion["mtime_ns"])
+
+
+def aplicar_plan(plan, resumen_total, hashes_staging):
+    """Ejecuta el plan ambiente por ambiente. Retorna los nombres nuevos para el journal."""
+    nuevos_total = []
 
+    for entrada in plan["ambientes"]:
+        ambiente, origen, prefijo = entrada["ambiente"], entrada["origen"], entrada["prefijo"]
+        log(f"\n>>> AMBIENTE: {ambiente}")
+        log(f"    Archivos autorizados para este ambiente: {entrada['autorizados']}")
+        if entrada["omitido"]:
+            log(f"    {entrada['omitido']}", "WARN")
+            log(f"    Omitiendo ambiente {ambiente}")
+            continue
+
+        destino = entrada["destino"]
+        materializar.recuperar(destino, log)
+        os.makedirs(destino, exist_ok=True)
+        errores_previos = resumen_total["errores"]
+        metodos         = {}
+
+        # Modo atomico: se trabaja sobre una copia enlazada y se publica al final
+        publicado = destino
+        if ATOMICO:
+            destino = materializar.preparar_arbol(destino)
+
+        # Archivos sin formato conocido al armar el plan: se leen ahora (solo la cabecera)
+        # y se descartan las acciones de los que no son volcados
+        acciones = [a for a in entrada["acciones"] if not a.get("confirmar") or confirmar_volcado(
+            os.path.join(origen, a["origen"]) if a["accion"] == ACCION_NUEVO else os.path.join(publicado, a["archivo"]))]
+
+        # Un plan guardado puede haber quedado viejo: lo que cambio se copia
+        for a in acciones:
+            if a["accion"] == ACCION_OMITIR and not _vigente(a, os.path.join(origen, a["origen"])):
+                a["accion"] = ACCION_COPIAR
+            elif a["accion"] == ACCION_NUEVO and not a["copiar"] \
+                    and not _vigente(a, os.path.join(origen, a["origen"])):
+                a["copiar"] = True
+
+        # --- Lote 1: eliminaciones ---
+        for a in acciones:
+            if a["accion"] != ACCION_ELIMINAR:
+                continue
             try:
-                if archivos_iguales(src, dst):
-                    log(f"    [=] {fname} — sin cambios")
-                    sin_cambios += 1
-                    resumen_total["sin_cambios"] += 1
-                else:
-                    shutil.copy2(src, dst)
-                    hash_val = calcular_sha256(dst)
-                    log(f"    [OK] {fname} — copiado (SHA256: {hash_val[:16]}...)")
-                    copiados += 1
-                    resumen_total["copiados"] += 1
+                os.remove(os.path.join(destino, a["archivo"]))
+                log(f"    [ELIMINADO] {a['archivo']} ({a['motivo']})", "WARN")
+                resumen_total["eliminados"] += 1
             except Exception as e:
-                log(f"    [ERROR] {fname}: {e}", "ERROR")
+                log(f"    [ERROR] No se pudo eliminar {a['archivo']}: {e}", "ERROR")
+
+        # --- Lote 2: copias, ordenadas por carpeta de origen y en paralelo ---
+        trabajos = [a for a in acciones
+                    if a["accion"] == ACCION_COPIAR or (a["accion"] == ACCION_NUEVO and a["copiar"])]
+        trabajos.sort(key=lambda a: (os.path.dirname(os.path.join(origen, a["origen"])), a["origen"]))
+        resultados = {}
+        with ThreadPoolExecutor(max_workers=HILOS) as pool:
+            for i in range(0, len(trabajos), TAM_LOTE):
+                lote = trabajos[i:i + TAM_LOTE]
+                args = [(os.path.join(origen, a["origen"]), os.path.join(destino, a["archivo"]),
+                         os.path.join(publicado, a["archivo"])) for a in lote]
+                for a, r in zip(lote, pool.map(_ejecutar_copia, args)):
+                    resultados[a["archivo"]] = r
+
+        # --- Log en el orden del plan ---
+        copiados, sin_cambios, no_encontrados, nuevos_en_lista = 0, 0, [], []
+        for a in acciones:
+            fname = a["archivo"]
+            if a["accion"] == ACCION_FALTANTE:
+                log(f"    [FALTA] {fname} — no existe en origen", "WARN")
+                no_encontrados.append(fname)
+                resumen_total["no_encontrados"] += 1
+                continue
+            if a["accion"] not in (ACCION_COPIAR, ACCION_OMITIR):
+                continue
+            if a["origen"] != fname:
+                log(f"    [~] {fname} -> encontrado como '{a['origen']}' (nombre diferente)")
+            if a["accion"] == ACCION_OMITIR:
+                log(f"    [=] {fname} — sin cambios")
+                sin_cambios += 1
+                resumen_total["sin_cambios"] += 1
+                continue
+            metodo, sha, error = resultados[fname]
+            if error:
+                log(f"    [ERROR] {fname}: {error}", "ERROR")
                 resumen_total["errores"] += 1
-
-        # --- Detectar y copiar archivos en origen que NO estan en lista_maestra ---
-        no_listados = detectar_no_listados(mapa_origen, autorizados_lower, prefijo)
-        if no_listados:
-            log(f"    [!] {len(no_listados)} archivos en origen SIN LISTAR — se copian y agregan a lista_maestra:", "WARN")
-            for fname_real in no_listados:
-                src = os.path.join(origen, fname_real)
-                dst = os.path.join(destino, fname_real)
-                try:
-                    if archivos_iguales(src, dst):
-                        log(f"    [=] {fname_real} — sin cambios (no listado)")
-                    else:
-                        shutil.copy2(src, dst)
-                        hash_val = calcular_sha256(dst)
-                        log(f"    [NEW] {fname_real} — copiado y AGREGADO a lista maestra (SHA256: {hash_val[:16]}...)", "WARN")
-                    nuevos_en_lista.append(fname_real)
-                    copiados += 1
-                    resumen_total["copiados"] += 1
-                except Exception as e:
-                    log(f"    [ERROR] {fname_real}: {e}", "ERROR")
+                continue
+            metodos[metodo] = metodos.get(metodo, 0) + 1
+            log(f"    [OK] {fname} — copiado (SHA256: {sha[:16]}...)")
+            copiados += 1
+            resumen_total["copiados"] += 1
+
+        for a in acciones:
+            if a["accion"] == ACCION_DENEGADO:
+                log(f"    [DENEGADO] {a['archivo']} — excluido por regla de lista maestra")
+        nuevos = [a for a in acciones if a["accion"] == ACCION_NUEVO]
+        if nuevos:
+            log(f"    [!] {len(nuevos)} archivos en origen SIN LISTAR — se copian y agregan a lista_maestra:", "WARN")
+        for a in nuevos:
+            fname = a["archivo"]
+            if not a["copiar"]:
+                log(f"    [=] {fname} — sin cambios (no listado)")
+            else:
+                metodo, sha, error = resultados[fname]
+                if error:
+                    log(f"    [ERROR] {fname}: {error}", "ERROR")
                     resumen_total["errores"] += 1
+                    continue
+                metodos[metodo] = metodos.get(metodo, 0) + 1
+                log(f"    [NEW] {fname} — copiado y AGREGADO a lista maestra (SHA256: {sha[:16]}...)", "WARN")
+            nuevos_en_lista.append(fname)
+            copiados += 1
+            resumen_total["copiados"] += 1
 
         # --- Inventario del ambiente ---
-        inv_path = os.path.join(destino, f"inventario_{prefijo}.txt")
+        en_destino = sorted(a["archivo"] for a in acciones if a["accion"] in (ACCION_COPIAR, ACCION_OMITIR))
+        en_destino = sorted(en_destino + nuevos_en_lista)
+        inv_path = os.path.join(destino, nombre_inventario(prefijo))
+        if os.path.exists(inv_path):
+            os.remove(inv_path)   # puede ser un enlace al arbol anterior: no escribir en sitio
         with open(inv_path, "w", encoding="utf-8") as inv:
             inv.write(f"INVENTARIO {ambiente} - {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
             inv.write("=" * 60 + "\n\n")
-            inv.write(f"Archivos en destino ({len(autorizados) - len(no_encontrados) + len(nuevos_en_lista)}):\n")
-            for fname in sorted(list(autorizados) + nuevos_en_lista):
+            inv.write(f"Archivos en destino ({len(en_destino)}):\n")
+            for fname in en_destino:
                 dst_check = os.path.join(destino, fname)
                 if os.path.exists(dst_check):
-                    h = calcular_sha256(dst_check)
+                    h = hash_cacheado(dst_check, os.path.join(publicado, fname))
+                    hashes_staging[os.path.join(publicado, fname)] = h
                     inv.write(f"  {fname} | SHA256: {h}\n")
             if no_encontrados:
                 inv.write(f"\nArchivos faltantes en origen ({len(no_encontrados)}):\n")
@@ -280,17 +570,126 @@ def ejecutar_staging_total():
                     inv.write(f"  [FALTA] {fname}\n")
 
         log(f"    Copiados: {copiados} | Sin cambios: {sin_cambios} | Faltantes: {len(no_encontrados)} | Nuevos: {len(nuevos_en_lista)}")
-        lista_maestra.extend(nuevos_en_lista)  # acumular para actualizar lista al final
-
-    # --- Actualizar lista_maestra.txt con archivos nuevos detectados ---
-    total_originales = sum(1 for l in open(RUTA_LISTA, encoding='utf-8') if l.strip())
-    nuevos_total = len(lista_maestra) - total_originales
-    if nuevos_total > 0:
-        log(f"\n  Actualizando lista_maestra.txt con {nuevos_total} archivos nuevos detectados...", "WARN")
-        with open(RUTA_LISTA, "w", encoding="utf-8") as f:
-            for fname in sorted(set(lista_maestra)):
-                f.write(fname + "\n")
-        log(f"  lista_maestra.txt actualizada: {len(set(lista_maestra))} archivos totales.")
+        if metodos:
+            log("    Metodo de copia: " + ", ".join(f"{m}: {n}" for m, n in sorted(metodos.items())))
+
+        if ATOMICO:
+            if resumen_total["errores"] > errores_previos:
+                materializar.descartar(destino)
+                log(f"    Hubo errores: se conserva {publicado} sin cambios", "WARN")
+            else:
+                materializar.intercambiar(destino, publicado)
+                log(f"    Destino publicado con intercambio atomico: {publicado}")
+        nuevos_total.extend(nuevos_en_lista)
+
+    return nuevos_total
+
+
+# ==========================
+# METRICAS (Prometheus textfile)
+# ==========================
+def escribir_metricas(m, resumen_total, nuevos_total):
+    est = _estadisticas
+    m.gauge("ejecucion_exitosa", resumen_total["errores"] == 0, "1 si el ultimo staging termino sin errores")
+    m.gauge("ultima_ejecucion_timestamp_segundos", round(time.time()), "Fin del ultimo staging (epoch)")
+    for accion, clave in (("copiado", "copiados"), ("sin_cambios", "sin_cambios"), ("eliminado", "eliminados"),
+                          ("faltante", "no_encontrados"), ("error", "errores")):
+        m.contador("archivos_total", resumen_total[clave], "Archivos por resultado", accion=accion)
+    m.contador("archivos_total", len(nuevos_total), accion="nuevo")
+    m.contador("bytes_copiados_total", est["bytes_copiados"], "Bytes copiados al destino")
+    for metodo, n in sorted(_metodos.items()):
+        m.contador("copias_por_metodo_total", n, "Copias segun el metodo usado (materializar.py)", metodo=metodo)
+    m.contador("archivos_hasheados_total", est["hasheados"], "Archivos leidos para calcular SHA256")
+    m.contador("bytes_hasheados_total", est["bytes_hasheados"], "Bytes leidos para calcular SHA256")
+    m.ratio("cache_ratio_aciertos", est["cache_aciertos"], est["cache_fallos"],
+            "Aciertos / consultas de la cache de hashes", cache="hashes")
+    try:
+        ruta = m.escribir(metricas.ruta_metricas(RAIZ, CARPETA_METRICAS, "staging"))
+        log(f"Metricas guardadas en: {ruta}")
+    except OSError as e:
+        log(f"No se pudieron guardar las metricas: {e}", "ERROR")
+
+
+# ==========================
+# PROCESO PRINCIPAL
+# ==========================
+def mostrar_plan(plan, ruta):
+    """--plan: guarda el plan en JSON y muestra el resumen por ambiente (sin tocar nada)."""
+    with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(plan, f, ensure_ascii=False, indent=1)
+    os.replace(ruta + ".tmp", ruta)
+    print("PLAN DE STAGING (sin cambios aplicados)")
+    print("-" * 60)
+    for ambiente, cuenta in resumen_plan(plan).items():
+        detalle = ", ".join(f"{a}: {n}" for a, n in sorted(cuenta.items())) or "sin acciones"
+        print(f"  {ambiente}: {detalle}")
+    for entrada in plan["ambientes"]:
+        if entrada["omitido"]:
+            print(f"  {entrada['ambiente']}: {entrada['omitido']}")
+    print(f"\nPlan guardado en: {ruta}")
+
+
+def ejecutar_staging_total():
+    """Staging completo y auditoria. Retorna el codigo de salida (0 = sin errores)."""
+
+    # Cargar lista maestra
+    if not os.path.exists(RUTA_LISTA):
+        print(f"No existe lista_maestra.txt en {RAIZ}")
+        return 1
+
+    m = metricas.Metricas("staging")
+    m.fase("lista_maestra")
+    reglas = reglas_lista.cargar(RUTA_LISTA, [r['prefijo'] for r in AMBIENTES.values()])
+    cargar_cache_hashes()
+
+    if PLAN_ARCHIVO is not None and not APLICAR_PLAN:
+        t0 = time.perf_counter()
+        plan = planificar(reglas)
+        mostrar_plan(plan, PLAN_ARCHIVO or os.path.join(RAIZ, NOMBRE_PLAN))
+        print(f"Plan calculado en {(time.perf_counter() - t0) * 1000:.0f} ms")
+        guardar_cache_hashes()
+        return 0
+
+    # Limpiar log anterior
+    if os.path.exists(ARCHIVO_LOG):
+        os.remove(ARCHIVO_LOG)
+
+    log("=" * 60)
+    log(f"  STAGING MULTI-AMBIENTE v3.0 - INICIO ({datetime.now().strftime('%d/%m/%Y')})")
+    log("=" * 60)
+    log(f"Lista maestra cargada: {reglas.total} reglas ({len(reglas.journal)} desde el journal)")
+
+    m.fase("plan")
+    if APLICAR_PLAN:
+        with open(APLICAR_PLAN, "r", encoding="utf-8") as f:
+            plan = json.load(f)
+        log(f"Aplicando plan guardado: {APLICAR_PLAN} (armado {plan['fecha']})")
+    else:
+        plan = planificar(reglas)
+
+    resumen_total = {"copiados": 0, "sin_cambios": 0, "eliminados": 0,
+                     "no_encontrados": 0, "errores": 0}
+    hashes_staging = {}   # {ruta publicada: sha256} para la instantanea del almacen
+
+    m.fase("aplicacion")
+    nuevos_total = aplicar_plan(plan, resumen_total, hashes_staging)
+    guardar_cache_hashes()
+    m.fase("journal")
+
+    # --- Registrar archivos nuevos en el journal de la lista maestra ---
+    if nuevos_total:
+        reglas_lista.anotar(RUTA_LISTA, nuevos_total)
+        log(f"\n  {len(nuevos_total)} archivos nuevos agregados a {os.path.basename(reglas_lista.ruta_journal(RUTA_LISTA))}", "WARN")
+    compactados = reglas_lista.compactar_si_corresponde(RUTA_LISTA)
+    if compactados:
+        log(f"  Journal compactado: {compactados} nombres incorporados a lista_maestra.txt")
+
+    # --- Indice invertido de certificados (solo archivos nuevos o modificados) ---
+    m.fase("indice")
+    try:
+        indice_invertido.actualizar(RAIZ, AMBIENTES, log=log)
+    except Exception as e:
+        log(f"No se pudo actualizar el indice de certificados: {e}", "ERROR")
 
     # --- Resumen final ---
     log("\n" + "=" * 60)
@@ -300,18 +699,26 @@ def ejecutar_staging_total():
     log(f"  Sin cambios:            {resumen_total['sin_cambios']}")
     log(f"  Eliminados (obsoletos): {resumen_total['eliminados']}")
     log(f"  No encontrados:         {resumen_total['no_encontrados']}")
-    log(f"  Nuevos en lista:        {nuevos_total}")
+    log(f"  Nuevos en lista:        {len(nuevos_total)}")
     log(f"  Errores:                {resumen_total['errores']}")
+    escribir_metricas(m, resumen_total, nuevos_total)
 
     if resumen_total["errores"] > 0:
         log("\n  ATENCION: Hubo errores durante el proceso. Revisa el log.", "WARN")
         log("  No se ejecutara la auditoria automaticamente.", "WARN")
-        return
+        return 1
+
+    # --- Instantanea en el almacen por contenido ---
+    if INSTANTANEA:
+        try:
+            almacen.tomar_instantanea(RAIZ, etiqueta="staging", hashes=hashes_staging, log=log)
+        except Exception as e:
+            log(f"No se pudo guardar la instantanea: {e}", "ERROR")
 
     # --- Lanzar auditoría automáticamente ---
     if SIN_AUDITORIA:
         log("Opcion --no-auditoria activa: se omite el proceso de auditoria.")
-        return
+        return 0
 
     log("\n" + "=" * 60)
     log("  LANZANDO PROCESO DE AUDITORIA...")
@@ -319,11 +726,12 @@ def ejecutar_staging_total():
 
     if not os.path.exists(SCRIPT_AUDITORIA):
         log(f"Script de auditoria no encontrado: {SCRIPT_AUDITORIA}", "ERROR")
-        return
+        return 1
 
+    codigo = 0
     try:
         resultado = subprocess.run(
-            ["python", SCRIPT_AUDITORIA],
+            [sys.executable, SCRIPT_AUDITORIA, "auditar", "--raiz", RAIZ],
             capture_output=True, text=True
         )
         if resultado.returncode == 0:
@@ -332,14 +740,23 @@ def ejecutar_staging_total():
             log("La auditoria termino con errores:", "ERROR")
             if resultado.stderr:
                 log(resultado.stderr.strip(), "ERROR")
+            codigo = resultado.returncode
     except Exception as e:
         log(f"No se pudo lanzar la auditoria: {e}", "ERROR")
+        codigo = 1
 
     log("\n>>> PROCESO COMPLETO <<<")
+    return codigo
+
+
+def main(argv=None):
+    configurar(parse_args(argv))
+    return ejecutar_staging_total()
 
 
 if __name__ == "__main__":
-    ejecutar_staging_total()
+    codigo = main()
     print("\n============================================")
     print("  Proceso Finalizado. Presiona una tecla...")
-    input()
\ No newline at end of file
+    input()
+    raise SystemExit(codigo)
\ No newline at end of file
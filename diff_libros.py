@@ -0,0 +1,322 @@
+"""
+DIFERENCIAS ENTRE LIBROS MENSUALES v1.0
+- Compara dos libros COMBMAN (mes anterior vs mes actual) leyendolos en modo
+  read-only, fila a fila, sin armar el modelo de celdas en memoria
+- Cada fila relevante se identifica por (hoja, seccion, alias) y se resume
+  en un hash de sus columnas de interes (fingerprint, serial, vencimiento);
+  del libro anterior solo se guardan esos hashes y los valores de la fila
+- Salida solo con lo que cambio: filas agregadas, eliminadas y modificadas,
+  en consola, JSON o HTML
+- Sin archivos indicados compara los dos COMBMAN mas recientes de RAIZ
+  (segun el mes y anio del nombre)
+
+Uso:
+  python procesar.py diff [ANTERIOR ACTUAL] [--raiz ...] [--formato consola|json|html] [--salida RUTA]
+Codigo de salida 1 si hay diferencias.
+"""
+
+import os
+import re
+import json
+import hashlib
+import argparse
+from datetime import datetime, date
+
+from openpyxl import load_workbook
+
+import ambientes
+from alias_libro import es_alias_valido
+from fechas import MESES_ES
+
+
+TIPO_AGREGADO   = "agregado"
+TIPO_ELIMINADO  = "eliminado"
+TIPO_MODIFICADO = "modificado"
+
+FORMATOS_SALIDA = ("consola", "json", "html")
+
+_RE_SECCION  = re.compile(r"^(\d+)\.-")
+_RE_COMBMAN  = re.compile(r"^COMBMAN\..*- (\w+) (\d{4})\.xlsx$", re.IGNORECASE)
+_SEPARADOR   = "\x1f"
+
+
+# ==========================
+# NORMALIZACION
+# ==========================
+def _texto(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return " ".join(str(valor).split())
+
+
+def _digest(campos):
+    return hashlib.blake2b(_SEPARADOR.join(f"{k}={v}" for k, v in campos).encode("utf-8"), digest_size=16).digest()
+
+
+# ==========================
+# FILAS RELEVANTES POR TIPO DE HOJA
+# ==========================
+def _filas_was(filas):
+    """(seccion, alias, campos) de una hoja WAS (signer: E/F, personal: F/G)."""
+    seccion, personal = "", False
+    for fila in filas:
+        col_a, col_b, col_c = (list(fila[:3]) + [None] * 3)[:3]
+        if col_a and _RE_SECCION.match(str(col_a).strip()):
+            seccion  = f"{_texto(col_a)} {_texto(col_b)}".strip()
+            personal = False
+            continue
+        if col_b and "# personal certificates" in str(col_b).lower():
+            personal = True
+            continue
+        if not es_alias_valido(col_c):
+            continue
+        alias = _texto(col_c)
+        fila = list(fila[:7]) + [None] * (7 - len(fila[:7]))
+        if personal:
+            yield f"{seccion} (personal)", alias, (("serial", _texto(fila[5])), ("vencimiento", _texto(fila[6])))
+        else:
+            yield seccion, alias, (("fingerprint", _texto(fila[4])), ("vencimiento", _texto(fila[5])))
+
+
+def _filas_aipac(filas):
+    """(keystore, alias, campos) de una hoja AIPAC (serial J, vencimiento K)."""
+    seccion, alias = "", ""
+    cadena = 0
+    for fila in filas:
+        fila  = list(fila[:11]) + [None] * (11 - len(fila[:11]))
+        col_b = _texto(fila[1])
+        if fila[0] and _RE_SECCION.match(str(fila[0]).strip()):
+            seccion, alias = f"{_texto(fila[0])} {col_b.split(',')[0]}".strip(), ""
+            continue
+        actual = _texto(fila[2])
+        if es_alias_valido(actual):
+            alias, cadena = actual, 0
+            etiqueta = alias
+        elif not actual and alias and (fila[9] or fila[10]):
+            cadena  += 1   # certificado siguiente de la cadena del mismo alias
+            etiqueta = f"{alias} [cadena {cadena}]"
+        else:
+            continue
+        yield seccion, etiqueta, (("owner", _texto(fila[7])), ("serial", _texto(fila[9])),
+                                  ("vencimiento", _texto(fila[10])))
+
+
+def _filas_plug(filas):
+    """(\"\", ruta, (hash,)) de una hoja COMP.PLUG.WAS (ruta en A, hash en B)."""
+    for fila in filas:
+        ruta = _texto(fila[0] if fila else None)
+        if not ruta or len(fila) < 2 or fila[1] is None:
+            continue
+        yield "", ruta, (("hash", _texto(fila[1])),)
+
+
+def _filas_generica(filas):
+    """Otras hojas: la primera celda con valor es la clave, el resto son los campos."""
+    for fila in filas:
+        valores = [_texto(v) for v in fila]
+        if not any(valores):
+            continue
+        i = next(i for i, v in enumerate(valores) if v)
+        yield "", valores[i], tuple((f"col{j + 1}", v) for j, v in enumerate(valores) if j > i)
+
+
+_EXTRACTORES = {
+    ambientes.TIPO_WAS:   _filas_was,
+    ambientes.TIPO_AIPAC: _filas_aipac,
+    ambientes.TIPO_PLUG:  _filas_plug,
+}
+
+
+def filas_libro(ruta):
+    """
+    Recorre el libro en modo read-only y entrega ((hoja, seccion, alias, n), campos)
+    por cada fila relevante. 'n' distingue alias repetidos en la misma seccion.
+    """
+    wb = load_workbook(ruta, read_only=True, data_only=False)
+    try:
+        for ws in wb.worksheets:
+            extraer = _EXTRACTORES.get(ambientes.tipo_hoja(ws.title), _filas_generica)
+            vistos  = {}
+            for seccion, alias, campos in extraer(ws.iter_rows(values_only=True)):
+                base = (ws.title, seccion, alias)
+                n = vistos[base] = vistos.get(base, 0) + 1
+                yield base + (n,), campos
+    finally:
+        wb.close()
+
+
+# ==========================
+# COMPARACION
+# ==========================
+def comparar(anterior, actual):
+    """
+    Un solo recorrido por libro: el anterior deja un indice clave -> (hash, campos);
+    el actual consume ese indice a medida que avanza. Lo que queda sin consumir
+    son las filas eliminadas. Retorna (cambios, resumen).
+    """
+    indice = {}
+    for clave, campos in filas_libro(anterior):
+        indice[clave] = (_digest(campos), campos)
+    filas_anterior = len(indice)
+
+    cambios, filas_actual = [], 0
+    for clave, campos in filas_libro(actual):
+        filas_actual += 1
+        previo = indice.pop(clave, None)
+        if previo is None:
+            cambios.append(_cambio(TIPO_AGREGADO, clave, None, campos))
+        elif previo[0] != _digest(campos):
+            cambios.append(_cambio(TIPO_MODIFICADO, clave, previo[1], campos))
+    for clave, (_, campos) in indice.items():
+        cambios.append(_cambio(TIPO_ELIMINADO, clave, campos, None))
+
+    resumen = {
+        "anterior":       anterior,
+        "actual":         actual,
+        "filas_anterior": filas_anterior,
+        "filas_actual":   filas_actual,
+        TIPO_AGREGADO:    sum(1 for c in cambios if c["tipo"] == TIPO_AGREGADO),
+        TIPO_ELIMINADO:   sum(1 for c in cambios if c["tipo"] == TIPO_ELIMINADO),
+        TIPO_MODIFICADO:  sum(1 for c in cambios if c["tipo"] == TIPO_MODIFICADO),
+    }
+    return cambios, resumen
+
+
+def _cambio(tipo, clave, antes, despues):
+    hoja, seccion, alias, n = clave
+    return {
+        "tipo":    tipo,
+        "hoja":    hoja,
+        "seccion": seccion,
+        "alias":   alias if n == 1 else f"{alias} #{n}",
+        "antes":   dict(antes) if antes else None,
+        "despues": dict(despues) if despues else None,
+    }
+
+
+def _campos_distintos(cambio):
+    antes, despues = cambio["antes"] or {}, cambio["despues"] or {}
+    return [(k, antes.get(k, ""), despues.get(k, "")) for k in dict.fromkeys(list(antes) + list(despues))
+            if antes.get(k, "") != despues.get(k, "")]
+
+
+# ==========================
+# SALIDAS
+# ==========================
+def texto_consola(cambios, resumen):
+    lineas = [f"Anterior: {resumen['anterior']}", f"Actual:   {resumen['actual']}", ""]
+    marcas = {TIPO_AGREGADO: "+", TIPO_ELIMINADO: "-", TIPO_MODIFICADO: "~"}
+    for c in cambios:
+        ubicacion = " | ".join(p for p in (c["hoja"], c["seccion"], c["alias"]) if p)
+        lineas.append(f"[{marcas[c['tipo']]}] {ubicacion}")
+        if c["tipo"] == TIPO_MODIFICADO:
+            for campo, antes, despues in _campos_distintos(c):
+                lineas.append(f"      {campo}: {antes or '(vacio)'} -> {despues or '(vacio)'}")
+        else:
+            for campo, valor in (c["despues"] or c["antes"]).items():
+                if valor:
+                    lineas.append(f"      {campo}: {valor}")
+    lineas.append("")
+    lineas.append(f"Filas: {resumen['filas_anterior']} -> {resumen['filas_actual']} | "
+                  f"Agregadas: {resumen[TIPO_AGREGADO]} | Eliminadas: {resumen[TIPO_ELIMINADO]} | "
+                  f"Modificadas: {resumen[TIPO_MODIFICADO]}")
+    return "\n".join(lineas) + "\n"
+
+
+def texto_json(cambios, resumen):
+    return json.dumps({"resumen": resumen, "cambios": cambios}, ensure_ascii=False, indent=1) + "\n"
+
+
+_CSS = """
+body{font-family:Segoe UI,Arial,sans-serif;margin:24px;color:#222}
+table{border-collapse:collapse;width:100%;font-size:13px}
+th,td{border:1px solid #ccc;padding:4px 8px;text-align:left;vertical-align:top}
+th{background:#1f3864;color:#fff}
+tr.agregado td:first-child{background:#c6efce}
+tr.eliminado td:first-child{background:#ffc7ce}
+tr.modificado td:first-child{background:#ffeb9c}
+del{color:#9c0006}ins{color:#006100;text-decoration:none}
+"""
+
+
+def texto_html(cambios, resumen):
+    from html import escape
+
+    partes = ['<!DOCTYPE html>\n<html lang="es">\n<head>\n<meta charset="UTF-8">\n',
+              f"<title>Diferencias entre libros</title>\n<style>{_CSS}</style>\n</head>\n<body>\n",
+              "<h2>Diferencias entre libros</h2>\n",
+              f"<p>Anterior: {escape(os.path.basename(resumen['anterior']))}<br>"
+              f"Actual: {escape(os.path.basename(resumen['actual']))}</p>\n",
+              f"<p>Filas: {resumen['filas_anterior']} &rarr; {resumen['filas_actual']} | "
+              f"Agregadas: {resumen[TIPO_AGREGADO]} | Eliminadas: {resumen[TIPO_ELIMINADO]} | "
+              f"Modificadas: {resumen[TIPO_MODIFICADO]}</p>\n",
+              "<table>\n<tr><th>Cambio</th><th>Hoja</th><th>Seccion</th><th>Alias</th><th>Detalle</th></tr>\n"]
+    for c in cambios:
+        if c["tipo"] == TIPO_MODIFICADO:
+            detalle = "<br>".join(f"{escape(k)}: <del>{escape(a)}</del> &rarr; <ins>{escape(d)}</ins>"
+                                  for k, a, d in _campos_distintos(c))
+        else:
+            detalle = "<br>".join(f"{escape(k)}: {escape(v)}" for k, v in (c["despues"] or c["antes"]).items() if v)
+        partes.append(f'<tr class="{c["tipo"]}"><td>{c["tipo"]}</td><td>{escape(c["hoja"])}</td>'
+                      f'<td>{escape(c["seccion"])}</td><td>{escape(c["alias"])}</td><td>{detalle}</td></tr>\n')
+    partes.append("</table>\n</body>\n</html>\n")
+    return "".join(partes)
+
+
+_GENERADORES = {"consola": texto_consola, "json": texto_json, "html": texto_html}
+
+
+# ==========================
+# LIBROS DE RAIZ
+# ==========================
+def libros_mensuales(raiz):
+    """Rutas de los COMBMAN de RAIZ ordenadas por (anio, mes) del nombre."""
+    encontrados = []
+    for nombre in os.listdir(raiz):
+        m = _RE_COMBMAN.match(nombre)
+        if m and m.group(1).lower() in MESES_ES:
+            encontrados.append(((int(m.group(2)), MESES_ES[m.group(1).lower()]), os.path.join(raiz, nombre)))
+    return [ruta for _, ruta in sorted(encontrados)]
+
+
+# ==========================
+# CLI
+# ==========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="procesar.py diff",
+                                     description="Filas agregadas, eliminadas y modificadas entre dos libros")
+    parser.add_argument("libros", nargs="*", metavar="LIBRO",
+                        help="ANTERIOR ACTUAL (default: los dos COMBMAN mas recientes de RAIZ)")
+    parser.add_argument("--raiz", default=r"C:\Automatizacion_Excel", help="Carpeta raiz del proyecto")
+    parser.add_argument("--formato", choices=FORMATOS_SALIDA, default="consola")
+    parser.add_argument("--salida", default=None, help="Archivo de salida (default: consola)")
+    args = parser.parse_args(argv)
+
+    if args.libros and len(args.libros) != 2:
+        parser.error("se esperan dos libros: ANTERIOR ACTUAL")
+    libros = args.libros or libros_mensuales(args.raiz)[-2:]
+    if len(libros) != 2:
+        print(f"Se necesitan dos libros COMBMAN en {args.raiz} (encontrados: {len(libros)})")
+        return 2
+    for ruta in libros:
+        if not os.path.exists(ruta):
+            print(f"No existe el libro: {ruta}")
+            return 2
+
+    cambios, resumen = comparar(*libros)
+    texto = _GENERADORES[args.formato](cambios, resumen)
+    if args.salida:
+        tmp = args.salida + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(texto)
+        os.replace(tmp, args.salida)
+        print(f"Diferencias guardadas en: {args.salida} ({len(cambios)} filas)")
+    else:
+        print(texto, end="")
+    return 1 if cambios else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
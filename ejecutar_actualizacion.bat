@@ -29,7 +29,7 @@ echo.
 :: Ejecutar el script principal
 echo   Iniciando procesamiento...
 echo.
-python "procesar.py" %*
+python "procesar.py" coordinar ejecutar %*
 set RESULTADO=%errorlevel%
 
 echo.
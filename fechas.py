@@ -0,0 +1,132 @@
+"""
+PARSEO DE FECHAS DE VENCIMIENTO
+- Formatos del Excel (ingles/espanol, keytool 'until:', ISO)
+- Formato GSKit 'Not After : November 9, 2031 8:00:00 PM GMT-04:00' y fecha
+  keytool suelta '10/21/27 7:42 AM' (campo not_after del registro de parsers)
+- Celdas que ya son fecha de Excel (datetime / date de openpyxl) se usan tal cual
+- Sin dependencias pesadas: usable desde los chequeos rapidos
+"""
+
+import re
+from datetime import date, datetime
+
+
+# ==========================
+# PARSEO DE FECHAS
+# ==========================
+MESES_ES = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4,
+    "mayo": 5, "junio": 6, "julio": 7, "agosto": 8,
+    "septiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12
+}
+MESES_EN = {
+    "january": 1, "february": 2, "march": 3, "april": 4,
+    "may": 5, "june": 6, "july": 7, "august": 8,
+    "september": 9, "october": 10, "november": 11, "december": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4,
+    "jun": 6, "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+    "mary": 5   # typo comun en el excel
+}
+MESES = {**MESES_ES, **MESES_EN}
+
+
+def extraer_fecha_vencimiento(texto):
+    """
+    Extrae la fecha de vencimiento de strings como:
+      'Valid from May 18, 2025 to May 18, 2026.'
+      'Valid from 18 Mayo 2025, to  18 Mayo 2026'
+      '10/26/07 7:42 AM until: 10/21/27 7:42 AM'
+      'Valid from may 2025, to May 14 2040'
+      '2026-05-18'  (ISO)
+    Retorna un objeto date o None.
+    """
+    if not texto:
+        return None
+    if isinstance(texto, datetime):   # celda con fecha real (modo --formato-condicional)
+        return texto.date()
+    if isinstance(texto, date):
+        return texto
+    texto = str(texto).strip()
+
+    # Formato ISO: YYYY-MM-DD (agregado en v5.0)
+    m = re.match(r"^(\d{4})-(\d{2})-(\d{2})$", texto)
+    if m:
+        try:
+            return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        except Exception:
+            pass
+
+    # Formato: MM/DD/YY ... until: MM/DD/YY
+    m = re.search(r"until:\s*(\d{1,2})/(\d{1,2})/(\d{2,4})", texto, re.IGNORECASE)
+    if m:
+        mes, dia, anio = int(m.group(1)), int(m.group(2)), int(m.group(3))
+        if anio < 100:
+            anio += 2000
+        try:
+            return date(anio, mes, dia)
+        except Exception:
+            pass
+
+    # Formato: "to Month DD, YYYY" o "to DD Month YYYY"
+    patrones_fin = [
+        r"to\s+(\w+)\s+(\d{1,2}),?\s+(\d{4})",    # to May 18, 2026
+        r"to\s+(\d{1,2})\s+(\w+)\s+(\d{4})",       # to 18 Mayo 2026
+        r"to\s+(\w+)\s+(\d{1,2})\s+(\d{4})",       # to May 18 2026
+        r"to\s+(\w+)\s+(\d{4})",                    # to May 2040 (sin dia)
+    ]
+
+    for patron in patrones_fin:
+        m = re.search(patron, texto, re.IGNORECASE)
+        if m:
+            g1, g2, g3 = m.group(1).strip(), m.group(2).strip(), m.group(3).strip()
+
+            # Intentar "to Mes Dia Anio"
+            if g1.lower() in MESES:
+                mes = MESES[g1.lower()]
+                try:
+                    dia  = int(g2)
+                    anio = int(g3)
+                    return date(anio, mes, dia)
+                except Exception:
+                    pass
+
+            # Intentar "to Dia Mes Anio"
+            if g2.lower() in MESES:
+                try:
+                    dia  = int(g1)
+                    mes  = MESES[g2.lower()]
+                    anio = int(g3)
+                    return date(anio, mes, dia)
+                except Exception:
+                    pass
+
+    # Formato: "December 31, 2028" al final
+    m = re.search(r"(\w+)\s+(\d{1,2}),?\s+(\d{4})\s*[.\s]*$", texto, re.IGNORECASE)
+    if m:
+        mes_str = m.group(1).lower()
+        if mes_str in MESES:
+            try:
+                return date(int(m.group(3)), MESES[mes_str], int(m.group(2)))
+            except Exception:
+                pass
+
+    # Formato GSKit: "November 9, 2031 8:00:00 PM GMT-04:00"
+    m = re.match(r"^(\w+)\s+(\d{1,2}),\s+(\d{4})\s+\d{1,2}:\d{2}", texto)
+    if m and m.group(1).lower() in MESES:
+        try:
+            return date(int(m.group(3)), MESES[m.group(1).lower()], int(m.group(2)))
+        except Exception:
+            pass
+
+    # Formato keytool sin 'until:' (campo not_after del registro): "10/21/27 7:42 AM"
+    m = re.match(r"^(\d{1,2})/(\d{1,2})/(\d{2,4})\s+\d{1,2}:\d{2}", texto)
+    if m:
+        mes, dia, anio = int(m.group(1)), int(m.group(2)), int(m.group(3))
+        if anio < 100:
+            anio += 2000
+        try:
+            return date(anio, mes, dia)
+        except Exception:
+            pass
+
+    return None
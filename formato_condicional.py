@@ -0,0 +1,110 @@
+"""
+FORMATO CONDICIONAL DE VENCIMIENTOS v1.0
+- En lugar de un relleno fijo por celda (rojo / amarillo calculado el dia de
+  la auditoria), dos reglas por rango atadas a HOY(): el color sigue siendo
+  correcto los dias siguientes sin volver a auditar ni guardar
+- Celdas de vencimiento (F / G en WAS, K en AIPAC) normalizadas a fecha real
+  de Excel; un solo bloque por hoja con las dos reglas y un sqref de varios
+  rangos (tramos contiguos por columna separados por espacio) que cubre solo
+  esas celdas, nunca los seriales que comparten la columna F
+- Las reglas propias se reconocen por su formula: al auditar el libro del mes
+  anterior se reemplazan en lugar de acumularse
+- Misma definicion para el libro en memoria (openpyxl) y para el parche XML
+  (parche_xlsx.py)
+"""
+
+import re
+
+
+COLOR_VENCIDO    = "FF0000"     # mismos colores que FILL_VENCIDO / FILL_PROXIMO
+COLOR_PROXIMO    = "FFFF00"
+FORMATO_FECHA    = "mm-dd-yy"   # numFmtId 14: fecha corta segun la configuracion regional de Excel
+ID_FORMATO_FECHA = 14
+
+_RE_REF     = re.compile(r"^([A-Z]+)(\d+)$")
+_RE_PROPIA  = re.compile(r"^AND\(ISNUMBER\(([A-Z]+\d+)\),\1(?:<TODAY\(\)|>=TODAY\(\),\1-TODAY\(\)<=\d+)\)$")
+
+
+# ==========================
+# RANGOS Y FORMULAS
+# ==========================
+def rangos(coordenadas):
+    """['F3', 'F4', 'F5', 'G2'] -> ['F3:F5', 'G2'] (tramos contiguos por columna, en el orden de openpyxl)."""
+    por_columna = {}
+    for coord in coordenadas:
+        m = _RE_REF.match(coord)
+        por_columna.setdefault(m.group(1), set()).add(int(m.group(2)))
+    resultado = []
+    for col in sorted(por_columna, key=lambda c: (len(c), c)):
+        filas = sorted(por_columna[col])
+        inicio = previa = filas[0]
+        for fila in filas[1:] + [None]:
+            if fila is not None and fila == previa + 1:
+                previa = fila
+                continue
+            resultado.append(f"{col}{inicio}" if inicio == previa else f"{col}{inicio}:{col}{previa}")
+            inicio = previa = fila
+    return resultado
+
+
+def sqref(rangos_hoja):
+    """Rangos de la hoja como un solo sqref: 'F3:F5 G9 K2:K4'."""
+    return " ".join(rangos_hoja)
+
+
+def esquina(rangos_hoja):
+    """Celda superior izquierda del area que abarca todos los rangos ('F3:F5 G2' -> 'F2')."""
+    refs = [_RE_REF.match(ref).groups() for r in rangos_hoja for ref in r.split(":")]
+    columna = min((c for c, _ in refs), key=lambda c: (len(c), c))
+    return f"{columna}{min(int(f) for _, f in refs)}"
+
+
+def formulas(rangos_hoja, dias):
+    """(vencido, proximo) relativas a la esquina superior izquierda del sqref, como las evalua Excel."""
+    c = esquina(rangos_hoja)
+    return (f"AND(ISNUMBER({c}),{c}<TODAY())",
+            f"AND(ISNUMBER({c}),{c}>=TODAY(),{c}-TODAY()<={dias})")
+
+
+def es_regla_propia(formula):
+    return bool(_RE_PROPIA.match(str(formula).strip().lstrip("=")))
+
+
+# ==========================
+# LIBRO EN MEMORIA (openpyxl)
+# ==========================
+def instalar(ws, rangos_hoja, dias):
+    """Reemplaza las reglas propias de la hoja por las de 'rangos_hoja' (las ajenas se conservan)."""
+    from openpyxl.formatting.formatting import ConditionalFormattingList
+    from openpyxl.formatting.rule import FormulaRule
+    from openpyxl.styles import PatternFill
+
+    nuevas = ConditionalFormattingList()
+    for cf in ws.conditional_formatting:
+        for regla in cf.rules:
+            if not any(es_regla_propia(f) for f in (regla.formula or ())):
+                nuevas.add(str(cf.sqref), regla)
+
+    if rangos_hoja:
+        vencido, proximo = formulas(rangos_hoja, dias)
+        for formula, color in ((vencido, COLOR_VENCIDO), (proximo, COLOR_PROXIMO)):
+            relleno = PatternFill(start_color=color, end_color=color, fill_type="solid")
+            nuevas.add(sqref(rangos_hoja), FormulaRule(formula=[formula], fill=relleno, stopIfTrue=True))
+    ws.conditional_formatting = nuevas
+
+
+# ==========================
+# PARCHE XML
+# ==========================
+def xml_reglas(rangos_hoja, dias, dxf_vencido, dxf_proximo, prioridad):
+    """Elemento <conditionalFormatting> de la hoja (un sqref con todos los rangos), prioridades desde 'prioridad'."""
+    from html import escape
+    if not rangos_hoja:
+        return ""
+    vencido, proximo = formulas(rangos_hoja, dias)
+    return (f'<conditionalFormatting sqref="{sqref(rangos_hoja)}">'
+            f'<cfRule type="expression" dxfId="{dxf_vencido}" priority="{prioridad}" stopIfTrue="1">'
+            f'<formula>{escape(vencido, quote=False)}</formula></cfRule>'
+            f'<cfRule type="expression" dxfId="{dxf_proximo}" priority="{prioridad + 1}" stopIfTrue="1">'
+            f'<formula>{escape(proximo, quote=False)}</formula></cfRule>'
+            f'</conditionalFormatting>')
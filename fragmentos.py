@@ -0,0 +1,276 @@
+"""
+MODO FRAGMENTOS v1.0
+- exportar: una unidad de trabajo autocontenida por ambiente (mini RAIZ con
+  PROCESADOS/<AMB>, libro con solo las hojas del ambiente, ambientes.json y
+  UNIDAD.json)
+- auditar: corre la auditoria normal sobre una o varias unidades, en este u
+  otro equipo, y deja RESULTADO.json en cada una
+- fusionar: aplica los cambios de celda de todas las unidades sobre el libro
+  original (parche_xlsx) y genera un unico LOG_PROCESAMIENTO, LOG_VENCIMIENTOS
+  y reporte HTML
+- Orden determinista: unidades, alertas y cambios se ordenan por la posicion
+  de la hoja en el libro original, sin importar cuantas unidades haya ni en
+  que orden terminaron
+
+Uso:
+  python procesar.py fragmentos exportar [--raiz ...] [--salida DIR]
+  python procesar.py fragmentos auditar DIR_UNIDAD [DIR_UNIDAD ...]
+  python procesar.py fragmentos fusionar [--raiz ...] [--unidades DIR]
+"""
+
+import os
+import json
+import shutil
+import argparse
+from datetime import datetime, date
+
+import ambientes
+
+
+NOMBRE_UNIDAD    = "UNIDAD.json"
+NOMBRE_RESULTADO = "RESULTADO.json"
+CARPETA_DEFAULT  = "FRAGMENTOS"
+
+
+# ==========================
+# LOG
+# ==========================
+_archivo_log = None
+
+
+def log(msg, nivel="INFO"):
+    ts    = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    linea = f"[{ts}] [{nivel}] {msg}"
+    print(linea)
+    if _archivo_log:
+        with open(_archivo_log, "a", encoding="utf-8") as f:
+            f.write(linea + "\n")
+
+
+def _escribir_json(ruta, datos):
+    tmp = ruta + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(tmp, ruta)
+
+
+def _leer_json(ruta):
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ==========================
+# EXPORTAR UNIDADES
+# ==========================
+def _proyectar_libro(excel_in, excel_out, hojas):
+    """Copia del libro dejando solo las hojas indicadas."""
+    from openpyxl import load_workbook
+    wb = load_workbook(excel_in)
+    for nombre in list(wb.sheetnames):
+        if nombre not in hojas:
+            wb.remove(wb[nombre])
+    wb.save(excel_out)
+
+
+def exportar(raiz, salida, dias_alerta=90, nombres=None):
+    """Una carpeta por ambiente en 'salida'. Retorna la lista de unidades creadas."""
+    excel_in = os.path.join(raiz, "REPORTE_AUDITORIA.xlsx")
+    hojas    = ambientes.hojas_libro(excel_in)
+    if not hojas:
+        raise FileNotFoundError(f"No se encontro el libro: {excel_in}")
+    rutas = ambientes.filtrar(ambientes.descubrir(raiz, hojas), nombres)
+    tabla = ambientes.tabla_ruteo(hojas, rutas)
+
+    os.makedirs(salida, exist_ok=True)
+    unidades = []
+    for amb, rutas_amb in rutas.items():
+        hojas_amb = [h for h in hojas if h in tabla and tabla[h]["ambiente"] == amb]
+        if not hojas_amb:
+            log(f"  {amb}: sin hojas en el libro, no se exporta", "WARN")
+            continue
+
+        carpeta = os.path.join(salida, amb)
+        if os.path.exists(carpeta):
+            shutil.rmtree(carpeta)
+        destino = os.path.join(carpeta, "PROCESADOS", amb)
+        if os.path.isdir(rutas_amb["destino"]):
+            shutil.copytree(rutas_amb["destino"], destino)
+        else:
+            os.makedirs(destino)
+        _proyectar_libro(excel_in, os.path.join(carpeta, "REPORTE_AUDITORIA.xlsx"), hojas_amb)
+
+        # Ruteo fijo dentro de la unidad: mismas hojas -> mismo ambiente
+        _escribir_json(os.path.join(carpeta, ambientes.NOMBRE_CONFIG), {
+            "ambientes": {amb: {"destino": os.path.join("PROCESADOS", amb), "hojas": hojas_amb}},
+        })
+        _escribir_json(os.path.join(carpeta, NOMBRE_UNIDAD), {
+            "version":     1,
+            "ambiente":    amb,
+            "hojas":       hojas_amb,
+            "indices":     [hojas.index(h) for h in hojas_amb],
+            "dias_alerta": dias_alerta,
+            "exportado":   datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        log(f"  {amb}: {len(hojas_amb)} hojas, {len(os.listdir(destino))} archivos -> {carpeta}")
+        unidades.append(carpeta)
+    return unidades
+
+
+# ==========================
+# AUDITAR UNA UNIDAD (worker)
+# ==========================
+def auditar_unidad(carpeta):
+    """Auditoria normal sobre la mini RAIZ de la unidad; deja RESULTADO.json."""
+    import auditoria
+    unidad = _leer_json(os.path.join(carpeta, NOMBRE_UNIDAD))
+    return auditoria.main([
+        "--raiz", carpeta,
+        "--dias-alerta", str(unidad["dias_alerta"]),
+        "--salida-parche",
+        "--sin-historial",
+        "--exportar-resultado", os.path.join(carpeta, NOMBRE_RESULTADO),
+    ])
+
+
+# ==========================
+# FUSIONAR
+# ==========================
+def _cargar_unidades(dir_unidades):
+    """[(unidad, resultado, carpeta)] ordenadas por la primera hoja en el libro original."""
+    cargadas, faltantes = [], []
+    for nombre in sorted(os.listdir(dir_unidades)):
+        carpeta = os.path.join(dir_unidades, nombre)
+        ruta_u  = os.path.join(carpeta, NOMBRE_UNIDAD)
+        if not os.path.isfile(ruta_u):
+            continue
+        ruta_r = os.path.join(carpeta, NOMBRE_RESULTADO)
+        if not os.path.isfile(ruta_r):
+            faltantes.append(nombre)
+            continue
+        cargadas.append((_leer_json(ruta_u), _leer_json(ruta_r), carpeta))
+    if faltantes:
+        raise RuntimeError("Unidades sin RESULTADO.json: " + ", ".join(faltantes))
+    cargadas.sort(key=lambda u: min(u[0]["indices"]))
+    return cargadas
+
+
+def fusionar(raiz, dir_unidades, sin_historial=False):
+    global _archivo_log
+    import auditoria
+    import historial
+    import parche_xlsx
+    import reporte_html
+
+    excel_in    = os.path.join(raiz, "REPORTE_AUDITORIA.xlsx")
+    excel_out   = auditoria.nombre_excel_salida(raiz)
+    archivo_log = os.path.join(raiz, "LOG_PROCESAMIENTO.txt")
+
+    unidades = _cargar_unidades(dir_unidades)
+    if not unidades:
+        raise RuntimeError(f"No hay unidades en {dir_unidades}")
+    fechas      = {r["fecha"] for _, r, _ in unidades}
+    dias_alerta = {r["dias_alerta"] for _, r, _ in unidades}
+    if len(dias_alerta) > 1:
+        raise RuntimeError(f"Las unidades usan distintos umbrales de alerta: {sorted(dias_alerta)}")
+    dias_alerta = dias_alerta.pop()
+
+    # Log combinado: el log de cada unidad, en orden de hojas del libro original
+    with open(archivo_log, "w", encoding="utf-8") as out:
+        for _, _, carpeta in unidades:
+            with open(os.path.join(carpeta, "LOG_PROCESAMIENTO.txt"), "r", encoding="utf-8") as f:
+                shutil.copyfileobj(f, out)
+    _archivo_log = archivo_log
+
+    log("=" * 60)
+    log("  FUSION DE FRAGMENTOS - " + str(len(unidades)) + " unidades")
+    log("=" * 60)
+    if len(fechas) > 1:
+        log("  Unidades auditadas en fechas distintas: " + ", ".join(sorted(fechas)), "WARN")
+
+    cambios, diffs, comparaciones, clasificaciones, certificados = [], [], [], [], []
+    stats = {"resueltos": 0, "no_encontrados": 0, "total_aliases": 0}
+    for unidad, resultado, _ in unidades:
+        log(f"  {unidad['ambiente']}: hojas {', '.join(resultado['hojas'])} | "
+            f"{len(resultado['cambios_celdas'])} cambios de celda")
+        cambios.extend(resultado["cambios_celdas"])
+        diffs.extend(resultado["diffs"])
+        comparaciones.extend(resultado["comparaciones"])
+        clasificaciones.extend(resultado["clasificaciones"])
+        certificados.extend(resultado["certificados"])
+        for k in stats:
+            stats[k] += resultado["stats"].get(k, 0)
+
+    log("Guardando en: " + excel_out)
+    n = parche_xlsx.aplicar_parche(excel_in, excel_out, cambios)
+    log("  " + str(n) + " celdas modificadas sobre el libro original")
+
+    alertas = [d for d in diffs if "VENCIDO" in d or "VENCER" in d]
+    log(f"  Alertas de vencimiento: {len(alertas)} | Datos actualizados: {len(diffs) - len(alertas)}")
+    pct = (stats["resueltos"] / stats["total_aliases"] * 100) if stats["total_aliases"] else 0
+    log(f"  Cobertura combinada: {stats['resueltos']}/{stats['total_aliases']} ({pct:.1f}%)")
+
+    log_venc = os.path.join(raiz, "LOG_VENCIMIENTOS.txt")
+    auditoria.escribir_log_vencimientos(log_venc, alertas, dias_alerta)
+    log("Log de vencimientos guardado en: " + log_venc)
+
+    nombres = [u["ambiente"] for u, _, _ in unidades]
+    ruteo   = {h: {"ambiente": u["ambiente"]} for u, r, _ in unidades for h in r["hojas"]}
+    reporte_html.generar_html_reporte(archivo_log, os.path.join(raiz, "REPORTE_AUDITORIA.html"),
+                                      str(date.today()), dias_alerta, nombres, log=log, ruteo=ruteo)
+
+    if not sin_historial:
+        meta = {"fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "excel_in": excel_in,
+                "excel_out": excel_out, "dias_alerta": dias_alerta}
+        eid = historial.registrar_ejecucion(os.path.join(raiz, historial.NOMBRE_DB), meta,
+                                            certificados, comparaciones, clasificaciones)
+        log(f"Historial actualizado: ejecucion #{eid}")
+
+    log("\n>>> FUSION FINALIZADA <<<")
+    _archivo_log = None
+    return excel_out
+
+
+# ==========================
+# CLI
+# ==========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="procesar.py fragmentos",
+                                     description="Auditoria repartida en unidades por ambiente")
+    sub = parser.add_subparsers(dest="accion", required=True)
+
+    p = sub.add_parser("exportar", help="Crea una unidad de trabajo por ambiente")
+    p.add_argument("--raiz", default=r"C:\Automatizacion_Excel", help="Carpeta raiz del proyecto")
+    p.add_argument("--salida", default=None, help=f"Carpeta de unidades (default: RAIZ/{CARPETA_DEFAULT})")
+    p.add_argument("--dias-alerta", type=int, default=90)
+    p.add_argument("--ambientes", nargs="+", default=None)
+
+    p = sub.add_parser("auditar", help="Audita una o varias unidades")
+    p.add_argument("unidades", nargs="+")
+
+    p = sub.add_parser("fusionar", help="Combina los resultados en un libro, log y reporte")
+    p.add_argument("--raiz", default=r"C:\Automatizacion_Excel", help="Carpeta raiz del proyecto")
+    p.add_argument("--unidades", default=None, help=f"Carpeta de unidades (default: RAIZ/{CARPETA_DEFAULT})")
+    p.add_argument("--sin-historial", action="store_true")
+
+    args = parser.parse_args(argv)
+
+    if args.accion == "exportar":
+        salida = args.salida or os.path.join(args.raiz, CARPETA_DEFAULT)
+        log(f"Exportando unidades en {salida}")
+        unidades = exportar(args.raiz, salida, args.dias_alerta, args.ambientes)
+        log(f"{len(unidades)} unidades exportadas")
+    elif args.accion == "auditar":
+        codigo = 0
+        for carpeta in args.unidades:
+            resultado = auditar_unidad(carpeta)
+            if resultado:
+                log(f"La auditoria de {carpeta} termino con codigo {resultado}", "ERROR")
+                codigo = codigo or resultado
+        return codigo
+    elif args.accion == "fusionar":
+        fusionar(args.raiz, args.unidades or os.path.join(args.raiz, CARPETA_DEFAULT), args.sin_historial)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
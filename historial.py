@@ -0,0 +1,269 @@
+"""
+HISTORIAL DE AUDITORIAS v1.0
+- Base SQLite local (RAIZ/HISTORIAL_AUDITORIA.sqlite) que acumula cada ejecucion
+- Guarda certificados parseados (con su 'Not After'), comparaciones Excel vs
+  .out y clasificaciones de vencimiento (con el vencimiento efectivo por
+  cadena y el certificado que lo limita)
+- Indices por (ambiente, alias), alias sin distinguir mayusculas, fingerprint,
+  serial, fecha de vencimiento y (ejecucion, vencimiento efectivo)
+- Insercion por lotes en una sola transaccion por ejecucion
+- CLI de consulta: historia de un alias, busqueda por fingerprint/serial,
+  vencimientos en un rango y listado de ejecuciones
+"""
+
+import os
+import re
+import sqlite3
+import argparse
+from datetime import date, timedelta
+
+
+NOMBRE_DB = "HISTORIAL_AUDITORIA.sqlite"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS ejecuciones (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    fecha       TEXT NOT NULL,
+    excel_in    TEXT,
+    excel_out   TEXT,
+    dias_alerta INTEGER
+);
+CREATE TABLE IF NOT EXISTS certificados (
+    ejecucion_id INTEGER NOT NULL REFERENCES ejecuciones(id),
+    ambiente     TEXT,
+    archivo      TEXT,
+    formato      TEXT,
+    seccion      TEXT,
+    alias        TEXT,
+    serial       TEXT,
+    fingerprint  TEXT,
+    vencimiento  TEXT
+);
+CREATE TABLE IF NOT EXISTS comparaciones (
+    ejecucion_id INTEGER NOT NULL REFERENCES ejecuciones(id),
+    ambiente     TEXT,
+    hoja         TEXT,
+    seccion      TEXT,
+    alias        TEXT,
+    campo        TEXT,
+    valor_excel  TEXT,
+    valor_out    TEXT,
+    resultado    TEXT
+);
+CREATE TABLE IF NOT EXISTS clasificaciones (
+    ejecucion_id INTEGER NOT NULL REFERENCES ejecuciones(id),
+    ambiente     TEXT,
+    hoja         TEXT,
+    alias        TEXT,
+    estado       TEXT,
+    fecha_venc   TEXT,
+    dias         INTEGER,
+    fecha_efectiva TEXT,
+    limitado_por   TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_cert_amb_alias ON certificados (ambiente, alias);
+CREATE INDEX IF NOT EXISTS ix_cert_alias_nc  ON certificados (alias COLLATE NOCASE, ambiente);
+CREATE INDEX IF NOT EXISTS ix_cert_fp        ON certificados (fingerprint);
+CREATE INDEX IF NOT EXISTS ix_cert_serial    ON certificados (serial);
+CREATE INDEX IF NOT EXISTS ix_comp_amb_alias ON comparaciones (ambiente, alias);
+CREATE INDEX IF NOT EXISTS ix_comp_valor     ON comparaciones (valor_out);
+CREATE INDEX IF NOT EXISTS ix_clas_amb_alias ON clasificaciones (ambiente, alias);
+CREATE INDEX IF NOT EXISTS ix_clas_fecha     ON clasificaciones (fecha_venc);
+"""
+# Indices sobre columnas agregadas por migracion: se crean despues de migrar
+INDICES_MIGRADOS = """
+CREATE INDEX IF NOT EXISTS ix_clas_ejec_efectiva ON clasificaciones (ejecucion_id, fecha_efectiva);
+"""
+
+
+# ==========================
+# NORMALIZACION
+# ==========================
+def normalizar_hex(valor):
+    """Fingerprint/serial como hex en mayusculas sin separadores (clave de busqueda)."""
+    if not valor:
+        return ""
+    v = re.sub(r"^SHA\d+\s*:\s*", "", str(valor), flags=re.IGNORECASE)
+    return re.sub(r"[^0-9A-Fa-f]", "", v).upper()
+
+
+# ==========================
+# ESCRITURA
+# ==========================
+def conectar(ruta_db):
+    con = sqlite3.connect(ruta_db)
+    con.executescript(ESQUEMA)
+    columnas = {fila[1] for fila in con.execute("PRAGMA table_info(certificados)")}
+    if "vencimiento" not in columnas:   # bases creadas antes de guardar el 'Not After'
+        con.execute("ALTER TABLE certificados ADD COLUMN vencimiento TEXT")
+    columnas = {fila[1] for fila in con.execute("PRAGMA table_info(clasificaciones)")}
+    if "fecha_efectiva" not in columnas:   # bases creadas antes del vencimiento por cadena
+        with con:
+            con.execute("ALTER TABLE clasificaciones ADD COLUMN fecha_efectiva TEXT")
+            con.execute("ALTER TABLE clasificaciones ADD COLUMN limitado_por TEXT")
+            con.execute("UPDATE clasificaciones SET fecha_efectiva = fecha_venc")
+    con.executescript(INDICES_MIGRADOS)
+    return con
+
+
+def registrar_ejecucion(ruta_db, meta, certificados, comparaciones, clasificaciones):
+    """
+    Agrega una ejecucion completa en una sola transaccion.
+    meta: {fecha, excel_in, excel_out, dias_alerta}
+    certificados / comparaciones / clasificaciones: listas de dicts con las
+    columnas de cada tabla. Retorna el id de la ejecucion.
+    """
+    con = conectar(ruta_db)
+    try:
+        with con:
+            cur = con.execute(
+                "INSERT INTO ejecuciones (fecha, excel_in, excel_out, dias_alerta) VALUES (?, ?, ?, ?)",
+                (meta.get("fecha"), meta.get("excel_in"), meta.get("excel_out"), meta.get("dias_alerta")),
+            )
+            eid = cur.lastrowid
+            con.executemany(
+                "INSERT INTO certificados (ejecucion_id, ambiente, archivo, formato, seccion, alias, "
+                "serial, fingerprint, vencimiento) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(eid, c.get("ambiente"), c.get("archivo"), c.get("formato"), c.get("seccion"),
+                  c.get("alias"), normalizar_hex(c.get("serial")), normalizar_hex(c.get("fingerprint")),
+                  c.get("vencimiento") or None)
+                 for c in certificados],
+            )
+            con.executemany(
+                "INSERT INTO comparaciones VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(eid, c.get("ambiente"), c.get("hoja"), c.get("seccion"), c.get("alias"),
+                  c.get("campo"), c.get("valor_excel"), c.get("valor_out"), c.get("resultado"))
+                 for c in comparaciones],
+            )
+            con.executemany(
+                "INSERT INTO clasificaciones (ejecucion_id, ambiente, hoja, alias, estado, fecha_venc, dias, "
+                "fecha_efectiva, limitado_por) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(eid, c.get("ambiente"), c.get("hoja"), c.get("alias"), c.get("estado"),
+                  c.get("fecha_venc"), c.get("dias"), c.get("fecha_efectiva", c.get("fecha_venc")),
+                  c.get("limitado_por"))
+                 for c in clasificaciones],
+            )
+        return eid
+    finally:
+        con.close()
+
+
+# ==========================
+# CONSULTAS
+# ==========================
+def historia_alias(con, alias, ambiente=None):
+    """Fingerprint/serial del alias en cada ejecucion, marcando cuando cambian (alias sin distinguir mayusculas)."""
+    sql = ("SELECT e.fecha, c.ambiente, c.archivo, c.serial, c.fingerprint "
+           "FROM certificados c JOIN ejecuciones e ON e.id = c.ejecucion_id "
+           "WHERE c.alias = ? COLLATE NOCASE")
+    params = [alias]
+    if ambiente:
+        sql += " AND c.ambiente = ?"
+        params.append(ambiente.upper())
+    sql += " ORDER BY c.ambiente, c.archivo, e.id"
+
+    filas, previo = [], {}
+    for fecha, amb, archivo, serial, fp in con.execute(sql, params):
+        clave  = (amb, archivo)
+        cambio = clave in previo and previo[clave] != (serial, fp)
+        previo[clave] = (serial, fp)
+        filas.append((fecha, amb, archivo, serial, fp, "CAMBIO" if cambio else ""))
+    return filas
+
+
+def buscar_fingerprint(con, fp):
+    return con.execute(
+        "SELECT e.fecha, c.ambiente, c.archivo, c.alias, c.serial "
+        "FROM certificados c JOIN ejecuciones e ON e.id = c.ejecucion_id "
+        "WHERE c.fingerprint = ? ORDER BY e.id, c.ambiente, c.archivo",
+        (normalizar_hex(fp),),
+    ).fetchall()
+
+
+def buscar_serial(con, serial):
+    return con.execute(
+        "SELECT e.fecha, c.ambiente, c.archivo, c.alias, c.fingerprint "
+        "FROM certificados c JOIN ejecuciones e ON e.id = c.ejecucion_id "
+        "WHERE c.serial = ? ORDER BY e.id, c.ambiente, c.archivo",
+        (normalizar_hex(serial),),
+    ).fetchall()
+
+
+def vencimientos(con, desde, hasta):
+    """Clasificaciones de la ultima ejecucion con vencimiento efectivo (propio o de la cadena) en [desde, hasta]."""
+    return con.execute(
+        "SELECT ambiente, hoja, alias, estado, fecha_venc, fecha_efectiva, limitado_por FROM clasificaciones "
+        "WHERE ejecucion_id = (SELECT max(id) FROM ejecuciones) "
+        "AND fecha_efectiva BETWEEN ? AND ? ORDER BY fecha_efectiva, ambiente, hoja, alias",
+        (desde, hasta),
+    ).fetchall()
+
+
+def listar_ejecuciones(con):
+    return con.execute(
+        "SELECT e.id, e.fecha, e.excel_out, "
+        "(SELECT count(*) FROM comparaciones c WHERE c.ejecucion_id = e.id AND c.resultado = 'DIFERENTE') "
+        "FROM ejecuciones e ORDER BY e.id"
+    ).fetchall()
+
+
+# ==========================
+# CLI
+# ==========================
+def _imprimir(filas, encabezado):
+    print(" | ".join(encabezado))
+    print("-" * 60)
+    for f in filas:
+        print(" | ".join("" if v is None else str(v) for v in f))
+    print(f"\n{len(filas)} registros")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consulta del historial de auditorias SSL")
+    parser.add_argument("--raiz", default=r"C:\Automatizacion_Excel",
+                        help="Carpeta raiz del proyecto")
+    parser.add_argument("--db", default=None,
+                        help=f"Ruta a la base (default: RAIZ/{NOMBRE_DB})")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p = sub.add_parser("historia", help="Fingerprint/serial de un alias en cada ejecucion")
+    p.add_argument("alias")
+    p.add_argument("--ambiente")
+    p = sub.add_parser("fingerprint", help="Donde y cuando aparecio un fingerprint")
+    p.add_argument("valor")
+    p = sub.add_parser("serial", help="Donde y cuando aparecio un serial")
+    p.add_argument("valor")
+    p = sub.add_parser("vencen", help="Certificados que vencen en los proximos N dias")
+    p.add_argument("--dias", type=int, default=90)
+    sub.add_parser("ejecuciones", help="Listado de ejecuciones registradas")
+
+    args = parser.parse_args(argv)
+    ruta_db = args.db or os.path.join(args.raiz, NOMBRE_DB)
+    if not os.path.exists(ruta_db):
+        print(f"No existe el historial: {ruta_db}")
+        return 1
+
+    con = conectar(ruta_db)
+    try:
+        if args.comando == "historia":
+            _imprimir(historia_alias(con, args.alias, args.ambiente),
+                      ["Fecha", "Ambiente", "Archivo", "Serial", "Fingerprint", "Cambio"])
+        elif args.comando == "fingerprint":
+            _imprimir(buscar_fingerprint(con, args.valor),
+                      ["Fecha", "Ambiente", "Archivo", "Alias", "Serial"])
+        elif args.comando == "serial":
+            _imprimir(buscar_serial(con, args.valor),
+                      ["Fecha", "Ambiente", "Archivo", "Alias", "Fingerprint"])
+        elif args.comando == "vencen":
+            hoy = date.today()
+            _imprimir(vencimientos(con, "0000-00-00", str(hoy + timedelta(days=args.dias))),
+                      ["Ambiente", "Hoja", "Alias", "Estado", "Vencimiento", "Vence efectivo", "Limitado por"])
+        elif args.comando == "ejecuciones":
+            _imprimir(listar_ejecuciones(con), ["Id", "Fecha", "Excel salida", "Diferencias"])
+    finally:
+        con.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,145 @@
+"""
+INDICE DIFUSO DE ALIAS v1.0
+- Reemplaza la comparacion lineal alias vs archivo (contencion y "sin la
+  ultima letra") por un indice construido una vez por ambiente y seccion
+- Nombres normalizados (sin prefijo SC_/PC_, separadores ni fecha final
+  '(AAAAMMDD)') en un indice invertido de trigramas: cada consulta evalua solo
+  los candidatos que comparten trigramas con el alias
+- Puntaje: 1.0 exacto; distancia de edicion acotada (Levenshtein con corte
+  temprano) para typos; prefijo para alias truncados en el Excel
+- Resultado con el mejor candidato, su puntaje y si la coincidencia es ambigua
+  (otro candidato con el mismo puntaje)
+- Diccionario Label interno -> archivo armado junto con el indice: la
+  busqueda por Label es una consulta, no un recorrido de los candidatos
+"""
+
+import re
+
+
+PUNTAJE_MINIMO   = 0.5
+MAX_CANDIDATOS   = 8     # candidatos (por trigramas compartidos) evaluados en detalle
+MIN_PREFIJO      = 6     # largo minimo de un alias truncado para aceptar prefijo
+MARGEN_AMBIGUO   = 1e-9
+
+_RE_TIPO      = re.compile(r"^(SC_|PC_)", re.IGNORECASE)
+_RE_SEPARADOR = re.compile(r"[\s\-_=,\.]+")
+_RE_FECHA_FIN = re.compile(r"\(\d{8}\)$")
+
+
+# ==========================
+# NORMALIZACION
+# ==========================
+def normalizar(texto):
+    """'SC_DigiCert Global-Root (20310110)' -> 'digicertglobalroot'."""
+    s = _RE_TIPO.sub("", str(texto).strip())
+    s = _RE_FECHA_FIN.sub("", s.strip(" -_"))
+    return _RE_SEPARADOR.sub("", s).lower()
+
+
+def alias_de_archivo(nombre_archivo):
+    """'camaraprod_4_SC_DigiCert-Global-Root-CA.out' -> 'DigiCert-Global-Root-CA'."""
+    base   = nombre_archivo.rsplit(".", 1)[0] if "." in nombre_archivo else nombre_archivo
+    partes = base.split("_", 3)
+    return partes[-1] if len(partes) >= 4 else base
+
+
+def trigramas(s):
+    s = f"$${s}$"
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def distancia_acotada(a, b, limite):
+    """Levenshtein entre a y b, o limite + 1 apenas se sabe que lo supera."""
+    if abs(len(a) - len(b)) > limite:
+        return limite + 1
+    previa = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        actual = [i]
+        for j, cb in enumerate(b, 1):
+            actual.append(min(previa[j] + 1, actual[j - 1] + 1, previa[j - 1] + (ca != cb)))
+        if min(actual) > limite:
+            return limite + 1
+        previa = actual
+    return previa[-1]
+
+
+def limite_edicion(largo):
+    """Distancia de edicion tolerada segun el largo del alias (1 typo cada 8 caracteres)."""
+    return max(1, largo // 8)
+
+
+# ==========================
+# INDICE
+# ==========================
+class Coincidencia:
+    __slots__ = ("nombre", "puntaje", "ambiguos")
+
+    def __init__(self, nombre, puntaje, ambiguos):
+        self.nombre   = nombre     # nombre de archivo elegido
+        self.puntaje  = puntaje    # 0..1
+        self.ambiguos = ambiguos   # otros nombres con el mismo puntaje
+
+    @property
+    def ambigua(self):
+        return bool(self.ambiguos)
+
+
+class IndiceAlias:
+    """Indice de trigramas sobre los nombres de archivo de una seccion."""
+
+    def __init__(self, nombres_archivo, etiquetas=None):
+        self.nombres    = list(nombres_archivo)
+        self.normas     = [normalizar(alias_de_archivo(n)) for n in self.nombres]
+        self.exactos    = {}   # norma -> [posiciones]
+        self.invertido  = {}   # trigrama -> [posiciones]
+        self.etiquetas  = {}   # Label interno -> nombre de archivo (el primero en orden de nombres)
+        for nombre in self.nombres:
+            etiqueta = (etiquetas or {}).get(nombre)
+            if etiqueta:
+                self.etiquetas.setdefault(etiqueta, nombre)
+        for pos, norma in enumerate(self.normas):
+            self.exactos.setdefault(norma, []).append(pos)
+            for t in trigramas(norma):
+                self.invertido.setdefault(t, []).append(pos)
+
+    def __len__(self):
+        return len(self.nombres)
+
+    def _puntaje(self, a, b):
+        if a == b:
+            return 1.0
+        limite = limite_edicion(max(len(a), len(b)))
+        d = distancia_acotada(a, b, limite)
+        if d <= limite:
+            return 1.0 - d / max(len(a), len(b))
+        corto, largo = (a, b) if len(a) <= len(b) else (b, a)
+        if len(corto) >= MIN_PREFIJO and largo.startswith(corto):
+            return 0.5 + 0.35 * len(corto) / len(largo)   # siempre por debajo de un typo
+        return 0.0
+
+    def por_etiqueta(self, etiqueta):
+        """Archivo cuyo Label interno es exactamente 'etiqueta', o None."""
+        return self.etiquetas.get(etiqueta)
+
+    def buscar(self, alias):
+        """Coincidencia con mayor puntaje (>= PUNTAJE_MINIMO) o None."""
+        a = normalizar(alias)
+        if not a:
+            return None
+        exactos = self.exactos.get(a)
+        if exactos:
+            return Coincidencia(self.nombres[exactos[0]], 1.0, [self.nombres[p] for p in exactos[1:]])
+
+        compartidos = {}
+        for t in trigramas(a):
+            for pos in self.invertido.get(t, ()):
+                compartidos[pos] = compartidos.get(pos, 0) + 1
+        candidatos = sorted(compartidos, key=lambda p: (-compartidos[p], p))[:MAX_CANDIDATOS]
+
+        puntajes = sorted(((self._puntaje(a, self.normas[p]), p) for p in candidatos),
+                          key=lambda x: (-x[0], x[1]))
+        if not puntajes or puntajes[0][0] < PUNTAJE_MINIMO:
+            return None
+        mejor, pos = puntajes[0]
+        ambiguos = [self.nombres[p] for s, p in puntajes[1:] if mejor - s <= MARGEN_AMBIGUO]
+        return Coincidencia(self.nombres[pos], mejor, ambiguos)
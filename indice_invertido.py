@@ -0,0 +1,342 @@
+"""
+INDICE INVERTIDO DE CERTIFICADOS v1.0
+- Indice en disco (RAIZ/INDICE/certificados.idx) de todos los volcados de
+  archivos_out y PROCESADOS: fingerprint, serial, tokens del sujeto / emisor
+  y label -> (ambiente, archivo, seccion, alias)
+- Formato binario pensado para mmap: directorio de terminos ordenado con
+  registros de ancho fijo (busqueda binaria sobre el archivo mapeado),
+  postings como arreglos de enteros y documentos en JSON compacto; una
+  consulta lee solo las paginas que toca, sin escanear archivos
+- Actualizacion incremental: RAIZ/INDICE/manifiesto.json guarda tamano,
+  mtime y documentos de cada archivo; solo se releen (registro de parsers)
+  los archivos nuevos o modificados
+- Se actualiza al terminar el staging y la auditoria; 'procesar.py buscar'
+  consulta el indice
+
+Uso:
+  python procesar.py buscar TEXTO [--raiz ...] [--tipo auto|fp|serial|dn|alias] [--json]
+"""
+
+import os
+import re
+import json
+import mmap
+import struct
+import argparse
+
+import certificados
+import registro_parsers
+
+
+CARPETA_INDICE   = "INDICE"
+NOMBRE_INDICE    = "certificados.idx"
+NOMBRE_MANIFIESTO = "manifiesto.json"
+
+MAGIC    = b"CERTIDX1"
+CABECERA = struct.Struct("<8sIIQQQQ")   # magic, n_terminos, n_docs, off_dir, off_terminos, off_postings, off_docs
+TERMINO  = struct.Struct("<IHII")       # off_texto, largo, off_postings, cantidad
+DOC      = struct.Struct("<II")         # off_json, largo
+
+# Prefijos de termino (un solo espacio de claves ordenado)
+T_FP, T_SERIAL, T_TOKEN, T_LABEL = "f:", "s:", "t:", "l:"
+
+CARPETAS = ("origen", "destino")   # claves de la tabla de ambientes que se indexan
+
+_RE_SECCION = re.compile(r"^[^_]+_(\d+)_(?:SC|PC)_", re.IGNORECASE)
+_RE_TOKEN   = re.compile(r"[0-9a-z]+")
+
+
+# ==========================
+# TERMINOS
+# ==========================
+def tokens(texto):
+    """Tokens de un DN o label: solo los valores ('CN=Foo Bar,O=X' -> foo, bar, x), 2+ caracteres."""
+    resultado = set()
+    for parte in re.split(r"[,+]", str(texto or "")):
+        valor = parte.split("=", 1)[-1].lower()
+        resultado.update(t for t in _RE_TOKEN.findall(valor) if len(t) >= 2)
+    return resultado
+
+
+def clave_fp(valor):
+    fp = valor if isinstance(valor, bytes) else certificados.fp_a_bytes(valor)
+    return T_FP + fp.hex() if fp else ""
+
+
+def clave_serial(valor):
+    s = valor if isinstance(valor, int) else certificados.serial_a_int(valor)
+    return T_SERIAL + format(s, "x") if s is not None else ""
+
+
+def terminos_doc(doc):
+    terminos = {clave_fp(doc["fp"]), clave_serial(doc["serial"])}
+    if doc["alias"]:
+        terminos.add(T_LABEL + doc["alias"].lower())
+    for campo in ("sujeto", "emisor", "alias"):
+        terminos.update(T_TOKEN + t for t in tokens(doc[campo]))
+    terminos.discard("")
+    return terminos
+
+
+# ==========================
+# DOCUMENTOS (un certificado dentro de un archivo)
+# ==========================
+def _doc(ambiente, carpeta, rel, seccion, alias, cert):
+    return {"ambiente": ambiente, "carpeta": carpeta, "archivo": rel, "seccion": seccion, "alias": alias,
+            "fp": cert.fp.hex(), "serial": cert.serial_texto, "sujeto": cert.sujeto, "emisor": cert.emisor,
+            "vencimiento": str(cert.vencimiento or "")}
+
+
+def documentos_archivo(ruta, ambiente, carpeta, rel):
+    """Certificados del archivo segun el registro de parsers (vacio si no es un volcado de certificados)."""
+    volcado = registro_parsers.leer_volcado(ruta)
+    datos, formato, fname = volcado["datos"], volcado["formato"], os.path.basename(ruta)
+    if not datos:
+        return []
+    m = _RE_SECCION.match(fname)
+    if formato == registro_parsers.FORMATO_GSKIT:
+        return [_doc(ambiente, carpeta, rel, m.group(1) if m else "", datos.label, datos.cert)]
+    if formato in registro_parsers.FORMATOS_KEYSTORE:
+        seccion = m.group(1) if m else fname
+        return [_doc(ambiente, carpeta, rel, seccion, alias, cert) for alias, cert in datos.items()]
+    return []
+
+
+# ==========================
+# ACTUALIZACION INCREMENTAL
+# ==========================
+def ruta_indice(raiz):
+    return os.path.join(raiz, CARPETA_INDICE, NOMBRE_INDICE)
+
+
+def _cargar_manifiesto(ruta):
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"archivos": {}}
+
+
+def actualizar(raiz, rutas_amb, log=None):
+    """
+    Relee solo los archivos nuevos o modificados de las carpetas de los
+    ambientes dados y reescribe el indice. Los archivos de ambientes fuera de
+    'rutas_amb' se conservan tal como estaban. Retorna (archivos, releidos, terminos).
+    """
+    carpeta_idx = os.path.join(raiz, CARPETA_INDICE)
+    ruta_manif  = os.path.join(carpeta_idx, NOMBRE_MANIFIESTO)
+    previos     = _cargar_manifiesto(ruta_manif)["archivos"]
+
+    archivos, releidos, alcance = {}, 0, []
+    for ambiente, rutas in rutas_amb.items():
+        for etiqueta in CARPETAS:
+            carpeta = rutas.get(etiqueta)
+            if not carpeta or not os.path.isdir(carpeta):
+                continue
+            alcance.append(os.path.relpath(carpeta, raiz).replace(os.sep, "/") + "/")
+            with os.scandir(carpeta) as it:
+                entradas = sorted((e for e in it if e.is_file() and not registro_parsers.es_artefacto_staging(e.name)),
+                                  key=lambda e: e.name)
+            for e in entradas:
+                rel = os.path.relpath(e.path, raiz).replace(os.sep, "/")
+                st  = e.stat()
+                previo = previos.get(rel)
+                if previo and previo["tam"] == st.st_size and previo["mtime_ns"] == st.st_mtime_ns:
+                    archivos[rel] = previo
+                    continue
+                try:
+                    docs = documentos_archivo(e.path, ambiente, etiqueta, rel)
+                except Exception as ex:
+                    if log:
+                        log(f"Indice: no se pudo leer {rel}: {ex}", "WARN")
+                    docs = []
+                archivos[rel] = {"tam": st.st_size, "mtime_ns": st.st_mtime_ns, "docs": docs}
+                releidos += 1
+    # Archivos de carpetas fuera del alcance de esta ejecucion: se conservan
+    for rel, previo in previos.items():
+        if rel not in archivos and not any(rel.startswith(a) for a in alcance):
+            archivos[rel] = previo
+
+    os.makedirs(carpeta_idx, exist_ok=True)
+    n_terminos = escribir_indice(ruta_indice(raiz), [d for rel in sorted(archivos) for d in archivos[rel]["docs"]])
+    tmp = ruta_manif + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "archivos": archivos}, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, ruta_manif)
+    if log:
+        log(f"Indice de certificados: {len(archivos)} archivos ({releidos} releidos), {n_terminos} terminos")
+    return len(archivos), releidos, n_terminos
+
+
+def escribir_indice(ruta, docs):
+    """Serializa el indice: cabecera | directorio de terminos | textos | postings | directorio de docs | docs."""
+    postings = {}
+    for i, doc in enumerate(docs):
+        for t in terminos_doc(doc):
+            postings.setdefault(t, []).append(i)
+    orden = sorted(postings, key=lambda t: t.encode("utf-8"))
+
+    textos, dir_terminos, bloque_post = bytearray(), bytearray(), bytearray()
+    for t in orden:
+        b = t.encode("utf-8")
+        ids = postings[t]
+        dir_terminos += TERMINO.pack(len(textos), len(b), len(bloque_post), len(ids))
+        textos       += b
+        bloque_post  += struct.pack(f"<{len(ids)}I", *ids)
+
+    dir_docs, cuerpos = bytearray(), bytearray()
+    for doc in docs:
+        b = json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        dir_docs += DOC.pack(len(cuerpos), len(b))
+        cuerpos  += b
+
+    off_dir   = CABECERA.size
+    off_txt   = off_dir + len(dir_terminos)
+    off_post  = off_txt + len(textos)
+    off_docs  = off_post + len(bloque_post)
+    tmp = ruta + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(CABECERA.pack(MAGIC, len(orden), len(docs), off_dir, off_txt, off_post, off_docs))
+        f.write(dir_terminos)
+        f.write(textos)
+        f.write(bloque_post)
+        f.write(dir_docs)
+        f.write(cuerpos)
+    os.replace(tmp, ruta)
+    return len(orden)
+
+
+# ==========================
+# LECTURA (mmap)
+# ==========================
+class Indice:
+    def __init__(self, ruta):
+        self._f  = open(ruta, "rb")
+        self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.n_terminos, self.n_docs, self._off_dir, self._off_txt,
+         self._off_post, self._off_docs) = CABECERA.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.cerrar()
+            raise ValueError(f"no es un indice de certificados: {ruta}")
+
+    def cerrar(self):
+        self._mm.close()
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def _termino(self, i):
+        off, largo, off_p, n = TERMINO.unpack_from(self._mm, self._off_dir + i * TERMINO.size)
+        return self._mm[self._off_txt + off:self._off_txt + off + largo], off_p, n
+
+    def postings(self, termino):
+        """Ids de documento del termino (busqueda binaria sobre el directorio mapeado)."""
+        buscado = termino.encode("utf-8")
+        lo, hi = 0, self.n_terminos
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._termino(mid)[0] < buscado:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.n_terminos:
+            texto, off_p, n = self._termino(lo)
+            if texto == buscado:
+                return set(struct.unpack_from(f"<{n}I", self._mm, self._off_post + off_p))
+        return set()
+
+    def documento(self, i):
+        off, largo = DOC.unpack_from(self._mm, self._off_docs + i * DOC.size)
+        inicio = self._off_docs + self.n_docs * DOC.size + off
+        return json.loads(self._mm[inicio:inicio + largo].decode("utf-8"))
+
+    def buscar(self, terminos):
+        """Documentos que tienen todos los terminos."""
+        ids = None
+        for t in terminos:
+            ids = self.postings(t) if ids is None else ids & self.postings(t)
+            if not ids:
+                return []
+        return [self.documento(i) for i in sorted(ids or ())]
+
+
+# ==========================
+# CONSULTA
+# ==========================
+_RE_HEX = re.compile(r"^[0-9A-Fa-f:\s\-]+$")
+
+
+def terminos_consulta(texto, tipo="auto"):
+    """Alternativas de consulta: lista de conjuntos de terminos (se unen los resultados)."""
+    texto = texto.strip()
+    if tipo == "fp":
+        return [{clave_fp(texto)}]
+    if tipo == "serial":
+        return [{clave_serial(texto)}]
+    if tipo == "alias":
+        return [{T_LABEL + texto.lower()}]
+    if tipo == "dn":
+        return [{T_TOKEN + t for t in tokens(texto)}]
+    alternativas = []
+    if _RE_HEX.match(texto):
+        if len(certificados.fp_a_bytes(texto)) == 20:
+            alternativas.append({clave_fp(texto)})
+        if clave_serial(texto):
+            alternativas.append({clave_serial(texto)})
+    alternativas.append({T_LABEL + texto.lower()})
+    if tokens(texto):
+        alternativas.append({T_TOKEN + t for t in tokens(texto)})
+    return alternativas
+
+
+def buscar(raiz, texto, tipo="auto"):
+    resultado, vistos = [], set()
+    with Indice(ruta_indice(raiz)) as indice:
+        for terminos in terminos_consulta(texto, tipo):
+            terminos.discard("")
+            if not terminos:
+                continue
+            for doc in indice.buscar(terminos):
+                clave = (doc["archivo"], doc["alias"], doc["fp"])
+                if clave not in vistos:
+                    vistos.add(clave)
+                    resultado.append(doc)
+            if resultado and tipo == "auto":
+                break   # la alternativa mas especifica ya encontro algo
+    return resultado
+
+
+# ==========================
+# CLI
+# ==========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="procesar.py buscar",
+                                     description="Donde esta desplegado un certificado (fingerprint, serial, DN o alias)")
+    parser.add_argument("texto", help="Fingerprint, serial, parte del sujeto/emisor o alias")
+    parser.add_argument("--raiz", default=r"C:\Automatizacion_Excel", help="Carpeta raiz del proyecto")
+    parser.add_argument("--tipo", choices=("auto", "fp", "serial", "dn", "alias"), default="auto")
+    parser.add_argument("--json", action="store_true", help="Resultados en JSON")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(ruta_indice(args.raiz)):
+        print(f"No existe el indice ({ruta_indice(args.raiz)}): se genera al correr staging o auditar")
+        return 2
+    docs = buscar(args.raiz, args.texto, args.tipo)
+    if args.json:
+        print(json.dumps(docs, ensure_ascii=False, indent=1))
+        return 0 if docs else 1
+    for d in docs:
+        print(f"{d['ambiente']} | {d['archivo']} | seccion {d['seccion'] or '-'} | '{d['alias']}' | "
+              f"serial {d['serial'] or '-'} | vence {d['vencimiento'] or '-'}")
+        if d["sujeto"]:
+            print(f"    {d['sujeto']}")
+    print(f"\n{len(docs)} ubicaciones")
+    return 0 if docs else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
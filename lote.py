@@ -0,0 +1,187 @@
+"""
+LOTE DE RE-AUDITORIAS v1.0
+- Re-audita varios libros mensuales archivados (por ejemplo despues de
+  corregir un parser) en un solo proceso: los volcados de PROCESADOS se leen
+  y parsean una vez en un catalogo compartido y cada libro se audita contra el
+- Fecha de referencia por libro ('libro.xlsx@AAAA-MM-DD') o comun (--fecha);
+  sin fecha los vencimientos se evaluan al dia de hoy
+- --procesos N: libros en paralelo; cada proceso recibe el catalogo ya
+  parseado (una copia por proceso) en lugar de volver a leer los volcados
+- Una carpeta por libro en RAIZ/LOTE/<libro>/ con el libro auditado, logs,
+  reporte HTML y RESULTADO.json; resumen del lote en RESUMEN_LOTE.json
+- Sin historial ni indice: un lote no reemplaza a la ultima ejecucion
+
+Uso:
+  python procesar.py lote LIBRO[@AAAA-MM-DD] [LIBRO ...] [--raiz ...] [--fecha AAAA-MM-DD]
+                          [--dias-alerta N] [--procesos N] [--salida DIR]
+"""
+
+import os
+import re
+import json
+import time
+import argparse
+import contextlib
+from datetime import datetime, date
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import ambientes
+import registro_parsers
+
+
+CARPETA_LOTE     = "LOTE"
+NOMBRE_RESUMEN   = "RESUMEN_LOTE.json"
+NOMBRE_RESULTADO = "RESULTADO.json"
+
+_RE_FECHA_LIBRO = re.compile(r"^(.+)@(\d{4}-\d{2}-\d{2})$")
+
+
+def log(msg, nivel="INFO"):
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] [{nivel}] {msg}", flush=True)
+
+
+# ==========================
+# TRABAJOS
+# ==========================
+def trabajos_lote(libros, fecha_comun, salida):
+    """[{libro, fecha, salida}] con una carpeta de salida distinta por libro."""
+    trabajos, usadas = [], set()
+    for texto in libros:
+        m = _RE_FECHA_LIBRO.match(texto)
+        libro, fecha = (m.group(1), date.fromisoformat(m.group(2))) if m else (texto, fecha_comun)
+        base = nombre = os.path.splitext(os.path.basename(libro))[0]
+        n = 2
+        while nombre.lower() in usadas:
+            nombre = f"{base} ({n})"
+            n += 1
+        usadas.add(nombre.lower())
+        trabajos.append({"libro": os.path.abspath(libro), "fecha": fecha, "salida": os.path.join(salida, nombre)})
+    return trabajos
+
+
+def catalogo_compartido(raiz, libros, nombres):
+    """Indexa una vez las carpetas de todos los ambientes que aparecen en los libros."""
+    hojas = []
+    for libro in libros:
+        hojas.extend(h for h in ambientes.hojas_libro(libro) if h not in hojas)
+    for amb, rutas in ambientes.filtrar(ambientes.descubrir(raiz, hojas), nombres).items():
+        catalogo = registro_parsers.indexar_carpeta(rutas["destino"], log=log)
+        log(f"  {amb}: {len(catalogo['archivos'])} archivos en {rutas['destino']}")
+    return registro_parsers.catalogos_indexados()
+
+
+# ==========================
+# AUDITORIA DE UN LIBRO
+# ==========================
+def _iniciar_proceso(catalogos):
+    registro_parsers.adoptar_catalogos(catalogos)
+
+
+def auditar_libro(trabajo, raiz, dias_alerta, nombres):
+    """Auditoria normal del libro contra el catalogo del proceso; la consola va a la carpeta del libro."""
+    import auditoria
+    os.makedirs(trabajo["salida"], exist_ok=True)
+    resultado = os.path.join(trabajo["salida"], NOMBRE_RESULTADO)
+    argv = ["--raiz", raiz, "--excel-in", trabajo["libro"], "--salida", trabajo["salida"],
+            "--dias-alerta", str(dias_alerta), "--sin-historial", "--sin-indice",
+            "--exportar-resultado", resultado]
+    if trabajo["fecha"]:
+        argv += ["--fecha-referencia", str(trabajo["fecha"])]
+    if nombres:
+        argv += ["--ambientes"] + list(nombres)
+
+    inicio = time.perf_counter()
+    resumen = {"libro": trabajo["libro"], "fecha_referencia": str(trabajo["fecha"] or date.today()),
+               "salida": trabajo["salida"], "error": None}
+    try:
+        with open(os.path.join(trabajo["salida"], "CONSOLA.txt"), "w", encoding="utf-8") as consola, \
+                contextlib.redirect_stdout(consola):
+            codigo = auditoria.main(argv)
+        if codigo:
+            raise RuntimeError(f"la auditoria termino con codigo {codigo} (ver CONSOLA.txt)")
+        with open(resultado, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+        alertas = [d for d in datos["diffs"] if "VENCIDO" in d or "VENCER" in d]
+        resumen.update(hojas=len(datos["hojas"]), alertas=len(alertas),
+                       cambios=len(datos["diffs"]) - len(alertas), stats=datos["stats"])
+    except Exception as e:
+        resumen["error"] = f"{type(e).__name__}: {e}"
+    resumen["segundos"] = round(time.perf_counter() - inicio, 2)
+    return resumen
+
+
+# ==========================
+# LOTE
+# ==========================
+def ejecutar_lote(raiz, trabajos, dias_alerta=90, nombres=None, procesos=1):
+    """Audita todos los libros; retorna los resumenes en el orden de 'trabajos'."""
+    inicio = time.perf_counter()
+    log(f"Catalogo compartido para {len(trabajos)} libros:")
+    catalogos = catalogo_compartido(raiz, [t["libro"] for t in trabajos], nombres)
+    log(f"  Catalogo listo en {time.perf_counter() - inicio:.1f} s")
+
+    resumenes = [None] * len(trabajos)
+
+    def informar(i, r):
+        resumenes[i] = r
+        hechos = sum(x is not None for x in resumenes)
+        nombre = os.path.basename(r["libro"])
+        if r["error"]:
+            log(f"[{hechos}/{len(trabajos)}] {nombre}: ERROR {r['error']}", "ERROR")
+        else:
+            log(f"[{hechos}/{len(trabajos)}] {nombre} al {r['fecha_referencia']}: {r['alertas']} alertas, "
+                f"{r['cambios']} datos actualizados ({r['segundos']:.1f} s)")
+
+    if procesos <= 1 or len(trabajos) == 1:
+        for i, t in enumerate(trabajos):
+            informar(i, auditar_libro(t, raiz, dias_alerta, nombres))
+    else:
+        with ProcessPoolExecutor(max_workers=min(procesos, len(trabajos)),
+                                 initializer=_iniciar_proceso, initargs=(catalogos,)) as pool:
+            futuros = {pool.submit(auditar_libro, t, raiz, dias_alerta, nombres): i
+                       for i, t in enumerate(trabajos)}
+            for futuro in as_completed(futuros):
+                informar(futuros[futuro], futuro.result())
+
+    log(f"Lote terminado en {time.perf_counter() - inicio:.1f} s "
+        f"({sum(1 for r in resumenes if r['error'])} con error)")
+    return resumenes
+
+
+# ==========================
+# CLI
+# ==========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="procesar.py lote",
+                                     description="Re-auditoria de varios libros con un catalogo de volcados compartido")
+    parser.add_argument("libros", nargs="+", help="Libros a auditar; 'libro.xlsx@AAAA-MM-DD' fija su fecha de referencia")
+    parser.add_argument("--raiz", default=r"C:\Automatizacion_Excel", help="Carpeta raiz del proyecto")
+    parser.add_argument("--fecha", type=date.fromisoformat, default=None,
+                        help="Fecha de referencia de los libros sin '@fecha' (default: hoy)")
+    parser.add_argument("--dias-alerta", type=int, default=90)
+    parser.add_argument("--ambientes", nargs="+", default=None,
+                        help="Ambientes (default: todos los descubiertos)")
+    parser.add_argument("--procesos", type=int, default=1, help="Libros auditados en paralelo (default: 1)")
+    parser.add_argument("--salida", default=None, help="Carpeta del lote (default: RAIZ/LOTE)")
+    args = parser.parse_args(argv)
+
+    salida   = args.salida or os.path.join(args.raiz, CARPETA_LOTE)
+    trabajos = trabajos_lote(args.libros, args.fecha, salida)
+    faltan   = [t["libro"] for t in trabajos if not os.path.exists(t["libro"])]
+    if faltan:
+        for libro in faltan:
+            log(f"No existe el libro: {libro}", "ERROR")
+        return 1
+
+    resumenes = ejecutar_lote(args.raiz, trabajos, args.dias_alerta, args.ambientes, args.procesos)
+    os.makedirs(salida, exist_ok=True)
+    ruta = os.path.join(salida, NOMBRE_RESUMEN)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump({"fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "raiz": args.raiz,
+                   "dias_alerta": args.dias_alerta, "libros": resumenes}, f, ensure_ascii=False, indent=1)
+    log(f"Resumen del lote: {ruta}")
+    return 1 if any(r["error"] for r in resumenes) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,183 @@
+"""
+MATERIALIZACION DE ARCHIVOS E INTERCAMBIO ATOMICO v1.0
+- Copia sin duplicar datos cuando el sistema de archivos lo permite:
+  enlace duro (archivos sin cambios), reflink FICLONE (Btrfs/XFS/APFS),
+  os.copy_file_range y os.sendfile; shutil.copy2 como ultimo recurso
+- El destino nunca se escribe en sitio: se desenlaza y se crea de nuevo, asi
+  un enlace duro compartido con el arbol anterior no se modifica
+- Arbol nuevo en una carpeta hermana oculta (.<AMB>.nuevo-<pid>) que se
+  intercambia con el destino de forma atomica (renameat2 RENAME_EXCHANGE en
+  Linux) o con dos renombres consecutivos; la auditoria nunca ve una carpeta
+  a medio actualizar
+- recuperar() deja el destino en un estado consistente si una ejecucion
+  anterior se corto en medio del intercambio
+"""
+
+import os
+import shutil
+
+
+METODO_ENLACE   = "enlace"
+METODO_REFLINK  = "reflink"
+METODO_RANGO    = "copy_file_range"
+METODO_SENDFILE = "sendfile"
+METODO_COPIA    = "copia"
+
+FICLONE = 0x40049409   # ioctl de Linux para clonar un archivo completo
+
+_BLOQUE = 8 * 1024 * 1024
+
+
+# ==========================
+# COPIA DE UN ARCHIVO
+# ==========================
+def _reflink(fd_src, fd_dst):
+    import fcntl   # no existe en Windows: ImportError -> siguiente metodo
+    fcntl.ioctl(fd_dst, FICLONE, fd_src)
+
+
+def _copiar_por_rango(fd_src, fd_dst, tam):
+    restante = tam
+    while restante > 0:
+        n = os.copy_file_range(fd_src, fd_dst, min(restante, _BLOQUE))
+        if n == 0:
+            break
+        restante -= n
+    if restante:
+        raise OSError("copy_file_range incompleto")
+
+
+def _copiar_por_sendfile(fd_src, fd_dst, tam):
+    enviado = 0
+    while enviado < tam:
+        n = os.sendfile(fd_dst, fd_src, enviado, min(tam - enviado, _BLOQUE))
+        if n == 0:
+            break
+        enviado += n
+    if enviado != tam:
+        raise OSError("sendfile incompleto")
+
+
+def copiar(src, dst):
+    """
+    Copia src en dst (reemplazando dst sin escribirlo en sitio) con el metodo
+    mas barato disponible. Conserva fechas como shutil.copy2. Retorna el metodo.
+    """
+    if os.path.lexists(dst):
+        os.remove(dst)
+    tam = os.path.getsize(src)
+
+    with open(src, "rb") as f_src:
+        for metodo, funcion in ((METODO_REFLINK, lambda a, b: _reflink(a, b)),
+                                (METODO_RANGO, lambda a, b: _copiar_por_rango(a, b, tam)),
+                                (METODO_SENDFILE, lambda a, b: _copiar_por_sendfile(a, b, tam))):
+            if metodo == METODO_RANGO and not hasattr(os, "copy_file_range"):
+                continue
+            if metodo == METODO_SENDFILE and not hasattr(os, "sendfile"):
+                continue
+            try:
+                with open(dst, "wb") as f_dst:
+                    funcion(f_src.fileno(), f_dst.fileno())
+                shutil.copystat(src, dst)
+                return metodo
+            except (OSError, ImportError, ValueError):
+                f_src.seek(0)
+                if os.path.lexists(dst):
+                    os.remove(dst)
+
+    shutil.copy2(src, dst)
+    return METODO_COPIA
+
+
+def enlazar(src, dst):
+    """Enlace duro de src en dst; si no se puede (otro volumen, FAT) copia."""
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        os.link(src, dst)
+        return METODO_ENLACE
+    except (OSError, AttributeError, NotImplementedError):
+        return copiar(src, dst)
+
+
+# ==========================
+# ARBOL NUEVO E INTERCAMBIO
+# ==========================
+def _hermana(destino, sufijo):
+    padre, nombre = os.path.split(os.path.normpath(destino))
+    return os.path.join(padre, f".{nombre}.{sufijo}-{os.getpid()}")
+
+
+def preparar_arbol(destino):
+    """
+    Carpeta hermana con el contenido actual del destino enlazado (sin copiar
+    datos). Los cambios se hacen ahi y luego se publica con intercambiar().
+    """
+    nuevo = _hermana(destino, "nuevo")
+    if os.path.exists(nuevo):
+        shutil.rmtree(nuevo)
+    os.makedirs(nuevo)
+    if os.path.isdir(destino):
+        with os.scandir(destino) as it:
+            for e in it:
+                if e.is_file(follow_symlinks=False):
+                    enlazar(e.path, os.path.join(nuevo, e.name))
+    return nuevo
+
+
+def _renameat2_exchange(a, b):
+    """Intercambio atomico de dos rutas (Linux >= 3.15). False si no esta disponible."""
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        renameat2 = libc.renameat2
+    except (OSError, AttributeError):
+        return False
+    AT_FDCWD, RENAME_EXCHANGE = -100, 2
+    r = renameat2(AT_FDCWD, os.fsencode(a), AT_FDCWD, os.fsencode(b), RENAME_EXCHANGE)
+    return r == 0
+
+
+def intercambiar(nuevo, destino):
+    """
+    Publica 'nuevo' como 'destino'. Con RENAME_EXCHANGE el cambio es un solo
+    paso atomico; si no, destino -> .viejo y nuevo -> destino (el hueco entre
+    ambos renombres es una carpeta ausente, nunca una a medio escribir).
+    """
+    if not os.path.exists(destino):
+        os.rename(nuevo, destino)
+        return
+    if _renameat2_exchange(nuevo, destino):
+        shutil.rmtree(nuevo, ignore_errors=True)   # 'nuevo' ahora tiene el arbol anterior
+        return
+    viejo = _hermana(destino, "viejo")
+    if os.path.exists(viejo):
+        shutil.rmtree(viejo)
+    os.rename(destino, viejo)
+    os.rename(nuevo, destino)
+    shutil.rmtree(viejo, ignore_errors=True)
+
+
+def descartar(nuevo):
+    shutil.rmtree(nuevo, ignore_errors=True)
+
+
+def recuperar(destino, log=None):
+    """
+    Limpia restos de intercambios interrumpidos. Si el destino no existe y
+    quedo un .viejo, se restaura; los .nuevo incompletos se eliminan.
+    """
+    padre, nombre = os.path.split(os.path.normpath(destino))
+    if not os.path.isdir(padre):
+        return
+    restos = sorted(d for d in os.listdir(padre) if d.startswith(f".{nombre}."))
+    for d in restos:
+        ruta = os.path.join(padre, d)
+        if ".viejo-" in d and not os.path.exists(destino):
+            os.rename(ruta, destino)
+            if log:
+                log(f"    Restaurado {nombre} desde {d} (intercambio interrumpido)", "WARN")
+        else:
+            shutil.rmtree(ruta, ignore_errors=True)
+            if log:
+                log(f"    Eliminado resto de staging anterior: {d}", "WARN")
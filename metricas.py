@@ -0,0 +1,103 @@
+"""
+METRICAS PARA PROMETHEUS v1.0
+- Archivo en formato textfile de Prometheus (node_exporter --collector.textfile)
+  por proceso: RAIZ/METRICAS/auditoria.prom y RAIZ/METRICAS/staging.prom
+- Duracion por fase con un cronometro que cierra la fase anterior al abrir la
+  siguiente (sin reestructurar el proceso en bloques 'with')
+- Contadores y gauges con etiquetas; escritura atomica al final de la
+  ejecucion (archivo temporal + os.replace): el colector nunca lee un archivo
+  a medio escribir
+"""
+
+import os
+import time
+
+
+CARPETA_DEFAULT = "METRICAS"
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _numero(valor):
+    if isinstance(valor, bool):
+        return "1" if valor else "0"
+    if isinstance(valor, int):
+        return str(valor)
+    return repr(float(valor))
+
+
+# ==========================
+# REGISTRO DE METRICAS
+# ==========================
+class Metricas:
+    def __init__(self, prefijo):
+        self.prefijo  = prefijo
+        self._series  = {}   # nombre -> {"tipo", "ayuda", "valores": {etiquetas: valor}}
+        self._fase    = None
+        self._t_fase  = None
+
+    def _serie(self, nombre, tipo, ayuda):
+        return self._series.setdefault(f"{self.prefijo}_{nombre}",
+                                       {"tipo": tipo, "ayuda": ayuda, "valores": {}})
+
+    def gauge(self, nombre, valor, ayuda="", **etiquetas):
+        self._serie(nombre, "gauge", ayuda)["valores"][tuple(sorted(etiquetas.items()))] = valor
+
+    def contador(self, nombre, valor, ayuda="", **etiquetas):
+        """Contador de la ejecucion (se fija el total; cada archivo es una ejecucion nueva)."""
+        self._serie(nombre, "counter", ayuda)["valores"][tuple(sorted(etiquetas.items()))] = valor
+
+    def ratio(self, nombre, aciertos, fallos, ayuda="", **etiquetas):
+        total = aciertos + fallos
+        self.gauge(nombre, aciertos / total if total else 0.0, ayuda, **etiquetas)
+
+    # --- cronometro de fases ---
+    def fase(self, nombre):
+        """Cierra la fase en curso (si hay) y empieza a medir 'nombre'."""
+        ahora = time.perf_counter()
+        if self._fase is not None:
+            self._acumular(self._fase, ahora - self._t_fase)
+        self._fase, self._t_fase = nombre, ahora
+
+    def terminar_fase(self):
+        if self._fase is not None:
+            self._acumular(self._fase, time.perf_counter() - self._t_fase)
+            self._fase = None
+
+    def _acumular(self, fase, segundos):
+        valores = self._serie("fase_duracion_segundos", "gauge", "Duracion de cada fase")["valores"]
+        clave = (("fase", fase),)
+        valores[clave] = valores.get(clave, 0.0) + segundos
+
+    # --- salida ---
+    def texto(self):
+        lineas = []
+        for nombre in sorted(self._series):
+            serie = self._series[nombre]
+            if serie["ayuda"]:
+                lineas.append(f"# HELP {nombre} {serie['ayuda']}")
+            lineas.append(f"# TYPE {nombre} {serie['tipo']}")
+            for etiquetas, valor in sorted(serie["valores"].items()):
+                if etiquetas:
+                    et = ",".join(f'{k}="{_escapar(v)}"' for k, v in etiquetas)
+                    lineas.append(f"{nombre}{{{et}}} {_numero(valor)}")
+                else:
+                    lineas.append(f"{nombre} {_numero(valor)}")
+        return "\n".join(lineas) + "\n"
+
+    def escribir(self, ruta):
+        """Escritura atomica del archivo .prom."""
+        self.terminar_fase()
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        tmp = f"{ruta}.{os.getpid()}.tmp"   # el colector ignora lo que no termina en .prom
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.texto())
+        os.replace(tmp, ruta)
+        return ruta
+
+
+def ruta_metricas(raiz, carpeta, proceso):
+    """RAIZ/METRICAS/<proceso>.prom (o la carpeta indicada por CLI)."""
+    return os.path.join(carpeta or os.path.join(raiz, CARPETA_DEFAULT), proceso + ".prom")
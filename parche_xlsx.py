@@ -0,0 +1,376 @@
+"""
+PARCHE XLSX v1.0
+- Aplica cambios a nivel de celda (valor y/o relleno) directamente sobre el zip
+- Solo se reescriben las partes xl/worksheets/sheetN.xml afectadas y
+  xl/styles.xml (fills y cellXfs nuevos); el resto se copia sin tocar
+- Los valores se escriben como inlineStr: sharedStrings.xml no se modifica;
+  las fechas ("fecha": true) como numero de serie con formato de fecha
+- Reglas de formato condicional de vencimiento por hoja (formato_condicional.py):
+  se reemplazan las propias, con sus dxfs en styles.xml
+- Solo las hojas con cambios se parsean y reescriben; el resto de las partes
+  se copia en bloques con la API publica de zipfile, sin cargarlas en memoria
+- El libro se escribe como .tmp y se renombra al terminar
+"""
+
+import os
+import re
+import copy
+import shutil
+import zipfile
+import posixpath
+from datetime import date
+from html import escape, unescape
+
+import formato_condicional
+
+
+# ==========================
+# UTILIDADES
+# ==========================
+_RE_REF = re.compile(r"^([A-Z]+)(\d+)$")
+
+
+def _col_a_indice(letras):
+    n = 0
+    for ch in letras:
+        n = n * 26 + (ord(ch) - 64)
+    return n
+
+
+def _partir_ref(ref):
+    m = _RE_REF.match(ref)
+    return _col_a_indice(m.group(1)), int(m.group(2))
+
+
+def _attr(tag, nombre):
+    m = re.search(r'\s' + nombre + r'="([^"]*)"', tag)
+    return m.group(1) if m else None
+
+
+def _fijar_attr(tag, nombre, valor):
+    """Reemplaza o agrega un atributo en la etiqueta de apertura 'tag'."""
+    if re.search(r'\s' + nombre + r'="[^"]*"', tag):
+        return re.sub(r'(\s' + nombre + r'=")[^"]*(")', lambda m: m.group(1) + valor + m.group(2), tag, count=1)
+    cierre = "/>" if tag.endswith("/>") else ">"
+    return tag[:-len(cierre)] + f' {nombre}="{valor}"' + cierre
+
+
+def _quitar_attr(tag, nombre):
+    return re.sub(r'\s' + nombre + r'="[^"]*"', "", tag, count=1)
+
+
+# ==========================
+# MAPA HOJA -> PARTE XML
+# ==========================
+def mapa_hojas(zin):
+    """{nombre_hoja: 'xl/worksheets/sheetN.xml'} leyendo workbook.xml y sus rels."""
+    wb_xml = zin.read("xl/workbook.xml").decode("utf-8")
+    rels   = zin.read("xl/_rels/workbook.xml.rels").decode("utf-8")
+    destinos = {}
+    for rel in re.finditer(r"<Relationship\b[^>]*>", rels):
+        tag = rel.group(0)
+        destinos[_attr(tag, "Id")] = _attr(tag, "Target")
+    hojas = {}
+    for hoja in re.finditer(r"<sheet\b[^>]*>", wb_xml):
+        tag    = hoja.group(0)
+        nombre = unescape(_attr(tag, "name"))
+        target = destinos.get(_attr(tag, "r:id"), "")
+        ruta   = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+        hojas[nombre] = ruta
+    return hojas
+
+
+# ==========================
+# ESTILOS
+# ==========================
+class _Estilos:
+    """Agrega fills y cellXfs clonados a styles.xml bajo demanda."""
+
+    def __init__(self, xml):
+        self.xml    = xml
+        m_fills     = re.search(r"<fills\b[^>]*>(.*?)</fills>", xml, re.DOTALL)
+        m_xfs       = re.search(r"<cellXfs\b[^>]*>(.*?)</cellXfs>", xml, re.DOTALL)
+        m_dxfs      = re.search(r"<dxfs\b[^>]*/>|<dxfs\b[^>]*>(.*?)</dxfs>", xml, re.DOTALL)
+        self.fills  = re.findall(r"<fill\b.*?</fill>|<fill\b[^>]*/>", m_fills.group(1), re.DOTALL)
+        self.xfs    = re.findall(r"<xf\b[^>]*/>|<xf\b[^>]*>.*?</xf>", m_xfs.group(1), re.DOTALL)
+        self.dxfs   = re.findall(r"<dxf\b.*?</dxf>|<dxf\b[^>]*/>", (m_dxfs.group(1) or "") if m_dxfs else "",
+                                 re.DOTALL)
+        self.n_fills_orig = len(self.fills)
+        self.n_xfs_orig   = len(self.xfs)
+        self.n_dxfs_orig  = len(self.dxfs)
+        self._fill_ids = {}
+        self._xf_ids   = {}
+        self._dxf_ids  = {}
+
+    def _fill_id(self, color):
+        if color is None:
+            return 0   # fills[0] es siempre patternType="none"
+        if color not in self._fill_ids:
+            self.fills.append(
+                f'<fill><patternFill patternType="solid"><fgColor rgb="FF{color}"/>'
+                f'<bgColor indexed="64"/></patternFill></fill>'
+            )
+            self._fill_ids[color] = len(self.fills) - 1
+        return self._fill_ids[color]
+
+    def xf_con_fill(self, xf_base, color):
+        """Indice de un cellXfs igual a xf_base pero con el relleno indicado."""
+        clave = (xf_base, color)
+        if clave not in self._xf_ids:
+            base  = self.xfs[xf_base] if xf_base < len(self.xfs) else self.xfs[0]
+            apert = re.match(r"<xf\b[^>]*>", base).group(0)
+            nueva = _fijar_attr(apert, "fillId", str(self._fill_id(color)))
+            nueva = _fijar_attr(nueva, "applyFill", "1")
+            self.xfs.append(nueva + base[len(apert):])
+            self._xf_ids[clave] = len(self.xfs) - 1
+        return self._xf_ids[clave]
+
+    def xf_con_formato(self, xf_base, num_fmt):
+        """Indice de un cellXfs igual a xf_base pero con el formato de numero indicado."""
+        clave = (xf_base, "numFmt", num_fmt)
+        if clave not in self._xf_ids:
+            base  = self.xfs[xf_base] if xf_base < len(self.xfs) else self.xfs[0]
+            apert = re.match(r"<xf\b[^>]*>", base).group(0)
+            nueva = _fijar_attr(apert, "numFmtId", str(num_fmt))
+            nueva = _fijar_attr(nueva, "applyNumberFormat", "1")
+            self.xfs.append(nueva + base[len(apert):])
+            self._xf_ids[clave] = len(self.xfs) - 1
+        return self._xf_ids[clave]
+
+    def dxf_relleno(self, color):
+        """Indice de un estilo diferencial (formato condicional) con relleno solido."""
+        if color not in self._dxf_ids:
+            dxf = (f'<dxf><fill><patternFill patternType="solid"><fgColor rgb="FF{color}"/>'
+                   f'<bgColor rgb="FF{color}"/></patternFill></fill></dxf>')
+            if dxf not in self.dxfs:   # el mismo libro re-auditado ya lo tiene
+                self.dxfs.append(dxf)
+            self._dxf_ids[color] = self.dxfs.index(dxf)
+        return self._dxf_ids[color]
+
+    def modificado(self):
+        return (len(self.fills) != self.n_fills_orig or len(self.xfs) != self.n_xfs_orig
+                or len(self.dxfs) != self.n_dxfs_orig)
+
+    def serializar(self):
+        xml = re.sub(r"<fills\b[^>]*>.*?</fills>",
+                     lambda _: f'<fills count="{len(self.fills)}">' + "".join(self.fills) + "</fills>",
+                     self.xml, count=1, flags=re.DOTALL)
+        xml = re.sub(r"<cellXfs\b[^>]*>.*?</cellXfs>",
+                     lambda _: f'<cellXfs count="{len(self.xfs)}">' + "".join(self.xfs) + "</cellXfs>",
+                     xml, count=1, flags=re.DOTALL)
+        if len(self.dxfs) != self.n_dxfs_orig:
+            dxfs = f'<dxfs count="{len(self.dxfs)}">' + "".join(self.dxfs) + "</dxfs>"
+            if re.search(r"<dxfs\b", xml):
+                xml = re.sub(r"<dxfs\b[^>]*/>|<dxfs\b[^>]*>.*?</dxfs>", lambda _: dxfs, xml, count=1, flags=re.DOTALL)
+            elif "</cellStyles>" in xml:
+                xml = xml.replace("</cellStyles>", "</cellStyles>" + dxfs, 1)
+            else:
+                xml = xml.replace("</cellXfs>", "</cellXfs>" + dxfs, 1)
+        return xml
+
+
+# ==========================
+# PARCHE DE UNA HOJA
+# ==========================
+_RE_FILA  = re.compile(r"<row\b[^>]*?/>|<row\b[^>]*>.*?</row>", re.DOTALL)
+_RE_CELDA = re.compile(r"<c\b[^>]*?/>|<c\b[^>]*>.*?</c>", re.DOTALL)
+
+_SIN_CAMBIO  = object()
+_EPOCA_EXCEL = date(1899, 12, 30)   # dia 0 del sistema de fechas 1900 de Excel
+
+# Elementos de <worksheet> que van despues de <conditionalFormatting> (orden del esquema)
+_RE_DESPUES_CF = re.compile(
+    r"<(?:dataValidations|hyperlinks|printOptions|pageMargins|pageSetup|headerFooter|rowBreaks|colBreaks|"
+    r"customProperties|cellWatches|ignoredErrors|smartTags|drawing|legacyDrawing|legacyDrawingHF|picture|"
+    r"oleObjects|controls|webPublishItems|tableParts|extLst)\b")
+_RE_CF       = re.compile(r"<conditionalFormatting\b[^>]*>.*?</conditionalFormatting>", re.DOTALL)
+
+
+def _nueva_celda(celda_xml, ref, valor, color, estilos):
+    """XML de la celda con el valor y/o relleno aplicados."""
+    if celda_xml:
+        apert = re.match(r"<c\b[^>]*?/?>", celda_xml).group(0)
+        if apert.endswith("/>"):
+            apert, cuerpo = apert[:-2] + ">", ""
+        else:
+            cuerpo = celda_xml[len(apert):-len("</c>")]
+    else:
+        apert, cuerpo = f'<c r="{ref}">', ""
+
+    if color is not _SIN_CAMBIO:
+        xf    = int(_attr(apert, "s") or 0)
+        apert = _fijar_attr(apert, "s", str(estilos.xf_con_fill(xf, color)))
+
+    if isinstance(valor, date):
+        xf     = int(_attr(apert, "s") or 0)
+        apert  = _fijar_attr(_quitar_attr(apert, "t"), "s",
+                             str(estilos.xf_con_formato(xf, formato_condicional.ID_FORMATO_FECHA)))
+        cuerpo = f"<v>{(valor - _EPOCA_EXCEL).days}</v>"
+    elif valor is not _SIN_CAMBIO:
+        if valor is None or valor == "":
+            apert, cuerpo = _quitar_attr(apert, "t"), ""
+        else:
+            apert  = _fijar_attr(apert, "t", "inlineStr")
+            cuerpo = f'<is><t xml:space="preserve">{escape(str(valor), quote=False)}</t></is>'
+
+    return apert + cuerpo + "</c>"
+
+
+def _parchar_fila(fila_xml, num_fila, cambios_fila, estilos):
+    if fila_xml is None:
+        apert, cuerpo = f'<row r="{num_fila}">', ""
+    elif fila_xml.endswith("/>") and "</row>" not in fila_xml:
+        apert, cuerpo = fila_xml[:-2] + ">", ""
+    else:
+        apert  = re.match(r"<row\b[^>]*>", fila_xml).group(0)
+        cuerpo = fila_xml[len(apert):-len("</row>")]
+
+    celdas = [(m.group(0), _attr(m.group(0), "r")) for m in _RE_CELDA.finditer(cuerpo)]
+    por_ref = {ref: i for i, (_, ref) in enumerate(celdas)}
+    for ref, (valor, color) in cambios_fila.items():
+        if ref in por_ref:
+            i = por_ref[ref]
+            celdas[i] = (_nueva_celda(celdas[i][0], ref, valor, color, estilos), ref)
+        else:
+            celdas.append((_nueva_celda(None, ref, valor, color, estilos), ref))
+    celdas.sort(key=lambda c: _partir_ref(c[1])[0])
+    return apert + "".join(c for c, _ in celdas) + "</row>"
+
+
+def parchar_hoja(xml, cambios_hoja, estilos):
+    """
+    cambios_hoja: {ref: (valor, color)} con _SIN_CAMBIO en lo que no se toca.
+    Recorre las filas una vez y reescribe solo las afectadas.
+    """
+    por_fila = {}
+    for ref, cambio in cambios_hoja.items():
+        por_fila.setdefault(_partir_ref(ref)[1], {})[ref] = cambio
+
+    m_datos = re.search(r"<sheetData\b([^>]*?)\s*/>|<sheetData\b([^>]*)>(.*?)</sheetData>", xml, re.DOTALL)
+    attrs   = m_datos.group(1) if m_datos.group(1) is not None else m_datos.group(2)
+    cuerpo  = m_datos.group(3) or ""
+
+    partes, fin_prev, vistas = [], 0, set()
+    for m in _RE_FILA.finditer(cuerpo):
+        num = int(_attr(m.group(0), "r"))
+        # Filas nuevas que van antes de esta
+        for n in sorted(f for f in por_fila if f < num and f not in vistas):
+            partes.append(cuerpo[fin_prev:m.start()])
+            fin_prev = m.start()
+            partes.append(_parchar_fila(None, n, por_fila[n], estilos))
+            vistas.add(n)
+        if num in por_fila:
+            partes.append(cuerpo[fin_prev:m.start()])
+            partes.append(_parchar_fila(m.group(0), num, por_fila[num], estilos))
+            fin_prev = m.end()
+            vistas.add(num)
+    partes.append(cuerpo[fin_prev:])
+    for n in sorted(f for f in por_fila if f not in vistas):
+        partes.append(_parchar_fila(None, n, por_fila[n], estilos))
+
+    nuevo = f"<sheetData{attrs}>" + "".join(partes) + "</sheetData>"
+    return xml[:m_datos.start()] + nuevo + xml[m_datos.end():]
+
+
+def reemplazar_reglas(xml, regla, estilos):
+    """
+    Quita las reglas de vencimiento propias de la hoja e inserta las nuevas
+    (regla: {"rangos", "dias"}). Las reglas ajenas se conservan.
+    """
+    def propia(m):
+        formulas = [unescape(f) for f in re.findall(r"<formula>(.*?)</formula>", m.group(0), re.DOTALL)]
+        return bool(formulas) and all(formato_condicional.es_regla_propia(f) for f in formulas)
+
+    xml = _RE_CF.sub(lambda m: "" if propia(m) else m.group(0), xml)
+    prioridades = [int(p) for p in re.findall(r'<cfRule\b[^>]*\spriority="(\d+)"', xml)]
+    nuevas = formato_condicional.xml_reglas(
+        regla["rangos"], regla["dias"], estilos.dxf_relleno(formato_condicional.COLOR_VENCIDO),
+        estilos.dxf_relleno(formato_condicional.COLOR_PROXIMO), max(prioridades, default=0) + 1)
+
+    fin_datos = xml.index("</sheetData>") + len("</sheetData>") if "</sheetData>" in xml else 0
+    despues   = [m.start() for m in (_RE_CF.search(xml, fin_datos), _RE_DESPUES_CF.search(xml, fin_datos)) if m]
+    pos = min(despues) if despues else xml.rindex("</worksheet>")
+    return xml[:pos] + nuevas + xml[pos:]
+
+
+# ==========================
+# COPIA DE PARTES SIN CAMBIOS
+# ==========================
+TAM_BLOQUE_COPIA = 1024 * 1024
+
+
+def _copiar_parte(zin, zout, info):
+    """
+    Copia una parte sin cambios por la API publica de zipfile, en bloques
+    (no se carga la parte entera en memoria). Conserva nombre, fecha y
+    metodo de compresion; zipfile arma las cabeceras y el CRC.
+    """
+    with zin.open(info) as origen, zout.open(copy.copy(info), "w") as destino:
+        shutil.copyfileobj(origen, destino, TAM_BLOQUE_COPIA)
+
+
+# ==========================
+# API
+# ==========================
+def agrupar_cambios(cambios):
+    """
+    Lista de cambios [{"hoja", "celda", "valor"?, "fill"?}] ->
+    {hoja: {ref: (valor, color)}}. El ultimo cambio de cada campo gana.
+    """
+    agrupados = {}
+    for c in cambios:
+        if "formato_condicional" in c:
+            continue
+        actual = agrupados.setdefault(c["hoja"], {}).get(c["celda"], (_SIN_CAMBIO, _SIN_CAMBIO))
+        valor  = c["valor"] if "valor" in c else actual[0]
+        if c.get("fecha"):
+            valor = date.fromisoformat(valor)
+        color  = c["fill"]  if "fill"  in c else actual[1]
+        agrupados[c["hoja"]][c["celda"]] = (valor, color)
+    return agrupados
+
+
+def aplicar_parche(xlsx_in, xlsx_out, cambios):
+    """
+    Copia xlsx_in a xlsx_out aplicando los cambios de celda. Las partes no
+    afectadas se copian tal cual, en bloques; xlsx_out se reemplaza recien
+    al terminar.
+    Retorna la cantidad de celdas parchadas.
+    """
+    agrupados = agrupar_cambios(cambios)
+    reglas    = {c["hoja"]: c["formato_condicional"] for c in cambios if "formato_condicional" in c}
+
+    with zipfile.ZipFile(xlsx_in) as zin:
+        hojas   = mapa_hojas(zin)
+        estilos = _Estilos(zin.read("xl/styles.xml").decode("utf-8"))
+
+        nuevas_partes = {}
+        for hoja in list(agrupados) + [h for h in reglas if h not in agrupados]:
+            parte = hojas.get(hoja)
+            if parte is None:
+                raise KeyError(f"Hoja no encontrada en el libro: {hoja}")
+            xml = zin.read(parte).decode("utf-8")
+            if hoja in agrupados:
+                xml = parchar_hoja(xml, agrupados[hoja], estilos)
+            if hoja in reglas:
+                xml = reemplazar_reglas(xml, reglas[hoja], estilos)
+            nuevas_partes[parte] = xml.encode("utf-8")
+        if estilos.modificado():
+            nuevas_partes["xl/styles.xml"] = estilos.serializar().encode("utf-8")
+
+        # Se escribe aparte y se renombra: una falla a mitad de camino no deja un libro corrupto
+        tmp = xlsx_out + ".tmp"
+        try:
+            with zipfile.ZipFile(tmp, "w") as zout:
+                for info in zin.infolist():
+                    if info.filename in nuevas_partes:
+                        zout.writestr(copy.copy(info), nuevas_partes[info.filename])
+                    else:
+                        _copiar_parte(zin, zout, info)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+    os.replace(tmp, xlsx_out)
+
+    return sum(len(c) for c in agrupados.values())
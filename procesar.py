@@ -1,51 +1,220 @@
-import logging
-from datetime import datetime
-
-# Configure logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
-
-# Improve input validation
-def validate_input(data):
-    if not isinstance(data, list):
-        logger.error("Input data must be a list.")
-        return False
-    # Additional validation logic as needed
-    return True
-
-# Enhanced error handling example
-def safe_execute(func, *args, **kwargs):
-    try:
-        return func(*args, **kwargs)
-    except Exception as e:
-        logger.exception(f"An error occurred: {e}")
-
-# Example function to process data
-
-def process_data(data):
-    if not validate_input(data):
-        return
-    logger.info("Starting data processing...")
-    # Process data...
-    # Enhanced HTML report generation
-    generate_html_report(data)
-
-# Function to create an HTML report
-
-def generate_html_report(data):
-    logger.info("Generating HTML report...")
-    report_content = "<html><body><h1>Data Report</h1><table>"
-    for row in data:
-        # Assuming row is a dictionary
-        report_content += "<tr>" + \
-            ''.join([f'<td>{cell}</td>' for cell in row.values()]) + "</tr>"
-    report_content += "</table></body></html>"
-    # Save report to file
-    with open('report.html', 'w') as file:
-        file.write(report_content)
-    logger.info("Report generated successfully.")
-
-# Example usage
-if __name__ == '__main__':
-    data = [{'column1': 'value1', 'column2': 'value2'}]  # Sample data
-    safe_execute(process_data, data)
\ No newline at end of file
+"""
+PUNTO DE ENTRADA - AUDITORIA SSL v5.0
+- Subcomandos: auditar (default), vencimientos, reporte, staging, fragmentos,
+  almacen, lista, diff, coordinar, servicio, buscar, lote
+- Importaciones diferidas: openpyxl, json y el generador HTML se cargan solo
+  cuando el subcomando los necesita
+- 'vencimientos' lee los volcados de PROCESADOS sin abrir el Excel: apto para
+  tareas programadas y ciclos de vigilancia
+- --tiempo-arranque informa cuanto tardo el arranque hasta el subcomando
+
+Uso:
+  python procesar.py [auditar] [--raiz ...] [--dias-alerta N] [--reanudar] ...
+  python procesar.py vencimientos [--raiz ...] [--dias-alerta N]
+  python procesar.py reporte [--raiz ...]
+  python procesar.py staging [--raiz ...] [--no-auditoria]
+  python procesar.py fragmentos exportar|auditar|fusionar ...
+  python procesar.py almacen guardar|listar|restaurar|verificar ...
+  python procesar.py lista compactar|probar ...
+  python procesar.py diff [ANTERIOR ACTUAL] [--formato consola|json|html] ...
+  python procesar.py coordinar ejecutar|estado ...
+  python procesar.py servicio [--raiz ...] [--puerto N]
+  python procesar.py buscar TEXTO [--raiz ...] [--tipo auto|fp|serial|dn|alias]
+  python procesar.py lote LIBRO[@AAAA-MM-DD] [LIBRO ...] [--raiz ...] [--procesos N]
+"""
+
+import time
+_T0 = time.perf_counter()
+
+import os
+import sys
+
+
+RAIZ_DEFAULT = r"C:\Automatizacion_Excel"
+
+
+# ==========================
+# SUBCOMANDOS
+# ==========================
+def cmd_auditar(argv):
+    import auditoria
+    return auditoria.main(argv)
+
+
+def cmd_staging(argv):
+    import copiar
+    return copiar.main(argv)
+
+
+def cmd_fragmentos(argv):
+    import fragmentos
+    return fragmentos.main(argv)
+
+
+def cmd_almacen(argv):
+    import almacen
+    return almacen.main(argv)
+
+
+def cmd_lista(argv):
+    import reglas_lista
+    return reglas_lista.main(argv)
+
+
+def cmd_coordinar(argv):
+    import coordinador
+    return coordinador.main(argv)
+
+
+def cmd_servicio(argv):
+    import servicio_http
+    return servicio_http.main(argv)
+
+
+def cmd_buscar(argv):
+    import indice_invertido
+    return indice_invertido.main(argv)
+
+
+def cmd_lote(argv):
+    import lote
+    return lote.main(argv)
+
+
+def cmd_diff(argv):
+    import diff_libros
+    return diff_libros.main(argv)
+
+
+def cmd_reporte(argv):
+    import argparse
+    import ambientes
+    import reporte_html
+    from datetime import date
+
+    parser = argparse.ArgumentParser(prog="procesar.py reporte",
+                                     description="Regenera REPORTE_AUDITORIA.html desde LOG_PROCESAMIENTO.txt")
+    parser.add_argument("--raiz", default=RAIZ_DEFAULT, help="Carpeta raiz del proyecto")
+    parser.add_argument("--dias-alerta", type=int, default=90)
+    parser.add_argument("--ambientes", nargs="+", default=None,
+                        help="Ambientes (default: todos los descubiertos)")
+    args = parser.parse_args(argv)
+    rutas = _ambientes(args.raiz, args.ambientes)
+    hojas = ambientes.hojas_libro(os.path.join(args.raiz, "REPORTE_AUDITORIA.xlsx"))
+    ruteo = ambientes.tabla_ruteo(hojas, rutas)
+
+    archivo_log = os.path.join(args.raiz, "LOG_PROCESAMIENTO.txt")
+    if not os.path.exists(archivo_log):
+        print(f"No existe el log de procesamiento: {archivo_log}")
+        return 1
+    reporte_html.generar_html_reporte(archivo_log, os.path.join(args.raiz, "REPORTE_AUDITORIA.html"),
+                                      str(date.today()), args.dias_alerta, list(rutas), log=_log, ruteo=ruteo)
+    return 0
+
+
+def cmd_vencimientos(argv):
+    """
+    Chequeo rapido: fecha 'Not After' / 'until' de los volcados GSKit y keytool
+    (y de los PEM/DER/JKS/PKCS#12 leidos en forma nativa) de PROCESADOS/<AMB>.
+    Codigo de salida 1 si hay certificados vencidos.
+    """
+    import argparse
+    from datetime import date
+    import registro_parsers
+
+    parser = argparse.ArgumentParser(prog="procesar.py vencimientos",
+                                     description="Vencimientos desde los volcados, sin abrir el Excel")
+    parser.add_argument("--raiz", default=RAIZ_DEFAULT, help="Carpeta raiz del proyecto")
+    parser.add_argument("--dias-alerta", type=int, default=90)
+    parser.add_argument("--ambientes", nargs="+", default=None,
+                        help="Ambientes (default: todos los descubiertos)")
+    args = parser.parse_args(argv)
+
+    hoy      = date.today()
+    vencidos = proximos = 0
+    for ambiente, rutas in _ambientes(args.raiz, args.ambientes).items():
+        carpeta  = rutas["destino"]
+        catalogo = registro_parsers.indexar_carpeta(carpeta, log=_log)
+        for fname in registro_parsers.archivos_de_formato(catalogo, registro_parsers.FORMATO_GSKIT):
+            entrada = catalogo["archivos"][fname]["datos"]
+            if entrada:
+                vencidos, proximos = _clasificar(ambiente, fname, entrada.label, entrada.cert.vencimiento,
+                                                 hoy, args.dias_alerta, vencidos, proximos)
+        for formato in registro_parsers.FORMATOS_KEYSTORE:
+            for fname in registro_parsers.archivos_de_formato(catalogo, formato):
+                for alias, cert in (catalogo["archivos"][fname]["datos"] or {}).items():
+                    vencidos, proximos = _clasificar(ambiente, fname, alias, cert.vencimiento,
+                                                     hoy, args.dias_alerta, vencidos, proximos)
+
+    _log(f"Vencidos: {vencidos} | Proximos a vencer (<{args.dias_alerta} dias): {proximos}")
+    return 1 if vencidos else 0
+
+
+def _clasificar(ambiente, fname, alias, fecha, hoy, dias_alerta, vencidos, proximos):
+    """fecha: vencimiento ya evaluado del certificado (una vez por certificado internado)."""
+    if fecha is None:
+        return vencidos, proximos
+    dias = (fecha - hoy).days
+    if dias < 0:
+        _log(f"[{ambiente}] {fname} '{alias}': VENCIDO hace {-dias} dias ({fecha})", "VENC")
+        vencidos += 1
+    elif dias <= dias_alerta:
+        _log(f"[{ambiente}] {fname} '{alias}': PROXIMO A VENCER en {dias} dias ({fecha})", "ALERT")
+        proximos += 1
+    return vencidos, proximos
+
+
+def _ambientes(raiz, nombres):
+    import ambientes
+    hojas = ambientes.hojas_libro(os.path.join(raiz, "REPORTE_AUDITORIA.xlsx"))
+    return ambientes.filtrar(ambientes.descubrir(raiz, hojas), nombres)
+
+
+SUBCOMANDOS = {
+    "auditar":      cmd_auditar,
+    "vencimientos": cmd_vencimientos,
+    "reporte":      cmd_reporte,
+    "staging":      cmd_staging,
+    "fragmentos":   cmd_fragmentos,
+    "almacen":      cmd_almacen,
+    "lista":        cmd_lista,
+    "diff":         cmd_diff,
+    "coordinar":    cmd_coordinar,
+    "servicio":     cmd_servicio,
+    "buscar":       cmd_buscar,
+    "lote":         cmd_lote,
+}
+
+
+# ==========================
+# LOG (solo consola: cada subcomando pesado usa su propio log)
+# ==========================
+def _log(msg, nivel="INFO"):
+    print(f"[{nivel}] {msg}")
+
+
+# ==========================
+# DESPACHO
+# ==========================
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+
+    medir = "--tiempo-arranque" in argv
+    if medir:
+        argv.remove("--tiempo-arranque")
+
+    if argv and argv[0] in SUBCOMANDOS:
+        comando, resto = argv[0], argv[1:]
+    elif argv and argv[0] in ("-h", "--help"):
+        print(__doc__)
+        return 0
+    else:
+        comando, resto = "auditar", argv   # compatibilidad: 'procesar.py --raiz ...'
+
+    if medir:
+        print(f"[TIEMPO] Arranque hasta '{comando}': {(time.perf_counter() - _T0) * 1000:.1f} ms")
+    return SUBCOMANDOS[comando](resto) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
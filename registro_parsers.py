@@ -0,0 +1,330 @@
+"""
+REGISTRO DE PARSERS v1.0
+- Identifica el formato de cada volcado por su contenido, no por su nombre
+- Formatos: GSKit (-cert -details), keytool -list -v, manifiesto sha256,
+  inventario GSKit (-cert -list) o desconocido
+- Formatos nativos (x509_nativo.py): PEM, DER, JKS/JCEKS y PKCS#12 leidos
+  directamente, sin volcado de texto; los detectores 'binarios' reciben
+  los bytes en lugar del texto
+- Cache de deteccion y de parseo por hash de contenido (SHA256): un mismo
+  certificado CA repetido en varios ambientes se parsea una sola vez
+- Un solo barrido por carpeta: cada archivo se lee y parsea una vez
+- Los certificados se devuelven como registros compactos internados por
+  fingerprint (certificados.py)
+"""
+
+import os
+import re
+import hashlib
+import struct
+
+import certificados
+import x509_nativo
+
+
+FORMATO_GSKIT       = "gskit"
+FORMATO_KEYTOOL     = "keytool"
+FORMATO_SHA256      = "sha256"
+FORMATO_INVENTARIO  = "inventario"
+FORMATO_DESCONOCIDO = "desconocido"
+FORMATO_PEM         = "pem"
+FORMATO_DER         = "der"
+FORMATO_JKS         = "jks"
+FORMATO_PKCS12      = "pkcs12"
+
+FORMATOS_NATIVOS = (FORMATO_PEM, FORMATO_DER, FORMATO_JKS, FORMATO_PKCS12)
+# Formatos cuyos datos son {alias: Certificado}
+FORMATOS_KEYSTORE = (FORMATO_KEYTOOL,) + FORMATOS_NATIVOS
+
+BYTES_CABECERA = 4096   # bytes leidos para identificar el formato
+
+# Archivos que el staging (copiar.py) escribe en cada carpeta destino: no son volcados
+_RE_ARTEFACTO_STAGING = re.compile(r"^inventario_[^\\/]+\.txt$", re.IGNORECASE)
+
+
+# ==========================
+# PARSERS (reciben el texto ya leido)
+# ==========================
+def parsear_gskit(texto):
+    """Volcado 'gsk8capicmd -cert -details': un certificado por archivo (Entrada)."""
+    label  = re.search(r"^Label\s*:\s*(.+)$", texto, re.MULTILINE)
+    serial = re.search(r"^Serial\s*:\s*(.+)$", texto, re.MULTILINE)
+    sha1   = re.search(r"Fingerprint\s*:\s*SHA1\s*:\s*\n([\s\S]*?)(?=Fingerprint\s*:|$)", texto)
+    hasta  = re.search(r"^Not After\s*:\s*(.+)$", texto, re.MULTILINE)
+    sujeto = re.search(r"^Subject\s*:\s*(.+)$", texto, re.MULTILINE)
+    emisor = re.search(r"^Issuer\s*:\s*(.+)$", texto, re.MULTILINE)
+    if not label or not serial or not sha1:
+        return None
+    cert = certificados.internar(sha1.group(1), serial.group(1).strip(),
+                                 hasta.group(1).strip() if hasta else "",
+                                 sujeto.group(1).strip().strip('"') if sujeto else "",
+                                 emisor.group(1).strip().strip('"') if emisor else "")
+    return certificados.Entrada(label.group(1).strip().lower(), cert)
+
+
+def parsear_keytool(texto):
+    """Volcado 'keytool -list -v': {alias: Certificado}."""
+    resultado = {}
+    bloques = re.split(r"\n(?=Alias name:)", texto)
+    for bloque in bloques:
+        alias_m  = re.search(r"^Alias name:\s*(.+)$", bloque, re.MULTILINE)
+        serial_m = re.search(r"^Serial number:\s*([0-9a-fA-F]+)", bloque, re.MULTILINE)
+        sha1_m   = re.search(r"SHA1:\s*([0-9A-Fa-f:]+)", bloque)
+        valid_m  = re.search(r"^Valid from:.*?until:\s*(.+)$", bloque, re.MULTILINE)
+        owner_m  = re.search(r"^Owner:\s*(.+)$", bloque, re.MULTILINE)
+        issuer_m = re.search(r"^Issuer:\s*(.+)$", bloque, re.MULTILINE)
+        if alias_m and serial_m:
+            alias = alias_m.group(1).strip().lower()
+            resultado[alias] = certificados.internar(sha1_m.group(1) if sha1_m else "",
+                                                     serial_m.group(1).strip(),
+                                                     valid_m.group(1).strip() if valid_m else "",
+                                                     owner_m.group(1).strip() if owner_m else "",
+                                                     issuer_m.group(1).strip() if issuer_m else "")
+    return resultado
+
+
+def parsear_sha256(texto):
+    """Manifiesto 'shasum -a 256': {ruta: hash}."""
+    mapa = {}
+    for linea in texto.splitlines():
+        linea = linea.strip()
+        if not linea:
+            continue
+        partes = linea.split(None, 1)
+        if len(partes) == 2:
+            mapa[partes[1].strip()] = partes[0].strip()
+    return mapa
+
+
+def parsear_inventario(texto):
+    """
+    Inventario 'gsk8capicmd -cert -list' de varios keystores:
+    {ruta_keystore: [{"label", "tipo"}]}  (tipo: marcas * - ! #)
+    """
+    inventario = {}
+    actual     = None
+    for linea in texto.splitlines():
+        m = re.match(r"^Keystore\s+(\S.*)$", linea)
+        if m:
+            actual = m.group(1).strip()
+            inventario[actual] = []
+            continue
+        if actual is None or linea.startswith(("#", "Certificates found", "* default")):
+            continue
+        m = re.match(r"^([*\-!#]+)\t(.+)$", linea)
+        if m:
+            inventario[actual].append({
+                "tipo":  m.group(1),
+                "label": m.group(2).strip().strip('"'),
+            })
+    return inventario
+
+
+def _desde_der(pares):
+    """[(alias, der)] -> {alias: Certificado} con los campos decodificados del DER."""
+    resultado = {}
+    for alias, der in pares:
+        campos = x509_nativo.decodificar_der(der)
+        alias  = (alias or campos["cn"]).strip().lower()
+        clave, n = alias, 2
+        while clave in resultado:   # mismo CN repetido en un PEM con varios certificados
+            clave, n = f"{alias} ({n})", n + 1
+        resultado[clave] = certificados.internar(
+            campos["sha1"], campos["serial_hex"], campos["not_after"].strftime("%Y-%m-%d"),
+            campos["sujeto"], campos["emisor"])
+    return resultado
+
+
+def _nativo(extraer):
+    """Parser de un formato nativo: None si el contenido no se puede decodificar."""
+    def parser(contenido):
+        try:
+            pares = extraer(contenido)
+            return _desde_der(pares) if pares is not None else None
+        except (x509_nativo.ErrorDER, ValueError, IndexError, struct.error):
+            return None
+    return parser
+
+
+parsear_pem    = _nativo(lambda c: [("", der) for der in x509_nativo.certificados_pem(c)])
+parsear_der    = _nativo(lambda c: [("", c)])
+parsear_jks    = _nativo(x509_nativo.certificados_jks)
+parsear_pkcs12 = _nativo(x509_nativo.certificados_pkcs12)
+
+
+# ==========================
+# DETECTORES (reciben la cabecera decodificada, o los bytes si son binarios)
+# ==========================
+def _es_gskit(cabecera):
+    return bool(re.search(r"^Label\s*:", cabecera, re.MULTILINE))
+
+
+def _es_keytool(cabecera):
+    return bool(re.search(r"^(Keystore type:|Alias name:)", cabecera, re.MULTILINE))
+
+
+def _es_sha256(cabecera):
+    for linea in cabecera.splitlines():
+        if linea.strip():
+            return bool(re.match(r"^[0-9a-fA-F]{64}\s+\S", linea.strip()))
+    return False
+
+
+def _es_inventario(cabecera):
+    return bool(re.search(r"^Keystore\s+\S", cabecera, re.MULTILINE)
+                and "Certificates found" in cabecera)
+
+
+# Orden de evaluacion: el primer detector que acepta define el formato
+_REGISTRO = [
+    (FORMATO_GSKIT,      _es_gskit,             parsear_gskit,      False),
+    (FORMATO_KEYTOOL,    _es_keytool,           parsear_keytool,    False),
+    (FORMATO_SHA256,     _es_sha256,            parsear_sha256,     False),
+    (FORMATO_INVENTARIO, _es_inventario,        parsear_inventario, False),
+    (FORMATO_PEM,        x509_nativo.es_pem,    parsear_pem,        True),
+    (FORMATO_JKS,        x509_nativo.es_jks,    parsear_jks,        True),
+    (FORMATO_PKCS12,     x509_nativo.es_pkcs12, parsear_pkcs12,     True),
+    (FORMATO_DER,        x509_nativo.es_der,    parsear_der,        True),
+]
+
+
+def registrar_formato(formato, detector, parser, antes_de=None, binario=False):
+    """
+    Agrega un formato al registro. detector(cabecera) -> bool,
+    parser(texto) -> datos. Con binario=True ambos reciben bytes.
+    Con antes_de se inserta antes de ese formato.
+    """
+    entrada = (formato, detector, parser, binario)
+    if antes_de:
+        for i, (f, _, _, _) in enumerate(_REGISTRO):
+            if f == antes_de:
+                _REGISTRO.insert(i, entrada)
+                return
+    _REGISTRO.append(entrada)
+
+
+def _parser_de(formato):
+    for f, _, parser, binario in _REGISTRO:
+        if f == formato:
+            return parser, binario
+    return None, False
+
+
+# ==========================
+# DETECCION Y CACHE POR CONTENIDO
+# ==========================
+_cache_formatos = {}   # sha256 -> formato
+_cache_datos    = {}   # sha256 -> datos parseados
+
+# Contadores de la ejecucion (metricas.py)
+estadisticas = {"archivos_leidos": 0, "bytes_leidos": 0, "contenido_aciertos": 0,
+                "contenido_fallos": 0, "catalogo_aciertos": 0, "catalogo_fallos": 0}
+
+
+def _decodificar(contenido):
+    return contenido.decode("utf-8", errors="ignore").lstrip("\ufeff")
+
+
+def detectar_formato(contenido):
+    """Identifica el formato a partir de los primeros bytes del contenido."""
+    crudo    = contenido[:BYTES_CABECERA]
+    cabecera = _decodificar(crudo)
+    for formato, detector, _, binario in _REGISTRO:
+        if detector(crudo if binario else cabecera):
+            return formato
+    return FORMATO_DESCONOCIDO
+
+
+def detectar_archivo(ruta):
+    """Formato de un archivo leyendo solo su cabecera (sin hashear ni parsear el resto)."""
+    with open(ruta, "rb") as f:
+        return detectar_formato(f.read(BYTES_CABECERA))
+
+
+def leer_volcado(ruta):
+    """
+    Lee un archivo una vez y retorna {"formato", "sha256", "datos"}.
+    La deteccion y el parseo se cachean por hash de contenido.
+    """
+    with open(ruta, "rb") as f:
+        contenido = f.read()
+    digest = hashlib.sha256(contenido).hexdigest()
+    estadisticas["archivos_leidos"] += 1
+    estadisticas["bytes_leidos"]    += len(contenido)
+    estadisticas["contenido_aciertos" if digest in _cache_datos else "contenido_fallos"] += 1
+
+    formato = _cache_formatos.get(digest)
+    if formato is None:
+        formato = detectar_formato(contenido)
+        _cache_formatos[digest] = formato
+
+    if digest not in _cache_datos:
+        parser, binario = _parser_de(formato)
+        if parser is None:
+            _cache_datos[digest] = None
+        else:
+            _cache_datos[digest] = parser(contenido if binario else _decodificar(contenido))
+
+    return {"formato": formato, "sha256": digest, "datos": _cache_datos[digest]}
+
+
+# ==========================
+# CATALOGO POR CARPETA (un barrido)
+# ==========================
+_catalogos = {}
+
+
+def es_artefacto_staging(nombre):
+    """True para 'inventario_<prefijo>.txt' y demas archivos propios del staging."""
+    return bool(_RE_ARTEFACTO_STAGING.match(nombre))
+
+
+def indexar_carpeta(carpeta, log=None):
+    """
+    Recorre la carpeta una sola vez y clasifica cada archivo por contenido
+    (sin los archivos propios del staging).
+    Retorna {"archivos": {nombre: volcado}, "por_formato": {formato: [nombres]}}.
+    El resultado se memoriza por carpeta durante la ejecucion.
+    """
+    if carpeta in _catalogos:
+        estadisticas["catalogo_aciertos"] += 1
+        return _catalogos[carpeta]
+    estadisticas["catalogo_fallos"] += 1
+
+    catalogo = {"archivos": {}, "por_formato": {}}
+    if os.path.isdir(carpeta):
+        with os.scandir(carpeta) as it:
+            entradas = sorted((e for e in it if e.is_file() and not es_artefacto_staging(e.name)),
+                              key=lambda e: e.name)
+        for entrada in entradas:
+            try:
+                volcado = leer_volcado(entrada.path)
+            except Exception as e:
+                if log:
+                    log(f"Error leyendo {entrada.path}: {e}", "ERROR")
+                continue
+            catalogo["archivos"][entrada.name] = volcado
+            catalogo["por_formato"].setdefault(volcado["formato"], []).append(entrada.name)
+
+    _catalogos[carpeta] = catalogo
+    return catalogo
+
+
+def catalogos_indexados():
+    """{carpeta: catalogo} ya indexados en este proceso (para entregarlos a otro proceso)."""
+    return dict(_catalogos)
+
+
+def adoptar_catalogos(catalogos):
+    """Usa catalogos indexados en otro proceso en lugar de volver a leer esas carpetas."""
+    _catalogos.update(catalogos)
+
+
+def archivos_de_formato(catalogo, formato):
+    """Nombres de archivo del catalogo con el formato dado (orden alfabetico)."""
+    return catalogo["por_formato"].get(formato, [])
+
+
+def resumen_formatos(catalogo):
+    """Texto 'formato: n' para el log."""
+    return ", ".join(f"{f}: {len(n)}" for f, n in sorted(catalogo["por_formato"].items()))
@@ -0,0 +1,279 @@
+"""
+REGLAS DE LA LISTA MAESTRA v1.0
+- lista_maestra.txt admite, una por linea (sin distinguir mayusculas):
+    camaraprod_1_PC_default.out        nombre exacto
+    camaraprod_*_SC_*.out              patron glob (* ? [...])
+    re:^camaratest_\\d+_PC_.+\\.out$     expresion regular
+    !camaratest_*_old.out              denegacion (cualquiera de las anteriores)
+    # comentario
+- Las reglas se compilan una vez y se reparten por ambiente segun su prefijo
+  literal; las que no tienen prefijo de ambiente quedan en una particion
+  comun. Cada particion es un set de nombres exactos y una sola regex
+  combinada para globs/regex permitidos y otra para denegaciones: el costo de
+  autorizar un archivo no depende del largo de la lista
+- Los archivos descubiertos se agregan a lista_maestra.journal (solo
+  anexar); compactar() los incorpora a lista_maestra.txt y vacia el journal
+"""
+
+import os
+import re
+import fnmatch
+from datetime import datetime
+
+
+EXTENSION_JOURNAL  = ".journal"   # lista_maestra.txt -> lista_maestra.journal
+UMBRAL_COMPACTAR   = 200       # entradas en el journal que disparan la compactacion
+PREFIJO_REGEX      = "re:"
+PREFIJO_DENEGACION = "!"
+
+_METACARACTERES_GLOB = "*?["
+
+
+# ==========================
+# PARTICION DE UN AMBIENTE
+# ==========================
+class Particion:
+    """Reglas aplicables a un ambiente (o comunes a todos)."""
+
+    def __init__(self):
+        self.exactos        = {}   # {nombre_lower: nombre tal como figura en la lista}
+        self.exactos_deneg  = set()
+        self._patrones      = []   # regex (texto) de globs y regex permitidos
+        self._patrones_deneg = []
+        self.permitidos     = None  # regex compilada (o None)
+        self.denegados      = None
+
+    def compilar(self):
+        self.permitidos = _unir(self._patrones)
+        self.denegados  = _unir(self._patrones_deneg)
+
+    def __len__(self):
+        return len(self.exactos) + len(self.exactos_deneg) + len(self._patrones) + len(self._patrones_deneg)
+
+
+def _unir(patrones):
+    if not patrones:
+        return None
+    return re.compile("|".join(f"(?:{p})" for p in patrones), re.IGNORECASE)
+
+
+# ==========================
+# REGLAS COMPILADAS
+# ==========================
+class Reglas:
+    def __init__(self, prefijos):
+        self.prefijos    = sorted({p.lower() for p in prefijos}, key=len, reverse=True)
+        self.particiones = {p: Particion() for p in self.prefijos}
+        self.comun       = Particion()
+        self.total       = 0
+        self.journal     = []   # nombres agregados desde el journal (aun no compactados)
+
+    # --- carga ---
+    def _particion_de(self, literal):
+        literal = literal.lower()
+        for p in self.prefijos:   # el prefijo mas largo primero
+            if literal.startswith(p):
+                return self.particiones[p]
+        return self.comun
+
+    def agregar(self, linea):
+        linea = linea.strip()
+        if not linea or linea.startswith("#"):
+            return
+        denegar = linea.startswith(PREFIJO_DENEGACION)
+        if denegar:
+            linea = linea[len(PREFIJO_DENEGACION):].strip()
+        self.total += 1
+
+        if linea.startswith(PREFIJO_REGEX):
+            patron  = linea[len(PREFIJO_REGEX):].strip()
+            re.compile(patron)   # error de sintaxis -> re.error con la regla original
+            literal = _literal_regex(patron)
+        elif any(c in linea for c in _METACARACTERES_GLOB):
+            patron  = fnmatch.translate(linea)
+            literal = re.split(r"[*?\[]", linea, 1)[0]
+        else:
+            part = self._particion_de(linea)
+            if denegar:
+                part.exactos_deneg.add(linea.lower())
+            else:
+                part.exactos.setdefault(linea.lower(), linea)
+            return
+
+        part = self._particion_de(literal)
+        (part._patrones_deneg if denegar else part._patrones).append(patron)
+
+    def compilar(self):
+        for part in list(self.particiones.values()) + [self.comun]:
+            part.compilar()
+        return self
+
+    # --- consultas ---
+    def _particiones(self, prefijo):
+        part = self.particiones.get(prefijo.lower())
+        return (part, self.comun) if part is not None else (self.comun,)
+
+    def denegado(self, prefijo, nombre):
+        n = nombre.lower()
+        for part in self._particiones(prefijo):
+            if n in part.exactos_deneg or (part.denegados and part.denegados.match(n)):
+                return True
+        return False
+
+    def autorizado(self, prefijo, nombre):
+        """True si alguna regla permite el nombre y ninguna lo deniega."""
+        if self.denegado(prefijo, nombre):
+            return False
+        n = nombre.lower()
+        for part in self._particiones(prefijo):
+            if n in part.exactos or (part.permitidos and part.permitidos.match(n)):
+                return True
+        return False
+
+    def exactos(self, prefijo):
+        """Nombres exactos del ambiente (tal como figuran en la lista), sin los denegados."""
+        part = self.particiones.get(prefijo.lower())
+        if part is None:
+            return []
+        return [n for n in part.exactos.values() if not self.denegado(prefijo, n)]
+
+    def explicar(self, prefijo, nombre):
+        """Texto con la regla que decide sobre el nombre (para diagnostico)."""
+        n = nombre.lower()
+        for part in self._particiones(prefijo):
+            if n in part.exactos_deneg:
+                return "denegado (nombre exacto)"
+            if part.denegados and part.denegados.match(n):
+                return "denegado (patron)"
+        for part in self._particiones(prefijo):
+            if n in part.exactos:
+                return "autorizado (nombre exacto)"
+            if part.permitidos and part.permitidos.match(n):
+                return "autorizado (patron)"
+        return "no listado"
+
+
+def _literal_regex(patron):
+    """
+    Parte literal inicial de una regex anclada ('^camaraprod_\\d' -> 'camaraprod_').
+    Con alternativas ('|') el prefijo de la primera rama no vale para las
+    demas: la regla va a la particion comun.
+    """
+    if not patron.startswith("^") or "|" in patron:
+        return ""
+    m = re.match(r"[A-Za-z0-9_\-]*", patron[1:])
+    literal = m.group(0)
+    # Un cuantificador despues del literal vuelve opcional su ultimo caracter
+    resto = patron[1 + len(literal):]
+    if resto[:1] in ("*", "?", "{") and literal:
+        literal = literal[:-1]
+    return literal
+
+
+# ==========================
+# CARGA, JOURNAL Y COMPACTACION
+# ==========================
+def ruta_journal(ruta_lista):
+    return os.path.splitext(ruta_lista)[0] + EXTENSION_JOURNAL
+
+
+def leer_journal(ruta_lista):
+    """Nombres agregados en el journal, en orden y sin repetir."""
+    ruta = ruta_journal(ruta_lista)
+    if not os.path.exists(ruta):
+        return []
+    vistos, nombres = set(), []
+    with open(ruta, "r", encoding="utf-8") as f:
+        for linea in f:
+            partes = linea.rstrip("\n").split("\t")
+            if len(partes) == 3 and partes[1] == "+" and partes[2].lower() not in vistos:
+                vistos.add(partes[2].lower())
+                nombres.append(partes[2])
+    return nombres
+
+
+def cargar(ruta_lista, prefijos):
+    """Compila lista_maestra.txt + journal para los prefijos de ambiente dados."""
+    reglas = Reglas(prefijos)
+    with open(ruta_lista, "r", encoding="utf-8") as f:
+        for linea in f:
+            reglas.agregar(linea)
+    reglas.journal = leer_journal(ruta_lista)
+    for nombre in reglas.journal:
+        reglas.agregar(nombre)
+    return reglas.compilar()
+
+
+def anotar(ruta_lista, nombres):
+    """Agrega nombres descubiertos al journal (una linea por nombre, solo anexar)."""
+    if not nombres:
+        return
+    ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    with open(ruta_journal(ruta_lista), "a", encoding="utf-8") as f:
+        for nombre in nombres:
+            f.write(f"{ts}\t+\t{nombre}\n")
+
+
+def compactar(ruta_lista):
+    """
+    Incorpora el journal a lista_maestra.txt (al final, en una seccion
+    fechada y ordenada) sin tocar las reglas ni comentarios existentes, y
+    vacia el journal. Retorna la cantidad de nombres incorporados.
+    """
+    nuevos = leer_journal(ruta_lista)
+    if not nuevos:
+        return 0
+    with open(ruta_lista, "r", encoding="utf-8") as f:
+        contenido = f.read()
+    existentes = {l.strip().lower() for l in contenido.splitlines()}
+    nuevos = sorted((n for n in nuevos if n.lower() not in existentes), key=str.lower)
+
+    if nuevos:
+        if contenido and not contenido.endswith("\n"):
+            contenido += "\n"
+        contenido += f"# agregados {datetime.now().strftime('%Y-%m-%d')}\n"
+        contenido += "".join(n + "\n" for n in nuevos)
+        tmp = ruta_lista + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(contenido)
+        os.replace(tmp, ruta_lista)
+    os.remove(ruta_journal(ruta_lista))
+    return len(nuevos)
+
+
+def compactar_si_corresponde(ruta_lista, umbral=UMBRAL_COMPACTAR):
+    if len(leer_journal(ruta_lista)) >= umbral:
+        return compactar(ruta_lista)
+    return 0
+
+
+# ==========================
+# CLI
+# ==========================
+def main(argv=None):
+    import argparse
+    import ambientes
+
+    parser = argparse.ArgumentParser(prog="procesar.py lista",
+                                     description="Reglas de lista_maestra.txt y su journal")
+    parser.add_argument("--raiz", default=r"C:\Automatizacion_Excel", help="Carpeta raiz del proyecto")
+    sub = parser.add_subparsers(dest="accion", required=True)
+    sub.add_parser("compactar", help="Incorpora lista_maestra.journal a lista_maestra.txt")
+    p = sub.add_parser("probar", help="Indica que regla decide sobre cada nombre")
+    p.add_argument("nombres", nargs="+")
+    args = parser.parse_args(argv)
+
+    ruta_lista = os.path.join(args.raiz, "lista_maestra.txt")
+    if args.accion == "compactar":
+        print(f"{compactar(ruta_lista)} nombres incorporados a {ruta_lista}")
+    elif args.accion == "probar":
+        rutas  = ambientes.descubrir(args.raiz)
+        reglas = cargar(ruta_lista, [r["prefijo"] for r in rutas.values()])
+        for nombre in args.nombres:
+            prefijo = next((p for p in reglas.prefijos if nombre.lower().startswith(p)), "")
+            print(f"{nombre}: {reglas.explicar(prefijo, nombre)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
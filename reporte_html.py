@@ -0,0 +1,530 @@
+"""
+REPORTE HTML DE AUDITORIA v6.0
+- Lee LOG_PROCESAMIENTO.txt en streaming (linea a linea)
+- Indices de facetas precalculados (estado, ambiente, tipo) y ordenes por
+  columna embebidos junto a los datos: filtrar y ordenar en el navegador es
+  intersectar listas, sin re-ordenar el arreglo completo
+- Tabla con scroll virtual: solo se dibujan las filas visibles
+- Totales por ambiente (ambiente de cada hoja segun la tabla de ruteo)
+- Alertas por cadena (intermedio o raiz que vence antes que el alias) con el
+  certificado limitante en el detalle; los demas registros del alias llevan
+  su vencimiento efectivo
+- Escritura del archivo por bloques, sin armar el HTML completo en memoria
+"""
+
+import os
+import re
+import json
+
+from ambientes import ambiente_de_hoja
+
+
+TAM_BLOQUE = 2000   # registros por bloque de escritura
+
+# Columnas de cada registro (se serializan como arreglos para achicar el HTML)
+COLUMNAS = ["ambiente", "hoja", "alias", "estado", "dias", "fecha", "detalle", "tipo"]
+ESTADOS  = ["VENCIDO", "PROXIMO", "ACTUALIZADO", "SIN_ARCHIVO"]
+
+_RE_VENC   = re.compile(r"\[VENC\].*?\[(.+?)\] '(.+?)': VENCIDO hace (\d+) dias \((.+?)\)")
+_RE_ALERT  = re.compile(r"\[ALERT\].*?\[(.+?)\] '(.+?)': PROXIMO A VENCER en (\d+) dias \((.+?)\)")
+# Resumen final: 'HOJA | #4 alias | FP actualizado', 'HOJA | ks | alias | Serial actualizado',
+# 'HOJA | /ruta | hash actualizado' (la linea por fila no nombra la hoja)
+_RE_CAMBIO = re.compile(r"\[CAMBIO\]\s+(.+?) \| (.+) \| (\S+) actualizado$")
+_RE_SECCION = re.compile(r"#(\d+) (.+)")
+_RE_SIN    = re.compile(r"\[WARN\].*?\[(.+?)\] #(\d+) '(.+?)': \.out no encontrado")
+_RE_EFECTIVO = re.compile(r"\[(.+?)\] '(.+?)': vencimiento efectivo (\S+) por cadena \('(.+)', -?\d+ dias\)")
+_RE_CADENA = re.compile(r"\[(?:VENC|ALERT)\].*?\[(.+?)\] '(.+?)': (VENCIDO|PROXIMO A VENCER) POR CADENA "
+                        r"(?:hace|en) (\d+) dias \((.+?), por '(.+)'\)")
+
+
+# ==========================
+# LECTURA DEL LOG
+# ==========================
+def tipo_hoja(hoja):
+    h = hoja.upper()
+    if "PLUG" in h:
+        return "PLUG"
+    if h.endswith("AIPAC"):
+        return "AIPAC"
+    if h.endswith("WAS"):
+        return "WAS"
+    return "-"
+
+
+def ambiente_registro(hoja, ambientes, ruteo=None):
+    """Ambiente de la hoja segun la tabla de ruteo de la auditoria; sin ella, por el nombre."""
+    if ruteo and hoja in ruteo:
+        return ruteo[hoja]["ambiente"]
+    return ambiente_de_hoja(hoja, ambientes) or "-"
+
+
+def leer_registros(archivo_log, ambientes, ruteo=None):
+    """
+    Genera los registros del reporte leyendo el log linea a linea.
+    ruteo: {hoja: {"ambiente", ...}} (TABLA_RUTEO de la auditoria).
+    El vencimiento efectivo por cadena se agrega al detalle de los registros
+    del alias, tambien a los ya generados (la linea de cadena viene despues).
+    """
+    proximos_vistos = set()
+    cadenas_vistas  = set()   # el resumen final repite las alertas por cadena
+    efectivos       = {}      # {(hoja, alias): texto}
+    por_alias       = {}      # {(hoja, alias): [registros aun sin vencimiento efectivo]}
+    with open(archivo_log, "r", encoding="utf-8", errors="ignore") as f:
+        for linea in f:
+            linea = linea.strip()
+            r = None
+
+            m = _RE_EFECTIVO.search(linea)
+            if m:
+                clave = (m.group(1), m.group(2))
+                efectivos[clave] = f"Vence efectivo {m.group(3)} por '{m.group(4)}'"
+                for previo in por_alias.pop(clave, []):
+                    _agregar_detalle(previo, efectivos[clave])
+                continue
+
+            m = _RE_VENC.search(linea)
+            if m:
+                r = {"hoja": m.group(1), "alias": m.group(2), "estado": "VENCIDO",
+                     "dias": -int(m.group(3)), "fecha": m.group(4), "detalle": ""}
+            if r is None:
+                m = _RE_ALERT.search(linea)
+                if m:
+                    clave = (m.group(1), m.group(2))
+                    if clave in proximos_vistos:
+                        continue
+                    proximos_vistos.add(clave)
+                    r = {"hoja": m.group(1), "alias": m.group(2), "estado": "PROXIMO",
+                         "dias": int(m.group(3)), "fecha": m.group(4), "detalle": ""}
+            if r is None:
+                m = _RE_CAMBIO.search(linea)
+                if m:
+                    r = {"hoja": m.group(1), "estado": "ACTUALIZADO", "dias": 9999, "fecha": "-"}
+                    *donde, r["alias"] = m.group(2).split(" | ")
+                    sec = _RE_SECCION.fullmatch(r["alias"])
+                    if sec:
+                        donde, r["alias"] = ["Secc. " + sec.group(1)], sec.group(2)
+                    r["detalle"] = " | ".join(donde + [m.group(3) + " actualizado"])
+            if r is None:
+                m = _RE_CADENA.search(linea)
+                if m:
+                    clave = (m.group(1), m.group(2))
+                    if clave in cadenas_vistas:
+                        continue
+                    cadenas_vistas.add(clave)
+                    vencido = m.group(3) == "VENCIDO"
+                    r = {"hoja": m.group(1), "alias": m.group(2), "estado": "VENCIDO" if vencido else "PROXIMO",
+                         "dias": -int(m.group(4)) if vencido else int(m.group(4)), "fecha": m.group(5),
+                         "detalle": "Cadena: " + m.group(6)}
+                    efectivos[clave] = f"Vence efectivo {m.group(5)} por '{m.group(6)}'"
+                    for previo in por_alias.pop(clave, []):
+                        _agregar_detalle(previo, efectivos[clave])
+            if r is None:
+                m = _RE_SIN.search(linea)
+                if m:
+                    r = {"hoja": m.group(1), "alias": m.group(3), "estado": "SIN_ARCHIVO",
+                         "dias": 9999, "fecha": "-", "detalle": "Secc. " + m.group(2)}
+            if r is None:
+                continue
+
+            r["ambiente"] = ambiente_registro(r["hoja"], ambientes, ruteo)
+            r["tipo"]     = tipo_hoja(r["hoja"])
+            if not r["detalle"].startswith("Cadena: "):
+                clave = (r["hoja"], r["alias"])
+                if clave in efectivos:
+                    _agregar_detalle(r, efectivos[clave])
+                else:
+                    por_alias.setdefault(clave, []).append(r)
+            yield r
+
+
+def _agregar_detalle(registro, texto):
+    registro["detalle"] = f"{registro['detalle']} | {texto}" if registro["detalle"] else texto
+
+
+# ==========================
+# INDICES
+# ==========================
+def construir_indices(registros):
+    """
+    Facetas {campo: {valor: [indices]}} y ordenes {columna: [indices]}.
+    Las listas de cada faceta quedan en orden de indice (ascendente).
+    """
+    facetas = {"estado": {}, "ambiente": {}, "tipo": {}}
+    for i, r in enumerate(registros):
+        for campo in facetas:
+            facetas[campo].setdefault(r[campo], []).append(i)
+
+    ordenes = {}
+    for col in ["ambiente", "hoja", "alias", "estado", "fecha"]:
+        ordenes[col] = sorted(range(len(registros)), key=lambda i: (registros[i][col].lower(), i))
+    ordenes["dias"] = sorted(range(len(registros)), key=lambda i: (registros[i]["dias"], i))
+    return facetas, ordenes
+
+
+def totales_por_ambiente(registros, ambientes):
+    totales = {a: dict.fromkeys(ESTADOS, 0) for a in ambientes}
+    for r in registros:
+        if r["ambiente"] in totales and r["estado"] in totales[r["ambiente"]]:
+            totales[r["ambiente"]][r["estado"]] += 1
+    return totales
+
+
+def _json_script(obj):
+    """JSON seguro para incrustar dentro de <script>."""
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+
+# ==========================
+# PLANTILLA
+# ==========================
+CSS = """
+* { box-sizing: border-box; margin: 0; padding: 0; }
+body { font-family: 'Segoe UI', Arial, sans-serif; background: #f0f2f5; color: #222; padding: 24px; }
+h1 { font-size: 20px; font-weight: 700; color: #1a1a2e; margin-bottom: 4px; }
+h2 { font-size: 14px; font-weight: 700; color: #1a1a2e; margin-bottom: 10px; }
+.subtitle { font-size: 13px; color: #666; margin-bottom: 20px; }
+/* Barra de criticidad */
+.criticidad-wrap { margin-bottom: 24px; background: white; border-radius: 10px;
+                   padding: 14px 18px; box-shadow: 0 1px 4px rgba(0,0,0,0.08); }
+.criticidad-label { font-size: 12px; font-weight: 600; color: #555; margin-bottom: 8px; }
+.criticidad-bar-bg { background: #e2e8f0; border-radius: 20px; height: 14px; overflow: hidden; }
+.criticidad-bar { height: 14px; border-radius: 20px; transition: width .4s;
+                  background: linear-gradient(90deg, #f6ad55, #e53e3e); }
+.criticidad-pct { font-size: 13px; font-weight: 700; margin-top: 6px; }
+/* Cards */
+.cards { display: flex; gap: 16px; margin-bottom: 24px; flex-wrap: wrap; }
+.card { background: white; border-radius: 10px; padding: 16px 22px; flex: 1; min-width: 160px;
+        box-shadow: 0 1px 4px rgba(0,0,0,0.08); border-left: 4px solid #ccc; cursor: pointer; transition: transform .1s; }
+.card:hover { transform: translateY(-2px); }
+.card.rojo  { border-color: #e53e3e; }
+.card.amari { border-color: #d69e2e; }
+.card.azul  { border-color: #3182ce; }
+.card.gris  { border-color: #718096; }
+.card .num  { font-size: 32px; font-weight: 800; line-height: 1; margin-bottom: 4px; }
+.card.rojo  .num { color: #e53e3e; }
+.card.amari .num { color: #d69e2e; }
+.card.azul  .num { color: #3182ce; }
+.card.gris  .num { color: #718096; }
+.card .lbl  { font-size: 12px; color: #666; font-weight: 500; }
+/* Totales por ambiente */
+.totales { background: white; border-radius: 10px; padding: 14px 18px; margin-bottom: 24px;
+           box-shadow: 0 1px 4px rgba(0,0,0,0.08); }
+.totales table { font-size: 13px; }
+.totales td, .totales th { padding: 6px 14px; border-bottom: 1px solid #f0f2f5; }
+.totales tbody tr { cursor: pointer; }
+.totales tbody tr:hover td { background: #f8fafc; }
+/* Filtros */
+.filtros { display: flex; gap: 10px; margin-bottom: 16px; flex-wrap: wrap; align-items: center; }
+.filtros label { font-size: 13px; font-weight: 600; color: #444; }
+select, input { padding: 7px 12px; border: 1px solid #d1d5db; border-radius: 6px;
+                font-size: 13px; background: white; cursor: pointer; }
+input { width: 220px; }
+.btn { padding: 7px 14px; border: 1px solid #d1d5db; border-radius: 6px;
+       font-size: 13px; cursor: pointer; }
+.btn-reset { background: #f7fafc; color: #555; }
+.btn-reset:hover { background: #edf2f7; }
+.btn-csv { background: #2b6cb0; color: white; border-color: #2b6cb0; font-weight: 600; }
+.btn-csv:hover { background: #2c5282; }
+/* Tabla con scroll virtual */
+.tabla-wrap { background: white; border-radius: 10px; box-shadow: 0 1px 4px rgba(0,0,0,0.08);
+              overflow-y: auto; height: 70vh; position: relative; }
+table { width: 100%; border-collapse: collapse; font-size: 13px; table-layout: fixed; }
+thead th { position: sticky; top: 0; z-index: 1; background: #1a1a2e; color: white; }
+th { padding: 12px 14px; text-align: left; font-weight: 600; font-size: 12px;
+     text-transform: uppercase; letter-spacing: 0.5px; cursor: pointer; user-select: none; white-space: nowrap; }
+th:hover { background: #2d2d4e; }
+td { height: 40px; padding: 0 14px; border-bottom: 1px solid #f0f2f5; vertical-align: middle;
+     white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+tr:hover td { background: #f8fafc; }
+tr.espaciador td { padding: 0; border: none; height: auto; }
+.badge { display: inline-block; padding: 3px 10px; border-radius: 20px;
+         font-size: 11px; font-weight: 700; letter-spacing: 0.3px; white-space: nowrap; }
+.badge-VENCIDO     { background: #fed7d7; color: #9b2335; }
+.badge-PROXIMO     { background: #fefcbf; color: #744210; }
+.badge-ACTUALIZADO { background: #bee3f8; color: #2b6cb0; }
+.badge-SIN_ARCHIVO { background: #e2e8f0; color: #4a5568; }
+tr.row-VENCIDO td  { background: #fff5f5; }
+tr.row-PROXIMO td  { background: #fffff0; }
+.dias-critico { color: #e53e3e; font-weight: 700; }
+.dias-alerta  { color: #d69e2e; font-weight: 700; }
+.dias-ok      { color: #38a169; }
+.no-rows { text-align: center; padding: 32px; color: #999; font-size: 14px; }
+.footer { margin-top: 12px; font-size: 12px; color: #999; text-align: right; }
+"""
+
+SCRIPT = r"""
+const C = {ambiente:0, hoja:1, alias:2, estado:3, dias:4, fecha:5, detalle:6, tipo:7};
+const ALTO_FILA = 40;
+const MARGEN    = 10;
+let orden = {col: 'dias', asc: true};
+let visibles = [];          // indices de registros filtrados y ordenados
+let timerBusqueda = null;
+
+// Texto de busqueda precalculado una sola vez
+const textoBusqueda = datos.map(d => (d[C.alias] + '\u0001' + d[C.hoja]).toLowerCase());
+
+function esc(s) {
+  return String(s).replace(/[&<>"']/g, c => ({'&':'&amp;','<':'&lt;','>':'&gt;','"':'&quot;',"'":'&#39;'}[c]));
+}
+
+function filtrarEstado(e) {
+  document.getElementById('fil-estado').value = e;
+  cambioFiltro();
+}
+
+function filtrarAmbiente(a) {
+  document.getElementById('fil-ambiente').value = a;
+  cambioFiltro();
+}
+
+function resetFiltros() {
+  document.getElementById('fil-estado').value   = '';
+  document.getElementById('fil-ambiente').value = '';
+  document.getElementById('fil-tipo').value     = '';
+  document.getElementById('fil-buscar').value   = '';
+  cambioFiltro();
+}
+
+function cambioBusqueda() {
+  clearTimeout(timerBusqueda);
+  timerBusqueda = setTimeout(cambioFiltro, 120);
+}
+
+function cambioFiltro() {
+  calcularVisibles();
+  document.getElementById('tabla-wrap').scrollTop = 0;
+  renderizar();
+}
+
+function badge(e) {
+  const labels = {VENCIDO:'🔴 VENCIDO', PROXIMO:'🟡 POR VENCER',
+                  ACTUALIZADO:'🔵 ACTUALIZADO', SIN_ARCHIVO:'⚪ SIN ARCHIVO'};
+  return '<span class="badge badge-' + e + '">' + (labels[e]||e) + '</span>';
+}
+
+function diasHtml(d, estado) {
+  if (estado === 'ACTUALIZADO' || estado === 'SIN_ARCHIVO') return '<span style="color:#bbb">—</span>';
+  if (d < 0) return '<span class="dias-critico">Vencido hace ' + Math.abs(d) + ' dias</span>';
+  if (d <= DIAS_ALERTA) return '<span class="dias-alerta">' + d + ' dias</span>';
+  return '<span class="dias-ok">' + d + ' dias</span>';
+}
+
+// Filtro: interseccion de listas de facetas + marca por indice
+function calcularVisibles() {
+  const fe = document.getElementById('fil-estado').value;
+  const fa = document.getElementById('fil-ambiente').value;
+  const ft = document.getElementById('fil-tipo').value;
+  const fb = document.getElementById('fil-buscar').value.toLowerCase();
+
+  const listas = [];
+  if (fe) listas.push(facetas.estado[fe]   || []);
+  if (fa) listas.push(facetas.ambiente[fa] || []);
+  if (ft) listas.push(facetas.tipo[ft]     || []);
+
+  let marca = null;
+  if (listas.length || fb) {
+    marca = new Uint8Array(datos.length);
+    if (listas.length) {
+      listas.sort((a, b) => a.length - b.length);
+      const cuenta = new Uint8Array(datos.length);
+      for (const lista of listas) for (const i of lista) cuenta[i]++;
+      for (const i of listas[0]) {
+        if (cuenta[i] === listas.length && (!fb || textoBusqueda[i].includes(fb))) marca[i] = 1;
+      }
+    } else {
+      for (let i = 0; i < datos.length; i++) if (textoBusqueda[i].includes(fb)) marca[i] = 1;
+    }
+  }
+
+  // Orden precalculado: se recorre la permutacion de la columna y se filtra
+  const perm = ordenes[orden.col];
+  const res  = [];
+  if (orden.asc) { for (let k = 0; k < perm.length; k++) if (!marca || marca[perm[k]]) res.push(perm[k]); }
+  else           { for (let k = perm.length - 1; k >= 0; k--) if (!marca || marca[perm[k]]) res.push(perm[k]); }
+  visibles = res;
+}
+
+function ordenar(col) {
+  orden = {col, asc: orden.col === col ? !orden.asc : true};
+  calcularVisibles();
+  renderizar();
+}
+
+function filaHtml(d) {
+  return '<tr class="row-' + d[C.estado] + '">' +
+    '<td><strong>' + esc(d[C.ambiente]) + '</strong></td>' +
+    '<td>' + (d[C.hoja] ? esc(d[C.hoja]) : '—') + '</td>' +
+    '<td title="' + esc(d[C.alias]) + '">' + esc(d[C.alias]) + '</td>' +
+    '<td>' + badge(d[C.estado]) + '</td>' +
+    '<td>' + diasHtml(d[C.dias], d[C.estado]) + '</td>' +
+    '<td>' + (d[C.fecha] === '-' ? '<span style="color:#bbb">—</span>' : esc(d[C.fecha])) + '</td>' +
+    '<td style="font-size:12px;color:#555">' + esc(d[C.detalle]) + '</td></tr>';
+}
+
+// Scroll virtual: solo las filas dentro de la ventana visible (+ margen)
+function renderizar() {
+  const wrap  = document.getElementById('tabla-wrap');
+  const total = visibles.length;
+  const desde = Math.max(0, Math.floor(wrap.scrollTop / ALTO_FILA) - MARGEN);
+  const hasta = Math.min(total, Math.ceil((wrap.scrollTop + wrap.clientHeight) / ALTO_FILA) + MARGEN);
+
+  let html = '<tr class="espaciador"><td colspan="7" style="height:' + (desde * ALTO_FILA) + 'px"></td></tr>';
+  for (let k = desde; k < hasta; k++) html += filaHtml(datos[visibles[k]]);
+  html += '<tr class="espaciador"><td colspan="7" style="height:' + ((total - hasta) * ALTO_FILA) + 'px"></td></tr>';
+
+  document.getElementById('tbody').innerHTML = html;
+  document.getElementById('no-rows').style.display = total ? 'none' : 'block';
+  document.getElementById('cnt-visible').textContent = total;
+}
+
+let pendienteScroll = false;
+document.getElementById('tabla-wrap').addEventListener('scroll', () => {
+  if (pendienteScroll) return;
+  pendienteScroll = true;
+  requestAnimationFrame(() => { pendienteScroll = false; renderizar(); });
+});
+
+function exportarCSV() {
+  const encabezado = ['Ambiente','Hoja','Alias','Estado','Dias restantes','Vencimiento','Detalle'];
+  const lineas = [encabezado.join(';')];
+  for (const i of visibles) {
+    const d = datos[i];
+    const diasVal = (d[C.estado] === 'ACTUALIZADO' || d[C.estado] === 'SIN_ARCHIVO') ? '-' : d[C.dias];
+    lineas.push([d[C.ambiente], d[C.hoja], '"'+d[C.alias].replace(/"/g,'""')+'"', d[C.estado], diasVal, d[C.fecha], d[C.detalle]].join(';'));
+  }
+  const blob = new Blob(['\ufeff' + lineas.join('\n')], {type:'text/csv;charset=utf-8;'});
+  const url  = URL.createObjectURL(blob);
+  const a    = document.createElement('a');
+  a.href     = url;
+  a.download = 'auditoria_ssl_' + FECHA + '.csv';
+  a.click();
+  URL.revokeObjectURL(url);
+}
+
+calcularVisibles();
+renderizar();
+"""
+
+
+# ==========================
+# GENERADOR
+# ==========================
+def _escribir_datos(f, registros):
+    """Escribe 'const datos = [...]' por bloques de TAM_BLOQUE registros."""
+    f.write("const datos = [")
+    for inicio in range(0, len(registros), TAM_BLOQUE):
+        bloque = registros[inicio:inicio + TAM_BLOQUE]
+        filas  = ",".join(_json_script([r[c] for c in COLUMNAS]) for r in bloque)
+        f.write(("," if inicio else "") + filas + "\n")
+    f.write("];\n")
+
+
+def generar_html_reporte(archivo_log, archivo_html, fecha_ejecucion, dias_alerta, ambientes, log=None,
+                         ruteo=None):
+    """Lee el LOG_PROCESAMIENTO.txt y genera el reporte HTML interactivo."""
+    from html import escape
+
+    try:
+        registros = list(leer_registros(archivo_log, ambientes, ruteo))
+    except OSError:
+        return
+
+    cnt = dict.fromkeys(ESTADOS, 0)
+    for r in registros:
+        if r["estado"] in cnt:
+            cnt[r["estado"]] += 1
+
+    total_certs = max(cnt["VENCIDO"] + cnt["PROXIMO"] + cnt["SIN_ARCHIVO"], 1)
+    pct_critico = round((cnt["VENCIDO"] + cnt["PROXIMO"]) / total_certs * 100)
+    color_pct   = "#e53e3e" if pct_critico > 30 else "#d69e2e" if pct_critico > 10 else "#38a169"
+
+    facetas, ordenes = construir_indices(registros)
+    totales = totales_por_ambiente(registros, ambientes)
+
+    tmp = archivo_html + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write('<!DOCTYPE html>\n<html lang="es">\n<head>\n<meta charset="UTF-8">\n')
+        f.write(f"<title>Auditoria SSL - {escape(fecha_ejecucion)}</title>\n<style>{CSS}</style>\n</head>\n<body>\n")
+        f.write("<h1>🔐 Auditoria SSL — COMBMAN Keystores de Infraestructura y Seguridad</h1>\n")
+        f.write(f'<div class="subtitle">Generado: {escape(fecha_ejecucion)} &nbsp;|&nbsp; '
+                f"Umbral de alerta: {dias_alerta} dias &nbsp;|&nbsp; v6.0</div>\n")
+
+        f.write(f'''<div class="criticidad-wrap">
+  <div class="criticidad-label">🔥 Nivel de criticidad global ({cnt['VENCIDO']} vencidos + {cnt['PROXIMO']} proximos sobre {total_certs} certificados evaluados)</div>
+  <div class="criticidad-bar-bg"><div class="criticidad-bar" style="width:{pct_critico}%"></div></div>
+  <div class="criticidad-pct" style="color:{color_pct}">{pct_critico}% en estado critico o de alerta</div>
+</div>
+<div class="cards">
+  <div class="card rojo"  onclick="filtrarEstado('VENCIDO')"><div class="num">{cnt['VENCIDO']}</div><div class="lbl">🔴 Vencidos</div></div>
+  <div class="card amari" onclick="filtrarEstado('PROXIMO')"><div class="num">{cnt['PROXIMO']}</div><div class="lbl">🟡 Proximos a vencer</div></div>
+  <div class="card azul"  onclick="filtrarEstado('ACTUALIZADO')"><div class="num">{cnt['ACTUALIZADO']}</div><div class="lbl">🔵 Datos actualizados</div></div>
+  <div class="card gris"  onclick="filtrarEstado('SIN_ARCHIVO')"><div class="num">{cnt['SIN_ARCHIVO']}</div><div class="lbl">⚪ Sin archivo .out</div></div>
+</div>
+''')
+
+        f.write('<div class="totales"><h2>Totales por ambiente</h2><table><thead><tr>'
+                "<th>Ambiente</th><th>🔴 Vencidos</th><th>🟡 Proximos</th>"
+                "<th>🔵 Actualizados</th><th>⚪ Sin archivo</th><th>Total</th></tr></thead><tbody>\n")
+        for amb, t in totales.items():
+            a = escape(amb)
+            f.write(f'<tr onclick="filtrarAmbiente(\'{a}\')"><td><strong>{a}</strong></td>'
+                    + "".join(f"<td>{t[e]}</td>" for e in ESTADOS)
+                    + f"<td>{sum(t.values())}</td></tr>\n")
+        f.write("</tbody></table></div>\n")
+
+        f.write('''<div class="filtros">
+  <label>Filtrar:</label>
+  <select id="fil-estado" onchange="cambioFiltro()">
+    <option value="">Todos los estados</option>
+    <option value="VENCIDO">🔴 Vencidos</option>
+    <option value="PROXIMO">🟡 Proximos a vencer</option>
+    <option value="ACTUALIZADO">🔵 Actualizados</option>
+    <option value="SIN_ARCHIVO">⚪ Sin archivo</option>
+  </select>
+  <select id="fil-ambiente" onchange="cambioFiltro()">
+    <option value="">Todos los ambientes</option>
+''')
+        for amb in ambientes:
+            f.write(f'    <option value="{escape(amb)}">{escape(amb)}</option>\n')
+        f.write('''  </select>
+  <select id="fil-tipo" onchange="cambioFiltro()">
+    <option value="">Todos los tipos</option>
+    <option value="WAS">WAS</option>
+    <option value="AIPAC">AIPAC</option>
+    <option value="PLUG">PLUG.WAS</option>
+  </select>
+  <input type="text" id="fil-buscar" placeholder="🔍 Buscar alias..." oninput="cambioBusqueda()">
+  <button class="btn btn-reset" onclick="resetFiltros()">✕ Limpiar</button>
+  <button class="btn btn-csv"   onclick="exportarCSV()">⬇ Exportar CSV</button>
+</div>
+<div class="tabla-wrap" id="tabla-wrap">
+  <table>
+    <thead>
+      <tr>
+        <th onclick="ordenar('ambiente')">Ambiente ↕</th>
+        <th onclick="ordenar('hoja')">Hoja ↕</th>
+        <th onclick="ordenar('alias')">Alias ↕</th>
+        <th onclick="ordenar('estado')">Estado ↕</th>
+        <th onclick="ordenar('dias')">Dias restantes ↕</th>
+        <th onclick="ordenar('fecha')">Vencimiento ↕</th>
+        <th>Detalle</th>
+      </tr>
+    </thead>
+    <tbody id="tbody"></tbody>
+  </table>
+  <div class="no-rows" id="no-rows" style="display:none">Sin resultados.</div>
+</div>
+''')
+        f.write(f'<div class="footer">Mostrando <span id="cnt-visible">0</span> de {len(registros)} registros</div>\n')
+
+        f.write("<script>\n")
+        f.write(f"const DIAS_ALERTA = {int(dias_alerta)};\nconst FECHA = {_json_script(fecha_ejecucion)};\n")
+        _escribir_datos(f, registros)
+        f.write("const facetas = " + _json_script(facetas) + ";\n")
+        f.write("const ordenes = " + _json_script(ordenes) + ";\n")
+        f.write(SCRIPT)
+        f.write("</script>\n</body>\n</html>")
+
+    os.replace(tmp, archivo_html)
+    if log:
+        log("Reporte HTML generado: " + os.path.basename(archivo_html))
@@ -0,0 +1,85 @@
+"""
+SALIDA POR AMBIENTE v1.0
+- Un libro por ambiente (solo sus hojas) en RAIZ/SALIDA_AMBIENTES, escrito en
+  un proceso aparte (ProcessPoolExecutor): cada libro se lanza apenas se
+  completan las hojas de su ambiente, sin esperar al resto del libro
+- Cada proceso parte del libro original y repite los cambios de celda que la
+  auditoria registro para esas hojas (mismos valores y rellenos que el libro
+  combinado)
+- El archivo se escribe como .tmp y se renombra al terminar: quien lo vea en
+  la carpeta lo ve completo
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+CARPETA_SALIDA = "SALIDA_AMBIENTES"
+
+
+def ruta_libro_ambiente(excel_out, ambiente):
+    """'.../COMBMAN ... 2026.xlsx' -> '.../SALIDA_AMBIENTES/COMBMAN ... 2026 - CAMARAPROD.xlsx'."""
+    base = os.path.splitext(os.path.basename(excel_out))[0]
+    return os.path.join(os.path.dirname(excel_out), CARPETA_SALIDA, f"{base} - {ambiente}.xlsx")
+
+
+def escribir_libro(excel_in, excel_out, hojas, cambios):
+    """(Proceso trabajador) Libro con solo 'hojas' y los cambios aplicados. Retorna los segundos usados."""
+    from openpyxl import load_workbook
+    from auditoria import reaplicar_cambios
+    inicio = time.perf_counter()
+    wb = load_workbook(excel_in)
+    for nombre in list(wb.sheetnames):
+        if nombre not in hojas:
+            wb.remove(wb[nombre])
+    reaplicar_cambios(wb, cambios)
+    os.makedirs(os.path.dirname(excel_out), exist_ok=True)
+    tmp = excel_out + ".tmp"
+    wb.save(tmp)
+    os.replace(tmp, excel_out)
+    return time.perf_counter() - inicio
+
+
+class SalidaPorAmbiente:
+    """Lanza el libro de cada ambiente cuando terminan todas sus hojas."""
+
+    def __init__(self, excel_in, excel_out, hojas_por_ambiente, procesos=None):
+        self.excel_in  = excel_in
+        self.excel_out = excel_out
+        self.hojas     = {amb: list(h) for amb, h in hojas_por_ambiente.items() if h}
+        self.faltan    = {amb: set(h) for amb, h in self.hojas.items()}
+        self._futuros  = {}   # ambiente -> Future
+        self._pool     = None
+        if self.hojas:
+            self._pool = ProcessPoolExecutor(max_workers=procesos or min(len(self.hojas), os.cpu_count() or 1))
+
+    def hoja_completada(self, hoja, cambios):
+        """Marca la hoja; lanza los ambientes que quedaron completos. Retorna los libros ya terminados."""
+        for amb, faltan in self.faltan.items():
+            faltan.discard(hoja)
+            if not faltan and amb not in self._futuros:
+                hojas = set(self.hojas[amb])
+                self._futuros[amb] = self._pool.submit(
+                    escribir_libro, self.excel_in, ruta_libro_ambiente(self.excel_out, amb),
+                    self.hojas[amb], [c for c in cambios if c["hoja"] in hojas])
+        return self._terminados(esperar=False)
+
+    def terminar(self):
+        """Espera los libros pendientes y cierra los procesos. Retorna los libros no informados aun."""
+        terminados = self._terminados(esperar=True)
+        if self._pool is not None:
+            self._pool.shutdown()
+        return terminados
+
+    def _terminados(self, esperar):
+        """[(ambiente, ruta, segundos o None, error o None)] de los libros listos (cada uno una sola vez)."""
+        listos = []
+        for amb, futuro in list(self._futuros.items()):
+            if futuro is None or not (esperar or futuro.done()):
+                continue
+            error = futuro.exception()
+            listos.append((amb, ruta_libro_ambiente(self.excel_out, amb),
+                           None if error else futuro.result(), error))
+            self._futuros[amb] = None
+        return listos
@@ -0,0 +1,313 @@
+"""
+SERVICIO DE CONSULTA HTTP v1.0
+- Servicio local de solo lectura (solo biblioteca estandar) sobre la ultima
+  ejecucion registrada en el historial (HISTORIAL_AUDITORIA.sqlite):
+  certificados catalogados, comparaciones Excel vs volcado y clasificaciones
+  de vencimiento
+- Todo se carga en memoria con indices por ambiente, alias, fingerprint y
+  serial, y una lista ordenada por vencimiento efectivo (propio o de la
+  cadena, con el certificado que lo limita): cada consulta es una
+  busqueda en diccionario (o bisect), sin abrir el Excel ni reparsear nada
+- Recarga en caliente: un hilo vigila el historial y, cuando termina una
+  ejecucion nueva, arma la instantanea nueva y la publica de una vez; las
+  consultas en curso siguen usando la anterior
+- Escucha en 127.0.0.1 por defecto
+
+Endpoints (GET, respuesta JSON):
+  /estado
+  /certificados?ambiente=&alias=&seccion=&fingerprint=&serial=
+  /vencimientos?dias=N | desde=AAAA-MM-DD&hasta=AAAA-MM-DD [&ambiente=&estado=]
+  /comparaciones?ambiente=&alias=&resultado=
+
+Uso:
+  python procesar.py servicio [--raiz ...] [--puerto 8765] [--host 127.0.0.1] [--intervalo 2]
+"""
+
+import os
+import json
+import bisect
+import sqlite3
+import argparse
+import threading
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from urllib.request import pathname2url
+
+import historial
+
+
+PUERTO_DEFAULT    = 8765
+INTERVALO_DEFAULT = 2.0   # segundos entre revisiones del historial
+
+
+# ==========================
+# INSTANTANEA EN MEMORIA
+# ==========================
+def _conectar_lectura(ruta_db):
+    """Conexion de solo lectura (el servicio nunca escribe el historial)."""
+    return sqlite3.connect(f"file:{pathname2url(os.path.abspath(ruta_db))}?mode=ro", uri=True)
+
+
+def _filas(con, sql, params=()):
+    cur = con.execute(sql, params)
+    columnas = [d[0] for d in cur.description]
+    return [dict(zip(columnas, fila)) for fila in cur]
+
+
+def _indexar(filas, *campos):
+    """{campo: {valor_normalizado: [filas]}} para los campos dados."""
+    indices = {c: {} for c in campos}
+    for fila in filas:
+        for c in campos:
+            indices[c].setdefault(_clave(c, fila.get(c)), []).append(fila)
+    return indices
+
+
+def _clave(campo, valor):
+    if campo in ("fingerprint", "serial"):
+        return historial.normalizar_hex(valor)
+    return str(valor or "").strip().lower()
+
+
+class Instantanea:
+    """Ultima ejecucion del historial con sus indices (inmutable una vez armada)."""
+
+    def __init__(self, ejecucion, certificados, comparaciones, clasificaciones):
+        self.ejecucion       = ejecucion
+        self.cargada         = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.certificados    = certificados
+        self.comparaciones   = comparaciones
+        self.clasificaciones = clasificaciones
+        self.idx_cert = _indexar(certificados, "ambiente", "alias", "fingerprint", "serial")
+        self.idx_comp = _indexar(comparaciones, "ambiente", "alias")
+        # Por vencimiento efectivo (el propio o el de la cadena, el que sea antes)
+        con_fecha = sorted((c for c in clasificaciones if _vence(c)), key=_vence)
+        self.venc_fechas = [_vence(c) for c in con_fecha]
+        self.venc_filas  = con_fecha
+
+    @classmethod
+    def cargar(cls, ruta_db):
+        con = _conectar_lectura(ruta_db)
+        try:
+            ejecucion = _filas(con, "SELECT * FROM ejecuciones ORDER BY id DESC LIMIT 1")
+            if not ejecucion:
+                return cls(None, [], [], [])
+            eid = ejecucion[0]["id"]
+            consulta = "SELECT * FROM {} WHERE ejecucion_id = ?"
+            return cls(ejecucion[0],
+                       _sin_id(_filas(con, consulta.format("certificados"), (eid,))),
+                       _sin_id(_filas(con, consulta.format("comparaciones"), (eid,))),
+                       _sin_id(_filas(con, consulta.format("clasificaciones"), (eid,))))
+        finally:
+            con.close()
+
+    # --- consultas ---
+    def certificados_donde(self, filtros):
+        return _buscar(self.certificados, self.idx_cert, filtros,
+                       orden=("fingerprint", "serial", "alias", "ambiente"))
+
+    def comparaciones_donde(self, filtros):
+        return _buscar(self.comparaciones, self.idx_comp, filtros, orden=("alias", "ambiente"))
+
+    def vencimientos_entre(self, desde, hasta, filtros):
+        i = bisect.bisect_left(self.venc_fechas, desde)
+        j = bisect.bisect_right(self.venc_fechas, hasta)
+        return [f for f in self.venc_filas[i:j] if _cumple(f, filtros)]
+
+
+def _vence(clasificacion):
+    return clasificacion.get("fecha_efectiva") or clasificacion.get("fecha_venc")
+
+
+def _sin_id(filas):
+    for f in filas:
+        f.pop("ejecucion_id", None)
+    return filas
+
+
+def _cumple(fila, filtros):
+    return all(_clave(c, fila.get(c)) == _clave(c, v) for c, v in filtros.items())
+
+
+def _buscar(filas, indices, filtros, orden):
+    """Parte del indice mas selectivo disponible y filtra el resto de los campos sobre ese subconjunto."""
+    for campo in orden:
+        if campo in filtros:
+            candidatos = indices[campo].get(_clave(campo, filtros[campo]), [])
+            break
+    else:
+        candidatos = filas
+    return [f for f in candidatos if _cumple(f, filtros)]
+
+
+# ==========================
+# RECARGA EN CALIENTE
+# ==========================
+class Fuente:
+    """Instantanea vigente + hilo que la reemplaza cuando el historial cambia."""
+
+    def __init__(self, ruta_db, intervalo=INTERVALO_DEFAULT, log=None):
+        self.ruta_db    = ruta_db
+        self.intervalo  = intervalo
+        self.log        = log or (lambda msg, nivel="INFO": None)
+        self.actual     = None
+        self.recargas   = 0
+        self._firma     = None
+        self._detener   = threading.Event()
+
+    def _firma_db(self):
+        try:
+            st = os.stat(self.ruta_db)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def revisar(self):
+        """Recarga si el historial cambio. True si se publico una instantanea nueva."""
+        firma = self._firma_db()
+        if firma is None or firma == self._firma:
+            return False
+        try:
+            nueva = Instantanea.cargar(self.ruta_db)
+        except sqlite3.Error as e:   # p. ej. una ejecucion escribiendo en ese momento
+            self.log(f"No se pudo leer el historial ({e}); se reintenta", "WARN")
+            return False
+        self._firma = firma
+        previa = self.actual
+        if previa is not None and nueva.ejecucion == previa.ejecucion:
+            return False
+        self.actual = nueva   # asignacion atomica: las consultas ven la vieja o la nueva
+        self.recargas += 1
+        eid = nueva.ejecucion["id"] if nueva.ejecucion else "-"
+        self.log(f"Instantanea cargada: ejecucion #{eid}, {len(nueva.certificados)} certificados, "
+                 f"{len(nueva.clasificaciones)} clasificaciones")
+        return True
+
+    def _vigilar(self):
+        while not self._detener.wait(self.intervalo):
+            self.revisar()
+
+    def iniciar(self):
+        self.revisar()
+        threading.Thread(target=self._vigilar, name="recarga-historial", daemon=True).start()
+
+    def detener(self):
+        self._detener.set()
+
+
+# ==========================
+# HTTP
+# ==========================
+FILTROS_CERT = ("ambiente", "alias", "seccion", "fingerprint", "serial")
+FILTROS_COMP = ("ambiente", "alias", "resultado", "seccion", "hoja")
+FILTROS_VENC = ("ambiente", "alias", "hoja", "estado")
+
+
+class Manejador(BaseHTTPRequestHandler):
+    fuente = None   # Fuente compartida (se asigna al crear el servidor)
+
+    def log_message(self, formato, *args):   # sin log por consulta en la consola
+        pass
+
+    def _responder(self, codigo, datos):
+        cuerpo = json.dumps(datos, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        url   = urlparse(self.path)
+        args  = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        inst  = self.fuente.actual
+        ruta  = url.path.rstrip("/") or "/estado"
+        if inst is None:
+            return self._responder(503, {"error": f"sin historial en {self.fuente.ruta_db}"})
+        try:
+            if ruta == "/estado":
+                datos = {"ejecucion": inst.ejecucion, "cargada": inst.cargada, "recargas": self.fuente.recargas,
+                         "certificados": len(inst.certificados), "comparaciones": len(inst.comparaciones),
+                         "clasificaciones": len(inst.clasificaciones)}
+            elif ruta == "/certificados":
+                datos = _resultado(inst.certificados_donde(_filtros(args, FILTROS_CERT)))
+            elif ruta == "/comparaciones":
+                datos = _resultado(inst.comparaciones_donde(_filtros(args, FILTROS_COMP)))
+            elif ruta == "/vencimientos":
+                desde, hasta = _ventana(args)
+                datos = _resultado(inst.vencimientos_entre(desde, hasta, _filtros(args, FILTROS_VENC)),
+                                   desde=desde, hasta=hasta)
+            else:
+                return self._responder(404, {"error": f"ruta desconocida: {url.path}",
+                                             "rutas": ["/estado", "/certificados", "/vencimientos", "/comparaciones"]})
+        except ValueError as e:
+            return self._responder(400, {"error": str(e)})
+        self._responder(200, datos)
+
+
+def _filtros(args, permitidos):
+    return {k: v for k, v in args.items() if k in permitidos and v != ""}
+
+
+def _resultado(filas, **extra):
+    return dict(extra, total=len(filas), resultados=filas)
+
+
+def _ventana(args):
+    """(desde, hasta) ISO: ?dias=N -> [0000-00-00, hoy+N]; ?desde/?hasta explicitos."""
+    if "dias" in args:
+        try:
+            dias = int(args["dias"])
+        except ValueError:
+            raise ValueError("'dias' debe ser un entero")
+        return args.get("desde", "0000-00-00"), str(date.today() + timedelta(days=dias))
+    desde, hasta = args.get("desde", "0000-00-00"), args.get("hasta", "9999-12-31")
+    for v in (desde, hasta):
+        if v not in ("0000-00-00", "9999-12-31"):
+            datetime.strptime(v, "%Y-%m-%d")   # ValueError -> 400
+    return desde, hasta
+
+
+def crear_servidor(ruta_db, host="127.0.0.1", puerto=PUERTO_DEFAULT, intervalo=INTERVALO_DEFAULT, log=None):
+    fuente = Fuente(ruta_db, intervalo, log)
+    fuente.iniciar()
+    manejador = type("ManejadorHistorial", (Manejador,), {"fuente": fuente})
+    return ThreadingHTTPServer((host, puerto), manejador), fuente
+
+
+# ==========================
+# CLI
+# ==========================
+def _log(msg, nivel="INFO"):
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] [{nivel}] {msg}", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="procesar.py servicio",
+                                     description="Consultas JSON sobre la ultima auditoria (solo lectura)")
+    parser.add_argument("--raiz", default=r"C:\Automatizacion_Excel", help="Carpeta raiz del proyecto")
+    parser.add_argument("--db", default=None, help=f"Ruta al historial (default: RAIZ/{historial.NOMBRE_DB})")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=PUERTO_DEFAULT)
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_DEFAULT,
+                        help="Segundos entre revisiones del historial para la recarga en caliente")
+    args = parser.parse_args(argv)
+
+    ruta_db = args.db or os.path.join(args.raiz, historial.NOMBRE_DB)
+    if not os.path.exists(ruta_db):
+        _log(f"Aun no existe el historial ({ruta_db}): se carga cuando termine la primera auditoria", "WARN")
+    servidor, fuente = crear_servidor(ruta_db, args.host, args.puerto, args.intervalo, _log)
+    _log(f"Servicio de consulta en http://{args.host}:{args.puerto}/estado")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fuente.detener()
+        servidor.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,148 @@
+"""
+Regresion de parche_xlsx: el libro parchado debe leerse igual que el mismo
+libro con los cambios aplicados por openpyxl y guardado con wb.save.
+"""
+
+import os
+import sys
+import shutil
+import zipfile
+import tempfile
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import PatternFill
+from openpyxl.styles.colors import Color
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import auditoria
+import parche_xlsx
+
+
+CAMBIOS = [
+    {"hoja": "UNO-WAS", "celda": "B2", "valor": "serial nuevo"},               # celda existente
+    {"hoja": "UNO-WAS", "celda": "C2", "valor": "entre B2 y D2"},              # celda nueva en fila existente
+    {"hoja": "UNO-WAS", "celda": "A9", "valor": "fila nueva"},                  # fila nueva al final
+    {"hoja": "UNO-WAS", "celda": "A4", "valor": "fila nueva intermedia"},       # fila nueva entre filas
+    {"hoja": "UNO-WAS", "celda": "B3", "valor": ""},                            # se vacia
+    {"hoja": "UNO-WAS", "celda": "F2", "fill": "FF0000"},                       # rojo sobre celda sin relleno
+    {"hoja": "UNO-WAS", "celda": "F3", "fill": None},                           # limpia un relleno de tema
+    {"hoja": "UNO-WAS", "celda": "F5", "fill": "FFFF00"},
+    {"hoja": "UNO-WAS", "celda": "F5", "valor": "Valid to 2030"},               # valor y relleno juntos
+    {"hoja": "UNO-WAS", "celda": "G2", "valor": "2027-03-01", "fecha": True},
+    {"hoja": "UNO-WAS", "formato_condicional": {"rangos": ["F2:F3", "G2"], "dias": 90}},
+    {"hoja": "DOS-AIPAC", "celda": "K2", "valor": "nuevo < & >"},
+]
+
+
+def _crear_libro(ruta):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "UNO-WAS"
+    ws.append(["alias", "serial", None, "otro", None, "vence"])
+    ws.append(["a1", "viejo", None, 12.5, None, "Valid to 2026"])
+    ws.append(["a2", "borrar", None, None, None, "Valid to 2027"])
+    ws["F3"].fill = PatternFill("solid", fgColor=Color(theme=4))
+    ws["A5"] = "a3"
+    ws["F5"] = "Valid to 2028"
+    ws["H5"] = datetime(2025, 1, 2)
+    ws2 = wb.create_sheet("DOS-AIPAC")
+    ws2["A1"] = "alias"
+    ws2["K2"] = "viejo"
+    wb.create_sheet("TRES-PLUG.WAS")["A1"] = "sin cambios"
+    wb.save(ruta)
+
+
+def _relleno(celda):
+    f = celda.fill
+    if f is None or f.fill_type is None:
+        return None
+    c = f.fgColor
+    return (f.fill_type, c.type, c.rgb[-6:] if c.type == "rgb" else c.theme if c.type == "theme" else c.indexed)
+
+
+def _contenido(ruta):
+    wb = load_workbook(ruta)
+    celdas = {}
+    for ws in wb:
+        for fila in ws.iter_rows():
+            for c in fila:
+                if c.value is not None or _relleno(c) is not None:
+                    celdas[(ws.title, c.coordinate)] = (c.value, _relleno(c), c.number_format)
+    reglas = sorted((ws.title, str(cf.sqref), tuple(r.formula[0] for r in cf.rules))
+                    for ws in wb for cf in ws.conditional_formatting)
+    return wb.sheetnames, celdas, reglas
+
+
+class TestParcheXlsx(unittest.TestCase):
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp(prefix="parche_")
+        self.base    = os.path.join(self.carpeta, "base.xlsx")
+        _crear_libro(self.base)
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta, ignore_errors=True)
+
+    def test_igual_que_guardado_normal(self):
+        parchado = os.path.join(self.carpeta, "parchado.xlsx")
+        normal   = os.path.join(self.carpeta, "normal.xlsx")
+        parche_xlsx.aplicar_parche(self.base, parchado, CAMBIOS)
+        wb = load_workbook(self.base)
+        auditoria.reaplicar_cambios(wb, CAMBIOS)
+        wb.save(normal)
+
+        hojas_p, celdas_p, reglas_p = _contenido(parchado)
+        hojas_n, celdas_n, reglas_n = _contenido(normal)
+        self.assertEqual(hojas_p, hojas_n)
+        self.assertEqual(celdas_p, celdas_n)
+        self.assertEqual(reglas_p, reglas_n)
+        self.assertEqual(celdas_p[("UNO-WAS", "G2")][0], datetime(2027, 3, 1))
+        self.assertIsNone(celdas_p[("UNO-WAS", "F3")][1])
+
+    def test_partes_sin_cambios_se_copian_iguales(self):
+        parchado = os.path.join(self.carpeta, "parchado.xlsx")
+        parche_xlsx.aplicar_parche(self.base, parchado, CAMBIOS)
+        with zipfile.ZipFile(self.base) as a, zipfile.ZipFile(parchado) as b:
+            self.assertIsNone(b.testzip())
+            hojas = parche_xlsx.mapa_hojas(a)
+            tocadas = {hojas["UNO-WAS"], hojas["DOS-AIPAC"], "xl/styles.xml"}
+            self.assertEqual(a.namelist(), b.namelist())
+            for info in a.infolist():
+                if info.filename in tocadas:
+                    continue
+                otra = b.getinfo(info.filename)
+                self.assertEqual((info.CRC, info.file_size, info.compress_type, info.date_time),
+                                 (otra.CRC, otra.file_size, otra.compress_type, otra.date_time), info.filename)
+                self.assertEqual(a.read(info), b.read(otra), info.filename)
+        self.assertFalse(os.path.exists(parchado + ".tmp"))
+
+    def test_falla_no_pisa_el_destino(self):
+        parchado = os.path.join(self.carpeta, "parchado.xlsx")
+        shutil.copy(self.base, parchado)
+        with mock.patch.object(parche_xlsx, "_copiar_parte", side_effect=OSError("disco lleno")), \
+                self.assertRaises(OSError):
+            parche_xlsx.aplicar_parche(self.base, parchado, CAMBIOS)
+        with open(self.base, "rb") as a, open(parchado, "rb") as b:
+            self.assertEqual(a.read(), b.read())
+        self.assertFalse(os.path.exists(parchado + ".tmp"))
+
+    def test_conserva_atributos_de_sheetData(self):
+        with zipfile.ZipFile(self.base) as z:
+            estilos = parche_xlsx._Estilos(z.read("xl/styles.xml").decode("utf-8"))
+        xml = ('<worksheet><sheetData x14ac:dyDescent="0.25"><row r="1"><c r="A1" t="inlineStr">'
+               '<is><t>a</t></is></c></row></sheetData></worksheet>')
+        nuevo = parche_xlsx.parchar_hoja(xml, {"B1": ("b", parche_xlsx._SIN_CAMBIO)}, estilos)
+        self.assertIn('<sheetData x14ac:dyDescent="0.25">', nuevo)
+        self.assertIn('<c r="B1" t="inlineStr">', nuevo)
+
+        vacia = parche_xlsx.parchar_hoja('<worksheet><sheetData x="1"/></worksheet>',
+                                         {"A1": ("a", parche_xlsx._SIN_CAMBIO)}, estilos)
+        self.assertTrue(vacia.startswith('<worksheet><sheetData x="1"><row r="1">'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Regresion de reglas_lista: una regla se reparte por el prefijo de ambiente
+solo si ese prefijo vale para todo lo que la regla puede aceptar.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import reglas_lista
+
+
+PREFIJOS = ["camaraprod", "camaratest", "camararesp"]
+
+
+def _reglas(*lineas):
+    reglas = reglas_lista.Reglas(PREFIJOS)
+    for linea in lineas:
+        reglas.agregar(linea)
+    return reglas.compilar()
+
+
+class TestReglasLista(unittest.TestCase):
+
+    def test_prefijo_literal_de_regex(self):
+        self.assertEqual(reglas_lista._literal_regex(r"^camaraprod_\d+_PC_.+\.out$"), "camaraprod_")
+        self.assertEqual(reglas_lista._literal_regex(r"^camaraprod_1?"), "camaraprod_")
+        self.assertEqual(reglas_lista._literal_regex(r"camaraprod_.*"), "")
+        self.assertEqual(reglas_lista._literal_regex(r"^camaraprod_1.*|^camaratest_1.*"), "")
+
+    def test_alternativas_permitidas(self):
+        reglas = _reglas(r"re:^camaraprod_1_PC_.+\.out$|^camaratest_1_PC_.+\.out$")
+        self.assertTrue(reglas.autorizado("camaraprod", "camaraprod_1_PC_x.out"))
+        self.assertTrue(reglas.autorizado("camaratest", "camaratest_1_PC_x.out"))
+        self.assertFalse(reglas.autorizado("camararesp", "camararesp_1_PC_x.out"))
+
+    def test_alternativas_denegadas(self):
+        reglas = _reglas("camaraprod_*_PC*.out", "camaratest_*_PC*.out",
+                         r"!re:^camaratest_9.*|^camaraprod_9.*")
+        self.assertTrue(reglas.denegado("camaraprod", "camaraprod_9_PC.out"))
+        self.assertTrue(reglas.denegado("camaratest", "camaratest_9_PC.out"))
+        self.assertFalse(reglas.autorizado("camaraprod", "camaraprod_9_PC.out"))
+        self.assertTrue(reglas.autorizado("camaraprod", "camaraprod_1_PC.out"))
+
+    def test_regla_con_prefijo_queda_en_su_ambiente(self):
+        reglas = _reglas(r"re:^camaraprod_\d+_SC_.+\.out$")
+        self.assertEqual(len(reglas.particiones["camaraprod"]), 1)
+        self.assertEqual(len(reglas.comun), 0)
+        self.assertFalse(reglas.autorizado("camaratest", "camaraprod_1_SC_x.out"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,8 +15,8 @@ if %errorlevel% neq 0 (
     exit
 )
 
-:: Ejecutamos el script de Python
-python copiar.py
+:: Ejecutamos el staging a traves del coordinador (una ejecucion a la vez por RAIZ)
+python procesar.py coordinar ejecutar staging
 
 echo.
 echo ============================================
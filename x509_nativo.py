@@ -0,0 +1,278 @@
+"""
+LECTURA NATIVA DE CERTIFICADOS X.509 v1.0
+- Lee los certificados directamente de archivos PEM, DER y keystores JKS /
+  JCEKS exportados, sin pasar por los volcados de texto de GSKit / keytool
+- Decodificador DER minimo en Python puro (sin dependencias): serial,
+  emisor, sujeto, vigencia y fingerprints SHA1 / SHA256 calculados sobre los
+  bytes DER del certificado (exactos, sin reparsear texto)
+- PKCS#12 (.p12 / .pfx) solo si 'cryptography' esta instalado: el contenido
+  va cifrado; la clave se toma de AUDITORIA_P12_CLAVE (vacia por defecto)
+- Funciona sin red en Linux y Windows; registro_parsers lo usa para
+  registrar los formatos pem / der / jks / pkcs12
+"""
+
+import os
+import re
+import base64
+import hashlib
+import struct
+from datetime import datetime, timezone
+
+
+VARIABLE_CLAVE_P12 = "AUDITORIA_P12_CLAVE"
+
+MAGIC_JKS   = b"\xfe\xed\xfe\xed"
+MAGIC_JCEKS = b"\xce\xce\xce\xce"
+
+_RE_PEM = re.compile(rb"-----BEGIN (?:X509 |TRUSTED )?CERTIFICATE-----(.+?)-----END (?:X509 |TRUSTED )?CERTIFICATE-----",
+                     re.DOTALL)
+
+# Atributos de nombre mas comunes (el resto se muestra como OID)
+_ATRIBUTOS = {
+    "2.5.4.3":  "CN",
+    "2.5.4.4":  "SN",
+    "2.5.4.5":  "SERIALNUMBER",
+    "2.5.4.6":  "C",
+    "2.5.4.7":  "L",
+    "2.5.4.8":  "ST",
+    "2.5.4.9":  "STREET",
+    "2.5.4.10": "O",
+    "2.5.4.11": "OU",
+    "2.5.4.12": "T",
+    "0.9.2342.19200300.100.1.25": "DC",
+    "1.2.840.113549.1.9.1":       "EMAILADDRESS",
+}
+
+_TAG_INTEGER     = 0x02
+_TAG_OID         = 0x06
+_TAG_UTCTIME     = 0x17
+_TAG_GENTIME     = 0x18
+_TAG_SEQUENCE    = 0x30
+_TAG_VERSION     = 0xA0   # [0] EXPLICIT del tbsCertificate
+
+
+class ErrorDER(ValueError):
+    pass
+
+
+# ==========================
+# DECODIFICADOR DER
+# ==========================
+def _tlv(datos, pos, estricto=True):
+    """
+    (tag, inicio_valor, fin_valor) del elemento que empieza en 'pos'. Sin
+    'estricto' no exige que el valor completo este en 'datos' (cabeceras).
+    """
+    if pos + 2 > len(datos):
+        raise ErrorDER("DER truncado")
+    tag = datos[pos]
+    largo = datos[pos + 1]
+    pos += 2
+    if largo & 0x80:
+        n = largo & 0x7F
+        if n == 0 or n > 4 or pos + n > len(datos):
+            raise ErrorDER("largo DER invalido")
+        largo = int.from_bytes(datos[pos:pos + n], "big")
+        pos += n
+    if estricto and pos + largo > len(datos):
+        raise ErrorDER("DER truncado")
+    return tag, pos, pos + largo
+
+
+def _hijos(datos, inicio, fin):
+    """Elementos (tag, inicio, fin) contenidos entre inicio y fin."""
+    pos = inicio
+    while pos < fin:
+        tag, i, f = _tlv(datos, pos)
+        yield tag, i, f
+        pos = f
+
+
+def _oid(valor):
+    primero = valor[0]
+    partes  = [str(primero // 40), str(primero % 40)]
+    n = 0
+    for b in valor[1:]:
+        n = (n << 7) | (b & 0x7F)
+        if not b & 0x80:
+            partes.append(str(n))
+            n = 0
+    return ".".join(partes)
+
+
+def _texto(tag, valor):
+    if tag == 0x1E:   # BMPString
+        return valor.decode("utf-16-be", errors="replace")
+    return valor.decode("utf-8", errors="replace")
+
+
+def _nombre(datos, inicio, fin):
+    """Name -> 'CN=..,OU=..,O=..,C=..' (del atributo mas especifico al mas general)."""
+    rdns = []
+    for _, i_set, f_set in _hijos(datos, inicio, fin):
+        partes = []
+        for _, i_atv, f_atv in _hijos(datos, i_set, f_set):
+            (t_oid, i_oid, f_oid), (t_val, i_val, f_val) = list(_hijos(datos, i_atv, f_atv))[:2]
+            oid = _oid(datos[i_oid:f_oid])
+            partes.append(f"{_ATRIBUTOS.get(oid, oid)}={_texto(t_val, datos[i_val:f_val])}")
+        rdns.append("+".join(partes))
+    return ",".join(reversed(rdns))
+
+
+def _fecha(tag, valor):
+    texto = valor.decode("ascii")
+    if tag == _TAG_UTCTIME:
+        anio = int(texto[:2])
+        texto = ("19" if anio >= 50 else "20") + texto
+    return datetime.strptime(texto[:14], "%Y%m%d%H%M%S").replace(tzinfo=timezone.utc)
+
+
+def _valor_cn(nombre):
+    for parte in nombre.split(","):
+        if parte.upper().startswith("CN="):
+            return parte[3:]
+    return nombre
+
+
+def decodificar_der(der):
+    """
+    Campos del certificado X.509 en 'der':
+    {serial_hex, emisor, sujeto, not_before, not_after (datetime UTC), sha1, sha256 (bytes), cn}
+    """
+    tag, i_cert, f_cert = _tlv(der, 0)
+    if tag != _TAG_SEQUENCE:
+        raise ErrorDER("no es un certificado X.509")
+    tag, i_tbs, f_tbs = next(_hijos(der, i_cert, f_cert))
+    campos = list(_hijos(der, i_tbs, f_tbs))
+    if campos and campos[0][0] == _TAG_VERSION:
+        campos = campos[1:]
+    if len(campos) < 5 or campos[0][0] != _TAG_INTEGER:
+        raise ErrorDER("tbsCertificate incompleto")
+
+    (_, i_ser, f_ser), _alg, (_, i_emi, f_emi), (_, i_vig, f_vig), (_, i_suj, f_suj) = campos[:5]
+    vigencia = list(_hijos(der, i_vig, f_vig))
+    if len(vigencia) != 2 or any(t not in (_TAG_UTCTIME, _TAG_GENTIME) for t, _, _ in vigencia):
+        raise ErrorDER("validez invalida")
+
+    sujeto = _nombre(der, i_suj, f_suj)
+    return {
+        "serial_hex": der[i_ser:f_ser].hex(),
+        "emisor":     _nombre(der, i_emi, f_emi),
+        "sujeto":     sujeto,
+        "cn":         _valor_cn(sujeto),
+        "not_before": _fecha(vigencia[0][0], der[vigencia[0][1]:vigencia[0][2]]),
+        "not_after":  _fecha(vigencia[1][0], der[vigencia[1][1]:vigencia[1][2]]),
+        "sha1":       hashlib.sha1(der[:f_cert]).digest(),
+        "sha256":     hashlib.sha256(der[:f_cert]).digest(),
+    }
+
+
+# ==========================
+# CONTENEDORES
+# ==========================
+def certificados_pem(contenido):
+    """Lista de DER de cada bloque CERTIFICATE del texto PEM."""
+    return [base64.b64decode(b"".join(m.group(1).split())) for m in _RE_PEM.finditer(contenido)]
+
+
+def _entero(formato, datos, pos):
+    try:
+        return struct.unpack_from(formato, datos, pos)[0]
+    except struct.error:
+        raise ErrorDER(f"keystore truncado en el byte {pos}") from None
+
+
+def _bloque(datos, pos, n):
+    if pos + n > len(datos):
+        raise ErrorDER(f"keystore truncado en el byte {pos} (faltan {pos + n - len(datos)} bytes)")
+    return datos[pos:pos + n], pos + n
+
+
+def _utf_java(datos, pos):
+    texto, pos = _bloque(datos, pos + 2, _entero(">H", datos, pos))
+    return texto.decode("utf-8", errors="replace"), pos
+
+
+def certificados_jks(contenido):
+    """
+    [(alias, der)] de un keystore JKS / JCEKS. Las entradas con clave privada
+    aportan el primer certificado de su cadena. No se verifica la firma de
+    integridad (requiere la clave del keystore) ni se leen claves secretas.
+    """
+    if len(contenido) < 12 or contenido[:4] not in (MAGIC_JKS, MAGIC_JCEKS):
+        raise ErrorDER("no es un keystore JKS/JCEKS")
+    version, cantidad = struct.unpack_from(">II", contenido, 4)
+    if version not in (1, 2):
+        raise ErrorDER("no es un keystore JKS/JCEKS")
+    pos, resultado = 12, []
+
+    def leer_cert(pos):
+        if version == 2:
+            _, pos = _utf_java(contenido, pos)   # tipo ('X.509')
+        return _bloque(contenido, pos + 4, _entero(">I", contenido, pos))
+
+    for _ in range(cantidad):
+        tipo = _entero(">I", contenido, pos)
+        alias, pos = _utf_java(contenido, pos + 4)
+        pos += 8   # fecha de creacion
+        if tipo == 1:        # clave privada + cadena
+            _, pos = _bloque(contenido, pos + 4, _entero(">I", contenido, pos))
+            cadena = _entero(">I", contenido, pos)
+            pos += 4
+            for i in range(cadena):
+                der, pos = leer_cert(pos)
+                if i == 0:
+                    resultado.append((alias, der))
+        elif tipo == 2:      # certificado de confianza
+            der, pos = leer_cert(pos)
+            resultado.append((alias, der))
+        else:                # clave secreta JCEKS (objeto Java serializado): no se puede saltar
+            break
+    return resultado
+
+
+def certificados_pkcs12(contenido, clave=None):
+    """[(alias, der)] de un PKCS#12. Requiere 'cryptography'; sin ella retorna None."""
+    try:
+        from cryptography.hazmat.primitives.serialization import pkcs12, Encoding
+    except ImportError:
+        return None
+    if clave is None:
+        clave = os.environ.get(VARIABLE_CLAVE_P12, "")
+    p12 = pkcs12.load_pkcs12(contenido, clave.encode() or None)
+    resultado = []
+    if p12.cert is not None:
+        resultado.append(((p12.cert.friendly_name or b"").decode() or "", p12.cert.certificate.public_bytes(Encoding.DER)))
+    for c in p12.additional_certs:
+        resultado.append(((c.friendly_name or b"").decode() or "", c.certificate.public_bytes(Encoding.DER)))
+    return resultado
+
+
+# ==========================
+# DETECCION
+# ==========================
+def es_pem(cabecera):
+    return b"-----BEGIN" in cabecera and b"CERTIFICATE-----" in cabecera
+
+
+def es_der(cabecera):
+    """SEQUENCE { SEQUENCE { [0] version | INTEGER serial ... } }."""
+    try:
+        tag, i, _  = _tlv(cabecera, 0, estricto=False)
+        tag2, j, _ = _tlv(cabecera, i, estricto=False)
+        return tag == tag2 == _TAG_SEQUENCE and cabecera[j] in (_TAG_VERSION, _TAG_INTEGER)
+    except (ErrorDER, IndexError):
+        return False
+
+
+def es_jks(cabecera):
+    return cabecera[:4] in (MAGIC_JKS, MAGIC_JCEKS)
+
+
+def es_pkcs12(cabecera):
+    """PFX ::= SEQUENCE { INTEGER 3, ContentInfo ... }."""
+    try:
+        tag, i, _ = _tlv(cabecera, 0, estricto=False)
+        return tag == _TAG_SEQUENCE and cabecera[i:i + 3] == b"\x02\x01\x03"
+    except (ErrorDER, IndexError):
+        return False